@@ -3,14 +3,49 @@ ASGI config for estate project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The Django application is wrapped so that the ASGI ``lifespan`` protocol starts the
+bot runtime on the server's event loop and stops it (flushing persistence) on
+shutdown. Webhook updates are then processed concurrently on that loop. See
+``estate/gunicorn_conf.py`` for the deployment profile.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
+import logging
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'estate.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from state.runtime import runtime  # noqa: E402  (needs the app registry)
+
+logger = logging.getLogger(__name__)
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if os.getenv('TOKEN'):
+                try:
+                    await runtime.start()
+                except Exception as e:
+                    logger.error(f"Bot runtime failed to start: {e}", exc_info=True)
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await runtime.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
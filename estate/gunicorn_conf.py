@@ -0,0 +1,34 @@
+"""Gunicorn deployment profile for serving the project over ASGI.
+
+Each worker is a uvicorn event loop running ``estate.asgi:application``. The ASGI
+lifespan starts one long-lived bot runtime per worker; the async webhook view acks
+Telegram immediately and many updates are processed concurrently on that loop, so
+webhook throughput is no longer bounded by the number of worker threads.
+
+Production (gunicorn managing uvicorn workers)::
+
+    gunicorn estate.asgi:application -c estate/gunicorn_conf.py
+
+Single process (development, or a container that is scaled horizontally)::
+
+    uvicorn estate.asgi:application --host 0.0.0.0 --port 8000 --lifespan on
+
+Settings below can be overridden with the environment variables named next to them.
+Note that each worker keeps its own bot runtime and in-process caches.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+worker_class = 'uvicorn_worker.UvicornWorker'
+# Event-loop workers are not blocked by outbound calls, so a small number per core suffices.
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() + 1, 4)))
+# Restart workers periodically to bound memory growth; jitter avoids restarting all at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 500))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# The bot runtime is started per worker by the ASGI lifespan, never in the master.
+preload_app = False
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'state.middleware.QueryProfilingMiddleware',  # no-op unless QUERY_PROFILING
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -83,7 +84,8 @@ WSGI_APPLICATION = 'estate.wsgi.app'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # DATABASE_PATH points a run at another file, e.g. one filled by generate_dataset.
+        'NAME': os.getenv('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -137,6 +139,67 @@ else:
     MEDIA_URL = 'https://sawewomen.org/'
 
 
+# Django REST framework: every list endpoint is cursor-paginated
+# (views pick the order with ``cursor_ordering``).
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'state.pagination.DefaultCursorPagination',
+    'PAGE_SIZE': 50,
+}
+
+
+# Telegram bot runtime
+# Telegram ids of the admins who answer live-agent requests (comma-separated).
+BOT_ADMINS = [int(admin) for admin in os.getenv('BOT_ADMINS', '1648265210').split(',') if admin.strip()]
+# Number of updates the long-lived bot application processes concurrently; one
+# chat's updates still run one at a time, in order (state.update_processor).
+BOT_CONCURRENT_UPDATES = int(os.getenv('BOT_CONCURRENT_UPDATES', 64))
+# Seconds between writes of changed user_data/conversation states to the database.
+# For that long another worker still sees the previous state, and a crash loses it.
+BOT_PERSISTENCE_UPDATE_INTERVAL = float(os.getenv('BOT_PERSISTENCE_UPDATE_INTERVAL', 1))
+# Where the bot reads and writes data: "orm" queries the models in-process,
+# "http" goes through the DRF API (state.tools / live.api).
+BOT_DATA_BACKEND = os.getenv('BOT_DATA_BACKEND', 'orm')
+# Public site: property links in bot messages, alerts and channel posts point
+# here, and the "http" backend calls its /api and /live endpoints.
+ESTATE_SITE_URL = os.getenv('ESTATE_SITE_URL', 'https://estate-r22a.onrender.com').rstrip('/')
+# In-process cache for customer/property lookups (state.cache).
+BOT_CACHE_TTL = float(os.getenv('BOT_CACHE_TTL', 60))
+BOT_CACHE_MAXSIZE = int(os.getenv('BOT_CACHE_MAXSIZE', 10000))
+# Seconds before the in-memory inline search index (state.search_index) is
+# reloaded to pick up changes made by other workers.
+BOT_SEARCH_INDEX_TTL = float(os.getenv('BOT_SEARCH_INDEX_TTL', 300))
+# Seconds between checks of the saved-search alert index (state.alerts) for
+# changes made by other workers; checked before matching a listing once stale.
+SAVED_SEARCH_INDEX_TTL = float(os.getenv('SAVED_SEARCH_INDEX_TTL', 60))
+# Bot API endpoint (token appended). Point it at `manage.py fake_telegram`, e.g.
+# http://localhost:8081/bot, to run the bot, drain_outbox and the benchmarks offline.
+TELEGRAM_API_BASE_URL = os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org/bot')
+# Connections the bot keeps open to api.telegram.org.
+BOT_CONNECTION_POOL_SIZE = int(os.getenv('BOT_CONNECTION_POOL_SIZE', 32))
+# Handler and data-call latency/error metrics (state.metrics), served at /metrics/.
+BOT_METRICS_ENABLED = os.getenv('BOT_METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Bearer token a scraper sends to /metrics/; without it only staff users can read it.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+
+# Per-request SQL profiling (state.middleware.QueryProfilingMiddleware): Server-Timing
+# headers, a warning for each query slower than QUERY_PROFILING_SLOW_MS, and a sampled
+# share of requests appended to QUERY_PROFILING_LOG as JSON lines.
+QUERY_PROFILING = os.getenv('QUERY_PROFILING', 'false').lower() in ('1', 'true', 'yes')
+QUERY_PROFILING_SLOW_MS = float(os.getenv('QUERY_PROFILING_SLOW_MS', 100))
+QUERY_PROFILING_SAMPLE_RATE = float(os.getenv('QUERY_PROFILING_SAMPLE_RATE', 0.1))
+QUERY_PROFILING_LOG = os.getenv('QUERY_PROFILING_LOG', str(BASE_DIR / 'query_profile.jsonl'))
+
+
+# Outbound HTTP (state.http.http_client)
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', 20))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', 300))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', 30))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 30))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 10))
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'estate.settings')
 
 application = get_wsgi_application()
+
+# Build the bot once per worker process instead of once per webhook hit.
+if os.getenv('TOKEN'):
+    from state.runtime import runtime
+    runtime.start_in_thread()
@@ -1,7 +1,8 @@
-import aiohttp
-import asyncio
+from django.conf import settings
 
-BASE_URL = 'https://estate-r22a.onrender.com/live'
+from state.http import http_client
+
+BASE_URL = f'{settings.ESTATE_SITE_URL}/live'
 
 async def create_request(user_id, username, name, phone, address, additional_text):
     data = {
@@ -12,9 +13,8 @@ async def create_request(user_id, username, name, phone, address, additional_tex
         "address": address,
         "additional_text": additional_text
     }
-    async with aiohttp.ClientSession() as session:
-        async with session.post(f'{BASE_URL}/requests/', json=data) as response:
-            return await response.json() if response.status == 201 else None
+    async with http_client.session().post(f'{BASE_URL}/requests/', json=data) as response:
+        return await response.json() if response.status == 201 else None
 
 async def create_message(request_id, sender_id, user_id, content):
     data = {
@@ -23,21 +23,46 @@ async def create_message(request_id, sender_id, user_id, content):
         "user_id": user_id,
         "content": content
     }
-    async with aiohttp.ClientSession() as session:
-        async with session.post(f'{BASE_URL}/messages/', json=data) as response:
-            return await response.json() if response.status == 201 else None
+    async with http_client.session().post(f'{BASE_URL}/messages/', json=data) as response:
+        return await response.json() if response.status == 201 else None
 
 async def get_all_requests():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'{BASE_URL}/requests/') as response:
-            return await response.json() if response.status == 200 else []
+    requests, cursor = [], None
+    while True:
+        page = await get_requests_page(cursor=cursor, limit=100)
+        requests.extend(page["results"])
+        cursor = page["next"]
+        if not cursor:
+            return requests
+
+async def get_requests_page(is_responded=None, cursor=None, limit=10):
+    params = {"page_size": limit}
+    if is_responded is not None:
+        params["is_responded"] = "true" if is_responded else "false"
+    if cursor:
+        params["after"] = cursor
+    async with http_client.session().get(f'{BASE_URL}/requests/', params=params) as response:
+        if response.status != 200:
+            return {"next": None, "results": []}
+        return await response.json()
 
 async def get_request_details(request_id):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'{BASE_URL}/requests/{request_id}/') as response:
-            return await response.json() if response.status == 200 else None
+    async with http_client.session().get(f'{BASE_URL}/requests/{request_id}/') as response:
+        return await response.json() if response.status == 200 else None
 
 async def get_all_messages():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'{BASE_URL}/messages/') as response:
-            return await response.json() if response.status == 200 else []
+    messages, url, params = [], f'{BASE_URL}/messages/', {"page_size": 200}
+    while url:
+        async with http_client.session().get(url, params=params) as response:
+            if response.status != 200:
+                return messages
+            page = await response.json()
+        messages.extend(page["results"])
+        url, params = page["next"], None
+    return messages
+
+
+async def get_active_request(user_id):
+    params = {"user_id": str(user_id)}
+    async with http_client.session().get(f'{BASE_URL}/requests/active/', params=params) as response:
+        return await response.json() if response.status == 200 else None
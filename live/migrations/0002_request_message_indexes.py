@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['request', 'created_at'], name='message_request_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['user_id', 'created_at'], name='request_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live', '0002_request_message_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['is_responded', 'created_at'], name='request_pending_created_idx'),
+        ),
+    ]
@@ -1,4 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+# How long a request stays open; live.signals deletes older ones.
+RESPONDED_REQUEST_TTL = timedelta(hours=3)
+PENDING_REQUEST_TTL = timedelta(minutes=30)
+
+
+class RequestQuerySet(models.QuerySet):
+    def open(self):
+        """Requests not yet due for clean-up: responded within ``RESPONDED_REQUEST_TTL``
+        or pending for less than ``PENDING_REQUEST_TTL``."""
+        now = timezone.now()
+        return self.filter(
+            Q(is_responded=True, created_at__gte=now - RESPONDED_REQUEST_TTL)
+            | Q(is_responded=False, created_at__gte=now - PENDING_REQUEST_TTL)
+        )
+
+    def active_for(self, user_id):
+        """The user's open requests, latest first, each annotated with ``assigned_admin_id``:
+        the sender of the newest message on it from one of ``BOT_ADMINS``."""
+        latest_admin = (
+            Message.objects.filter(request=OuterRef('pk'), sender_id__in=[str(admin) for admin in settings.BOT_ADMINS])
+            .order_by('-created_at', '-id')
+            .values('sender_id')[:1]
+        )
+        return (
+            self.open().filter(user_id=str(user_id))
+            .annotate(assigned_admin_id=Subquery(latest_admin))
+            .order_by('-created_at', '-id')
+        )
+
 
 class Request(models.Model):
     user_id = models.CharField(max_length=255)
@@ -10,6 +45,14 @@ class Request(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_responded = models.BooleanField(default=False)
 
+    objects = RequestQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'created_at'], name='request_user_created_idx'),
+            models.Index(fields=['is_responded', 'created_at'], name='request_pending_created_idx'),
+        ]
+
     def __str__(self):
         return f"Request from {self.name} (User ID: {self.user_id})"
 
@@ -21,5 +64,10 @@ class Message(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['request', 'created_at'], name='message_request_created_idx'),
+        ]
+
     def __str__(self):
         return f"Message from {self.sender_id} on {self.created_at}"
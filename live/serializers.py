@@ -1,12 +1,16 @@
 from rest_framework import serializers
+from state.serializers import SparseFieldsMixin
 from .models import  Request, Message
 
-class RequestSerializer(serializers.ModelSerializer):
+class RequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Request
         fields = '__all__'
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Message
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class ActiveRequestSerializer(RequestSerializer):
+    assigned_admin_id = serializers.CharField(read_only=True, allow_null=True)
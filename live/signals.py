@@ -1,8 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
-from datetime import timedelta
-from .models import Message, Request
+from .models import PENDING_REQUEST_TTL, RESPONDED_REQUEST_TTL, Message, Request
 
 @receiver(post_save, sender=Message)
 def mark_request_as_responded(sender, instance, created, **kwargs):
@@ -24,9 +23,6 @@ def delete_old_requests(sender, instance, created, **kwargs):
 def clean_up_old_requests():
     now = timezone.now()
 
-    three_hours_ago = now - timedelta(hours=3)
-    Request.objects.filter(is_responded=True, created_at__lt=three_hours_ago).delete()
+    Request.objects.filter(is_responded=True, created_at__lt=now - RESPONDED_REQUEST_TTL).delete()
 
-
-    thirty_minutes_ago = now - timedelta(minutes=30)
-    Request.objects.filter(is_responded=False, created_at__lt=thirty_minutes_ago).delete()
\ No newline at end of file
+    Request.objects.filter(is_responded=False, created_at__lt=now - PENDING_REQUEST_TTL).delete()
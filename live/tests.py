@@ -1,3 +1,71 @@
+"""Query-count regression tests for the routes of ``live/urls.py`` (see ``state.tests``),
+and the active-request rule the bot forwards messages by."""
 from django.test import TestCase
+from django.utils import timezone
+from django.urls import reverse
 
-# Create your tests here.
+from state.tests import ADMIN_ID, SUBJECT_ID, QueryBudgetMixin, seed
+from .models import PENDING_REQUEST_TTL, RESPONDED_REQUEST_TTL, Message, Request
+
+
+class LiveViewQueryCountTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed()
+
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+
+    def assertGetBudget(self, budget, url, **params):
+        def run():
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, url)
+        self.assertQueryBudget(budget, run)
+
+    def test_requests(self):
+        self.assertGetBudget(1, reverse('request-list'))
+        self.assertGetBudget(1, reverse('request-list'), is_responded='false')
+        self.assertGetBudget(1, reverse('request-detail', args=[Request.objects.first().pk]))
+        self.assertGetBudget(1, reverse('request-active'), user_id=SUBJECT_ID)
+
+    def test_request_page_size_is_validated(self):
+        url = reverse('request-list')
+        for page_size in ('0', '-3', 'ten', ''):
+            with self.subTest(page_size=page_size):
+                response = self.client.get(url, {'page_size': page_size})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['results']), 5)
+        self.assertEqual(len(self.client.get(url, {'page_size': 2}).json()['results']), 2)
+        self.assertEqual(self.client.get(url, {'after': 'bogus'}).status_code, 400)
+
+    def test_messages(self):
+        self.assertGetBudget(1, reverse('message-list'))
+        self.assertGetBudget(1, reverse('message-detail', args=[Message.objects.first().pk]))
+
+
+class ActiveRequestTests(TestCase):
+    def setUp(self):
+        self.request = Request.objects.create(user_id="1", name="User", phone="0911000000", address="Bole")
+
+    def active(self):
+        return Request.objects.active_for("1").first()
+
+    def age(self, delta, is_responded):
+        Request.objects.filter(pk=self.request.pk).update(created_at=timezone.now() - delta, is_responded=is_responded)
+
+    def test_only_open_requests_are_active(self):
+        self.assertEqual(self.active(), self.request)
+        self.age(PENDING_REQUEST_TTL * 2, is_responded=False)
+        self.assertIsNone(self.active())
+        self.age(PENDING_REQUEST_TTL * 2, is_responded=True)
+        self.assertEqual(self.active(), self.request)
+        self.age(RESPONDED_REQUEST_TTL * 2, is_responded=True)
+        self.assertIsNone(self.active())
+
+    def test_only_admins_are_assigned(self):
+        Message.objects.create(request=self.request, sender_id="1", content="hello")
+        Message.objects.create(request=self.request, sender_id="2", content="not an admin")
+        self.assertIsNone(self.active().assigned_admin_id)
+        Message.objects.create(request=self.request, sender_id=str(ADMIN_ID), content="on it")
+        Message.objects.create(request=self.request, sender_id="2", content="still not an admin")
+        self.assertEqual(self.active().assigned_admin_id, str(ADMIN_ID))
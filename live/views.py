@@ -1,11 +1,32 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from django.utils.dateparse import parse_datetime
+from state.pagination import KeysetPagination
 from .models import Request, Message
-from .serializers import RequestSerializer, MessageSerializer
+from .serializers import RequestSerializer, MessageSerializer, ActiveRequestSerializer
 
 class RequestViewSet(viewsets.ModelViewSet):
     queryset = Request.objects.all()
     serializer_class = RequestSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+        is_responded = params.get('is_responded')
+        if is_responded is not None:
+            queryset = queryset.filter(is_responded=is_responded.lower() in ('1', 'true', 'yes'))
+        for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+            if params.get(param):
+                value = parse_datetime(params[param])
+                if value is None:
+                    raise ValidationError({param: "Expected an ISO 8601 datetime."})
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
 
     def update(self, request, pk):
         # Mark the request as responded
@@ -15,6 +36,22 @@ class RequestViewSet(viewsets.ModelViewSet):
 
         return Response({"status": "Request marked as responded."})
 
+    @action(detail=False, methods=['get'])
+    def active(self, request):
+        """The latest open request of ``?user_id=`` and the admin handling it, in one query.
+
+        A request is open while it is younger than 3 hours once responded, or than
+        30 minutes while pending (``live.models``); older ones are never returned.
+        ``assigned_admin_id`` is the last ``BOT_ADMINS`` member who wrote on it, or null.
+        """
+        user_id = request.query_params.get('user_id')
+        if not user_id:
+            raise ValidationError({"user_id": "This query parameter is required."})
+        active_request = Request.objects.active_for(user_id).first()
+        if active_request is None:
+            raise NotFound("No request found for this user.")
+        return Response(ActiveRequestSerializer(active_request).data)
+
 class MessageViewSet(viewsets.ModelViewSet):
     queryset = Message.objects.all()
     serializer_class = MessageSerializer
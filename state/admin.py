@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models import Q
 from unfold.admin import ModelAdmin
-from .models import Customer, Property, Tour, Favorite  
+from .models import Customer, Property, Tour, Favorite, OutboxMessage, SavedSearch
+from . import fulltext
 
 admin.site.site_header = "Real Estate Admin Portal"
 admin.site.site_title = "Real Estate Admin"
@@ -8,10 +10,14 @@ admin.site.index_title = "Welcome to the Real Estate Admin Dashboard"
 
 @admin.register(Customer)
 class CustomerAdmin(ModelAdmin):
-    list_display = ('telegram_id', 'full_name', 'email', 'user_type', 'is_verified', 'created_at')
+    list_display = (
+        'telegram_id', 'full_name', 'email', 'user_type', 'is_verified', 'confirmed_property_count', 'tour_count', 'created_at',
+    )
     list_filter = ('user_type', 'is_verified')
     search_fields = ('telegram_id', 'full_name', 'email')
-    readonly_fields = ('created_at', 'telegram_id',)
+    readonly_fields = (
+        'created_at', 'telegram_id', 'property_count', 'confirmed_property_count', 'pending_property_count', 'tour_count',
+    )
 
 @admin.register(Property)
 class PropertyAdmin(ModelAdmin):
@@ -39,6 +45,15 @@ class PropertyAdmin(ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Listing text goes through the FTS5 index; owner names are not indexed.
+        if search_term and fulltext.fts_available() and fulltext.match_expression(search_term):
+            # owner__in (not a join) lets SQLite OR two index lookups instead of scanning.
+            owners = Customer.objects.filter(full_name__icontains=search_term).values('pk')
+            matches = Q(pk__in=fulltext.matching_ids(search_term)) | Q(owner__in=owners)
+            return queryset.filter(matches), False
+        return super().get_search_results(request, queryset, search_term)
+
 @admin.register(Tour)
 class TourAdmin(ModelAdmin):
     list_display = ('property', 'full_name', 'phone_number', 'tour_date', 'tour_time', 'status', 'telegram_id', 'username')
@@ -61,3 +76,18 @@ class FavoriteAdmin(ModelAdmin):
             'fields': ('customer', 'property')
         }),
     )
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(ModelAdmin):
+    list_display = ('id', 'method', 'chat_id', 'key', 'status', 'attempts', 'available_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'method')
+    search_fields = ('chat_id', 'key')
+    readonly_fields = ('method', 'chat_id', 'payload', 'key', 'result', 'claimed_at', 'sent_at', 'created_at')
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(ModelAdmin):
+    list_display = ('customer', 'city', 'for_property', 'min_price', 'max_price', 'min_bedrooms', 'is_active', 'created_at')
+    list_filter = ('for_property', 'is_active', 'city')
+    search_fields = ('customer__full_name', 'customer__telegram_id', 'city')
+    list_select_related = ('customer',)
+    readonly_fields = ('customer', 'created_at')
@@ -0,0 +1,260 @@
+"""Saved-search alerts.
+
+When a property is first published to the channel, the saved searches it matches
+are found through :class:`SavedSearchIndex` and every matching user is sent a
+direct message through the outbox (and so within ``drain_outbox``'s rate limits).
+
+The index buckets searches by their discrete criteria, (city, for_property) with
+"" standing for "any", so a listing only looks at the four buckets it can fall
+into. Inside a bucket the price bands sit in an :class:`IntervalTree`, which
+returns the bands containing the listing's price without visiting the others.
+"""
+import logging
+import math
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Max
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+
+from .models import OutboxMessage, SavedSearch
+
+logger = logging.getLogger(__name__)
+
+INDEX_FIELDS = ('id', 'customer_id', 'city', 'for_property', 'min_price', 'max_price', 'min_bedrooms')
+
+
+def normalize_city(city) -> str:
+    return " ".join((city or "").split()).lower()
+
+
+def bucket_key(row) -> tuple:
+    return normalize_city(row['city']), row['for_property'] or ''
+
+
+def listing_price(instance) -> Decimal | None:
+    """The price a saved search's band applies to: monthly rent for rentals, else the selling price."""
+    return instance.monthly_rent if instance.for_property == 'rent' else instance.selling_price
+
+
+class IntervalTree:
+    """Static centered interval tree over closed ``(low, high, item)`` intervals.
+
+    ``stab(point)`` returns the items whose interval contains ``point`` in
+    O(log n + matches).
+    """
+
+    __slots__ = ('center', 'by_low', 'by_high', 'left', 'right')
+
+    def __init__(self, intervals):
+        endpoints = sorted(value for low, high, _ in intervals for value in (low, high) if math.isfinite(value))
+        self.center = endpoints[len(endpoints) // 2] if endpoints else 0
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] < self.center:
+                left.append(interval)
+            elif interval[0] > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        self.by_low = sorted(here, key=lambda interval: interval[0])
+        self.by_high = sorted(here, key=lambda interval: interval[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def stab(self, point) -> list:
+        found, node = [], self
+        while node is not None:
+            if point < node.center:
+                for low, _, item in node.by_low:
+                    if low > point:
+                        break
+                    found.append(item)
+                node = node.left
+            elif point > node.center:
+                for _, high, item in node.by_high:
+                    if high < point:
+                        break
+                    found.append(item)
+                node = node.right
+            else:
+                found.extend(item for _, _, item in node.by_low)
+                break
+        return found
+
+
+class SavedSearchIndex:
+    """Active saved searches bucketed by (city, for_property), price bands in interval trees.
+
+    The index is loaded on first use, then kept current by the ``SavedSearch``
+    ``post_save``/``post_delete`` receivers in ``state.signals``: a change touches
+    one row and drops the tree of its bucket, which is rebuilt on next use. Changes
+    made by other processes, or by writes that skip signals, are picked up by
+    :meth:`ensure_loaded`. Once ``ttl`` seconds have passed since the last check, it
+    compares the row count and latest ``updated_at`` with those of the last load
+    (one aggregate query) before matching, and reloads if they differ.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._buckets = {}
+        self._keys = {}
+        self._trees = {}
+        self._fingerprint = None
+        self._checked_at = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._checked_at is not None
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def fingerprint():
+        return tuple(SavedSearch.objects.aggregate(count=Count('id'), latest=Max('updated_at')).values())
+
+    def load(self, fingerprint=None) -> None:
+        fingerprint = fingerprint or self.fingerprint()
+        buckets, keys = {}, {}
+        for row in SavedSearch.objects.filter(is_active=True).values(*INDEX_FIELDS).iterator(chunk_size=5000):
+            key = keys[row['id']] = bucket_key(row)
+            buckets.setdefault(key, {})[row['id']] = row
+        with self._lock:
+            self._buckets, self._keys, self._trees = buckets, keys, {}
+            self._fingerprint, self._checked_at = fingerprint, time.monotonic()
+        logger.info(f"Saved search index loaded: {len(self)} searches in {len(buckets)} buckets.")
+
+    def refresh(self) -> bool:
+        """Reload if saved searches changed since the last load; return whether it did."""
+        fingerprint = self.fingerprint()
+        if fingerprint != self._fingerprint:
+            self.load(fingerprint)
+            return True
+        self._checked_at = time.monotonic()
+        return False
+
+    def ensure_loaded(self) -> None:
+        """Load on first use; afterwards refresh once ``ttl`` seconds passed since the last check."""
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            elif time.monotonic() - self._checked_at > self.ttl:
+                self.refresh()
+
+    # --- incremental updates ---
+    def update(self, instance: SavedSearch) -> None:
+        """Apply a saved search: (re)index it if active, drop it otherwise."""
+        if not self.loaded:
+            return
+        if not instance.is_active:
+            self.remove(instance.pk)
+            return
+        row = {field: getattr(instance, field) for field in INDEX_FIELDS}
+        key = bucket_key(row)
+        with self._lock:
+            self._drop(instance.pk)
+            self._buckets.setdefault(key, {})[instance.pk] = row
+            self._keys[instance.pk] = key
+            self._trees.pop(key, None)
+
+    def remove(self, pk) -> None:
+        if not self.loaded:
+            return
+        with self._lock:
+            self._drop(pk)
+
+    def _drop(self, pk):
+        key = self._keys.pop(pk, None)
+        if key is None:
+            return
+        bucket = self._buckets[key]
+        del bucket[pk]
+        if not bucket:
+            del self._buckets[key]
+        self._trees.pop(key, None)
+
+    def _tree(self, key) -> IntervalTree | None:
+        tree = self._trees.get(key)
+        if tree is None and key in self._buckets:
+            tree = self._trees[key] = IntervalTree([
+                (
+                    float(row['min_price']) if row['min_price'] is not None else -math.inf,
+                    float(row['max_price']) if row['max_price'] is not None else math.inf,
+                    row,
+                )
+                for row in self._buckets[key].values()
+            ])
+        return tree
+
+    def match(self, city, for_property, price, bedrooms) -> list:
+        """Saved searches (as dicts) a listing with these attributes satisfies."""
+        city = normalize_city(city)
+        point = float(price) if price is not None else None
+        matches = []
+        with self._lock:
+            for key in {(city, for_property), (city, ''), ('', for_property), ('', '')}:
+                tree = self._tree(key)
+                if tree is None:
+                    continue
+                if point is None:
+                    # No price on the listing: only searches without a price band apply.
+                    candidates = [
+                        row for row in self._buckets[key].values() if row['min_price'] is None and row['max_price'] is None
+                    ]
+                else:
+                    candidates = tree.stab(point)
+                matches.extend(
+                    row for row in candidates
+                    if row['min_bedrooms'] is None or (bedrooms is not None and bedrooms >= row['min_bedrooms'])
+                )
+        return matches
+
+    def match_property(self, instance) -> list:
+        return self.match(instance.city, instance.for_property, listing_price(instance), instance.bedrooms)
+
+
+saved_search_index = SavedSearchIndex(ttl=settings.SAVED_SEARCH_INDEX_TTL)
+
+
+def alert_text(instance) -> str:
+    price = listing_price(instance)
+    price_label = "Monthly Rent" if instance.for_property == 'rent' else "Price"
+    return (
+        f"🔔 *New listing matching your saved search*\n\n"
+        f"🏠 *{instance.name}*\n"
+        f"📍 {instance.subcity_zone}, {instance.city}\n"
+        f"🏷️ {instance.get_for_property_display()}\n"
+        f"💵 *{price_label}:* ${price}\n"
+        f"🛌 *Bedrooms:* {instance.bedrooms}\n"
+    )
+
+
+def notify_matches(instance) -> int:
+    """Queue one alert per user whose saved search matches ``instance``; return how many."""
+    saved_search_index.ensure_loaded()
+    recipients = {}
+    for row in saved_search_index.match_property(instance):
+        if row['customer_id'] != instance.owner_id:
+            recipients.setdefault(row['customer_id'], row['id'])
+    if not recipients:
+        return 0
+
+    keyboard = InlineKeyboardMarkup([[
+        InlineKeyboardButton("View Property", url=f"{settings.ESTATE_SITE_URL}/property/{instance.id}"),
+        InlineKeyboardButton("Request Tour", url=f"https://t.me/yene_etbot?start=request_tour_{instance.id}"),
+    ]]).to_dict()
+    payload = {'text': alert_text(instance), 'parse_mode': ParseMode.MARKDOWN, 'reply_markup': keyboard}
+    OutboxMessage.objects.bulk_create(
+        [
+            OutboxMessage(chat_id=customer_id, payload=payload, key=f"search_alert:{search_id}:{instance.id}")
+            for customer_id, search_id in sorted(recipients.items())
+        ],
+        batch_size=500,
+    )
+    logger.info(f"Queued {len(recipients)} saved-search alerts for property {instance.id}.")
+    return len(recipients)
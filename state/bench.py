@@ -0,0 +1,172 @@
+"""Helpers shared by the ``bench_*`` management commands."""
+import itertools
+import statistics
+import time
+
+FAKE_TOKEN = "7000000001:benchmark-token"
+
+_update_ids = itertools.count(1)
+
+
+def bot_request(latency=0.0):
+    """Request object for benchmark bots.
+
+    ``FakeBotRequest`` answers in-process unless ``TELEGRAM_API_BASE_URL`` points at a
+    local server (``manage.py fake_telegram``); then None is returned and the bot
+    uses its real HTTP client against that server.
+    """
+    from urllib.parse import urlsplit
+
+    from django.conf import settings
+
+    from .fake_telegram import FakeBotRequest
+
+    if urlsplit(settings.TELEGRAM_API_BASE_URL).hostname in ("localhost", "127.0.0.1"):
+        return None
+    return FakeBotRequest(latency)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples`` (``pct`` in 0-100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "count": len(ms),
+        "mean": statistics.fmean(ms) if ms else 0.0,
+        "p50": percentile(ms, 50),
+        "p95": percentile(ms, 95),
+        "p99": percentile(ms, 99),
+        "max": max(ms) if ms else 0.0,
+    }
+
+
+def format_summary(label, summary):
+    return (
+        f"{label:<28} n={summary['count']:<6} mean={summary['mean']:8.2f}ms "
+        f"p50={summary['p50']:8.2f}ms p95={summary['p95']:8.2f}ms "
+        f"p99={summary['p99']:8.2f}ms max={summary['max']:8.2f}ms"
+    )
+
+
+def _user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "username": f"user{user_id}"}
+
+
+def message_update(user_id, text):
+    """Raw webhook payload for a private text message from ``user_id``."""
+    message = {
+        "message_id": next(_update_ids),
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": _user(user_id),
+        "text": text,
+    }
+    if text.startswith("/"):
+        command = text.split()[0]
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    return {"update_id": next(_update_ids), "message": message}
+
+
+def callback_update(user_id, data):
+    """Raw webhook payload for an inline button press by ``user_id``."""
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_update_ids)),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": next(_update_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "text": "menu",
+            },
+        },
+    }
+
+
+CITIES = {
+    "Addis Ababa": ["Bole", "Kirkos", "Yeka", "Arada", "Lideta", "Kolfe Keranio", "Nifas Silk-Lafto", "Akaky Kaliti"],
+    "Adama": ["Bole", "Dabe", "Boku"],
+    "Bahir Dar": ["Belay Zeleke", "Shimbit", "Gish Abay"],
+    "Hawassa": ["Tabor", "Menaharia", "Haik Dar"],
+}
+CITY_CENTERS = {
+    "Addis Ababa": (9.0108, 38.7613),
+    "Adama": (8.5400, 39.2700),
+    "Bahir Dar": (11.5936, 37.3908),
+    "Hawassa": (7.0621, 38.4764),
+}
+DESCRIPTION_WORDS = (
+    "furnished spacious bright quiet modern renovated garden balcony parking view "
+    "near school hospital church mall airport ring road compound security water tank"
+).split()
+
+
+def property_rows(owner, count, seed=0):
+    """``count`` unsaved, varied ``Property`` instances owned by ``owner`` (deterministic per ``seed``)."""
+    from datetime import date
+    from decimal import Decimal
+    import random
+
+    from .models import Property
+
+    rng = random.Random(seed)
+    cities = list(CITIES)
+    usages = [value for value, _ in Property.USAGE_CHOICES]
+    for i in range(count):
+        city = rng.choice(cities)
+        subcity = rng.choice(CITIES[city])
+        for_property = rng.choice(("sale", "rent", "investment"))
+        bedrooms = rng.randint(0, 6)
+        area = round(rng.uniform(40, 600), 1)
+        price = Decimal(rng.randrange(500_000, 40_000_000, 1000))
+        description = " ".join(rng.choice(DESCRIPTION_WORDS) for _ in range(12))
+        center_lat, center_lng = CITY_CENTERS[city]
+        lat = round(center_lat + rng.uniform(-0.08, 0.08), 6)
+        lng = round(center_lng + rng.uniform(-0.08, 0.08), 6)
+        instance = Property(
+            owner=owner,
+            name=f"{bedrooms} bedroom {rng.choice(usages)} in {subcity} #{i}",
+            for_property=for_property,
+            type_property="residential",
+            usage=rng.choice(usages),
+            country="Ethiopia",
+            region=city,
+            city=city,
+            subcity_zone=subcity,
+            woreda=f"{rng.randint(1, 14):02d}",
+            address=f"{subcity}, {city}",
+            floor_level=str(rng.randint(0, 12)),
+            total_area=area,
+            area=area,
+            google_map_link=f"https://maps.google.com/?q={lat},{lng}",
+            living_rooms=rng.randint(1, 3),
+            bedrooms=bedrooms,
+            bathrooms=rng.randint(1, 4),
+            kitchens=1,
+            built_date=date(rng.randint(1990, 2024), rng.randint(1, 12), 1),
+            number_of_balconies=rng.randint(0, 3),
+            average_price_per_square_meter=(price / Decimal(area)).quantize(Decimal("0.01")),
+            selling_price=price,
+            computing_price=price,
+            monthly_rent=Decimal(rng.randrange(3_000, 150_000, 500)) if for_property == "rent" else None,
+            features_and_amenities=rng.choice(("finished", "semi_finished", "furnished")),
+            heating_type=rng.choice(("gas", "electric")),
+            cooling=rng.choice(("AC", "electric")),
+            nearest_residential=description[:60],
+            own_description=description,
+            ownership_of_property="do/ownership_files/benchmark.pdf",
+            status="confirmed" if rng.random() < 0.8 else "pending",
+        )
+        instance.update_coordinates()  # bulk_create skips the pre_save receiver
+        yield instance
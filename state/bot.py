@@ -1,39 +1,52 @@
 # -*- coding: utf-8 -*-
 from telegram.ext import (
     Application, CommandHandler, ContextTypes, ConversationHandler,
-    MessageHandler, filters, PicklePersistence, CallbackQueryHandler
+    MessageHandler, filters, CallbackQueryHandler, InlineQueryHandler
 )
 from telegram.constants import ParseMode, ChatAction
 from telegram import (
     Update, InlineKeyboardMarkup, InlineKeyboardButton,
-    ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+    ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove,
+    InlineQueryResultArticle, InputTextMessageContent
 )
+import asyncio
 import os
 import logging
-import aiohttp # <--- Import aiohttp instead of requests
+import re
 
-# --- Assuming state.tools and live.api are now async ---
-from state.tools import (
+from django.conf import settings
+
+# --- Data access (in-process ORM or HTTP API, see state.data) ---
+from state.data import (
     register_user, is_user_registered, get_user_details,
     get_user_properties, get_user_tours, get_property_details,
-    get_user_favorites, get_non_user_accounts, get_confirmed_user_properties
-)
-from live.api import (
-    create_message, get_all_requests, get_request_details,
-    get_all_messages, create_request
+    get_user_favorites, get_accounts_page,
+    get_properties_by_ids, get_nearby_properties,
+    create_tour, add_favorite, remove_favorite,
+    create_message, get_requests_page, get_request_details,
+    get_active_request, create_request,
+    create_saved_search, get_user_saved_searches, delete_saved_search
 )
+from state import metrics
+from state.persistence import DjangoPersistence
+from state.search_index import property_index
+from state.update_processor import PerChatUpdateProcessor
 
 # Set up logging (Original)
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- Configuration ---
-API_BASE_URL = "https://estate-r22a.onrender.com" # <--- CHANGED DOMAIN
 BOT_TOKEN = os.getenv('TOKEN') # Defined for setup if needed
 
-# Initialize persistence (Original)
-persistence = PicklePersistence(filepath='bot_dat')
+# Initialize persistence (user_data and conversation states live in the database)
+persistence = DjangoPersistence()
 PAGE_SIZE = 2
+REQUESTS_PAGE_SIZE = 5
+INLINE_RESULTS = 20
+NEARBY_RADIUS_KM = 5
+NEARBY_LIMIT = 5
+REQUEST_TEXT_PREVIEW = 500 # Keeps a full page of requests under Telegram's 4096-character limit
 
 # --- State Definitions --- CORRECTED RANGES
 FULL_NAME, PHONE_NUMBER, TOUR_DATE, TOUR_TIME = range(4) # States 0, 1, 2, 3
@@ -41,8 +54,9 @@ FULL_NAME, PHONE_NUMBER, TOUR_DATE, TOUR_TIME = range(4) # States 0, 1, 2, 3
 LIVE_REQUEST, LIVE_PHONE, LIVE_ADDRESS, LIVE_ADDITIONAL_TEXT = range(4, 8) # States 4, 5, 6, 7 <-- CORRECTED
 # Original: RESPOND_TO_REQUEST, RESPONSE_MESSAGE = range(2) <--- COLLISION
 RESPOND_TO_REQUEST, RESPONSE_MESSAGE = range(8, 10) # States 8, 9 <-- CORRECTED
+SEARCH_CITY, SEARCH_FOR, SEARCH_PRICE, SEARCH_BEDROOMS = range(10, 14) # Saved search alert
 
-ADMINS = [1648265210]
+ADMINS = settings.BOT_ADMINS
 LANGUAGES = ["Amharic", "English"] # Added definition based on usage
 
 # --- Bot Functions --- (Applying async await)
@@ -103,6 +117,7 @@ def get_main_menu():
         [InlineKeyboardButton("📋 List Properties 📂", callback_data="list_properties")], # Original callback
         [InlineKeyboardButton("❤️ List Favorites 💾", callback_data="list_favorites")], # Original callback
         [InlineKeyboardButton("📅 List Tours 🗓️", callback_data="list_tours")],       # Original callback
+        [InlineKeyboardButton("🔔 Search Alerts 🏘️", callback_data="my_searches")],
         [InlineKeyboardButton("💬 Live Agent 📞", callback_data="live_agent")],
         [InlineKeyboardButton("🌐 Change Language 🌍", callback_data="change_language")],
     ]
@@ -351,7 +366,7 @@ async def get_tour_time(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
 
     return ConversationHandler.END # Original return
 
-# --- ASYNC CHANGE: Made function async and use aiohttp ---
+# --- ASYNC CHANGE: Made function async ---
 async def register_tour_details_async(user_data: dict) -> bool: # Renamed from original register_tour_details
     """Async version to register tour details"""
     telegram_id = str(user_data.get('telegram_id'))
@@ -372,31 +387,18 @@ async def register_tour_details_async(user_data: dict) -> bool: # Renamed from o
         logger.error(f"Missing data for tour registration: {data}")
         return False
 
-    api_url = f"{API_BASE_URL}/api/tours/" # Use BASE URL
     try:
-        # Use aiohttp session
-        async with aiohttp.ClientSession() as session:
-            async with session.post(api_url, json=data) as response:
-                # Original didn't check status, just raised. Check status now.
-                if response.status >= 200 and response.status < 300:
-                    logger.info(f"Tour registered successfully via API. Status: {response.status}")
-                    return True
-                else:
-                    # Log API error response
-                    response_text = await response.text()
-                    logger.error(f"Failed to submit tour request. Status: {response.status}, Response: {response_text}")
-                    return False
-    # Keep original error logging style
-    except aiohttp.ClientError as e: # Catch async HTTP errors
-        logger.error(f"HTTP Client Error submitting tour request: {e}")
-        # Original didn't check if response object existed before logging
-        # if response: logger.error(f"Response content: {response.text}") # Cannot access response here
-        return False
+        tour = await create_tour(data)
     except Exception as e: # Catch other errors
          logger.error(f"Unexpected error in register_tour_details_async: {e}", exc_info=True)
          return False
+    if tour:
+        logger.info(f"Tour registered successfully for user {telegram_id}.")
+        return True
+    logger.error(f"Failed to submit tour request: {data}")
+    return False
 
-# --- ASYNC CHANGE: Added async keyword and use aiohttp ---
+# --- ASYNC CHANGE: Added async keyword ---
 async def handle_favorite_request(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query # Get query object
     await query.answer()
@@ -425,51 +427,30 @@ async def handle_favorite_request(update: Update, context: ContextTypes.DEFAULT_
                     favorite_id = favorite.get('id') # Retrieve the favorite model ID
                     break
 
-            async with aiohttp.ClientSession() as session:
-                # Original delete logic
-                if favorite_id:
-                    delete_url = f"{API_BASE_URL}/api/favorites/{favorite_id}/" # Use BASE URL
-                    try:
-                        async with session.delete(delete_url) as response:
-                            # Check status instead of relying on raise_for_status
-                            if response.status == 204: # No Content
-                                await context.bot.send_message(
-                                    chat_id=telegram_id,
-                                    text=f"❌ The property *{property_name}* has been removed from your favorites.",
-                                    parse_mode=ParseMode.MARKDOWN # Original mode
-                                )
-                            else:
-                                raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status, message=await response.text())
-                    # Keep original error handling structure
-                    except aiohttp.ClientError as e: # Catch async HTTP errors
-                        logger.error(f"Failed to remove property from favorites: {e}")
-                        # Original didn't check response obj
-                        await context.bot.send_message(chat_id=telegram_id, text="❌ Failed to remove from favorites. Please try again later.")
-
-                # Original add logic
+            # Original delete logic
+            if favorite_id:
+                if await remove_favorite(favorite_id):
+                    await context.bot.send_message(
+                        chat_id=telegram_id,
+                        text=f"❌ The property *{property_name}* has been removed from your favorites.",
+                        parse_mode=ParseMode.MARKDOWN # Original mode
+                    )
                 else:
-                    post_url = f"{API_BASE_URL}/api/favorites/" # Use BASE URL
-                    payload = {"property": property_id, "customer": telegram_id} # Original payload
-                    try:
-                        async with session.post(post_url, json=payload) as response:
-                            # Check status
-                            if response.status >= 200 and response.status < 300: # e.g. 201 Created
-                                await context.bot.send_message(
-                                    chat_id=telegram_id,
-                                    text=f"❤️ The property *{property_name}* has been added to your favorites!",
-                                    parse_mode=ParseMode.MARKDOWN # Original mode
-                                )
-                            else:
-                                raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status, message=await response.text())
-                    # Keep original error handling structure
-                    except aiohttp.ClientError as e: # Catch async HTTP errors
-                        logger.error(f"Failed to add property to favorites: {e}")
-                        # Original didn't check response obj
-                        await context.bot.send_message(chat_id=telegram_id, text="❌ Failed to add to favorites. Please try again later.")
-
-        except aiohttp.ClientError as e: # Catch errors from get_user_favorites/get_property_details
-            logger.error(f"API Error during favorite handling for {telegram_id}: {e}")
-            await context.bot.send_message(chat_id=telegram_id, text="❌ Error updating favorites (connection).")
+                    logger.error(f"Failed to remove property {property_id} from favorites of {telegram_id}")
+                    await context.bot.send_message(chat_id=telegram_id, text="❌ Failed to remove from favorites. Please try again later.")
+
+            # Original add logic
+            else:
+                if await add_favorite(telegram_id, property_id):
+                    await context.bot.send_message(
+                        chat_id=telegram_id,
+                        text=f"❤️ The property *{property_name}* has been added to your favorites!",
+                        parse_mode=ParseMode.MARKDOWN # Original mode
+                    )
+                else:
+                    logger.error(f"Failed to add property {property_id} to favorites of {telegram_id}")
+                    await context.bot.send_message(chat_id=telegram_id, text="❌ Failed to add to favorites. Please try again later.")
+
         except Exception as e: # Catch other errors
              logger.error(f"Unexpected error during favorite handling for {telegram_id}: {e}", exc_info=True)
              await context.bot.send_message(chat_id=telegram_id, text="❌ An unexpected error occurred.")
@@ -627,15 +608,18 @@ async def list_tours(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
 
         # Original response text
         response_text = f"📅 Here are your scheduled tours (Page {current_page}):\n\n" # Add page num
+        # Resolve every property on this page in one lookup
+        try:
+            page_properties = await get_properties_by_ids(tour.get('property') for tour in paginated_tours)
+        except Exception as detail_err:
+            logger.error(f"Error fetching property details in list_tours: {detail_err}")
+            page_properties = None
         for i, tour in enumerate(paginated_tours, start=start_index + 1):
-            prop_name = "Loading..." # Default while fetching
-            try:
-                # --- ASYNC CHANGE: Added await ---
-                property_details = await get_property_details(tour.get('property')) # Safe get ID
+            if page_properties is None:
+                prop_name = "Error"
+            else:
+                property_details = page_properties.get(tour.get('property'))
                 prop_name = property_details.get('name', 'Unknown Property') if property_details else 'Unknown Property'
-            except Exception as detail_err:
-                 logger.error(f"Error fetching property details in list_tours: {detail_err}")
-                 prop_name = "Error"
 
             # Basic Markdown escape
             prop_name_safe = prop_name.replace("*","\\*").replace("_","\\_")
@@ -714,15 +698,18 @@ async def list_favorites(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
         # Original response text
         response_text = f"🌟 Your Favorite Properties (Page {current_page}):\n\n" # Add page num
+        # Resolve every property on this page in one lookup
+        try:
+            page_properties = await get_properties_by_ids(favorite.get('property') for favorite in paginated_favorites)
+        except Exception as detail_err:
+            logger.error(f"Error fetching property details in list_favorites: {detail_err}")
+            page_properties = None
         for i, favorite in enumerate(paginated_favorites, start=start_index + 1):
-            prop_name = "Loading..." # Default
-            try:
-                # --- ASYNC CHANGE: Added await ---
-                property_details = await get_property_details(favorite.get('property')) # Safe get ID
+            if page_properties is None:
+                prop_name = "Error"
+            else:
+                property_details = page_properties.get(favorite.get('property'))
                 prop_name = property_details.get('name', 'Unknown Property') if property_details else 'Unknown Property'
-            except Exception as detail_err:
-                 logger.error(f"Error fetching property details in list_favorites: {detail_err}")
-                 prop_name = "Error"
 
             prop_name_safe = prop_name.replace("*","\\*").replace("_","\\_") # Basic escape
             response_text += f"{i}. 🏡 Property: *{prop_name_safe}*\n"
@@ -774,27 +761,23 @@ async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     logger.info(f"Admin {telegram_id} listing users on page {current_page}") # Corrected log user
 
     try: # Added basic try block
-        # --- ASYNC CHANGE: Added await ---
-        users = await get_non_user_accounts() or [] # Fetch agents/owners, ensure list
-        total_users = len(users) # Get total before check
+        # Filtering, paging and the confirmed-property counts all happen in the database.
+        page = await get_accounts_page(current_page, PAGE_SIZE)
+        total_users = page["count"]
 
         # Original check
-        if not users:
+        if not total_users:
             message = "There are no registered agents or owners."
             if update.callback_query: await query.edit_message_text(message)
             else: await update.message.reply_text(message)
             return
 
-        # Original pagination
+        paginated_users = page["results"]
+        if not paginated_users and current_page > 1:
+             current_page = (total_users - 1) // PAGE_SIZE + 1
+             paginated_users = (await get_accounts_page(current_page, PAGE_SIZE))["results"]
         start_index = (current_page - 1) * PAGE_SIZE
         end_index = start_index + PAGE_SIZE
-        paginated_users = users[start_index:end_index]
-
-        if not paginated_users and current_page > 1:
-             current_page -= 1
-             start_index = (current_page - 1) * PAGE_SIZE
-             end_index = start_index + PAGE_SIZE
-             paginated_users = users[start_index:end_index]
 
         if not paginated_users: # If still empty
             message = f"No users found on page {current_page}."
@@ -805,16 +788,7 @@ async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         # Original response text
         response_text = f"👥 *Registered Agents and Owners (Page {current_page})*:\n\n" # Add page num
         for i, user in enumerate(paginated_users, start=start_index + 1):
-            prop_count = "N/A" # Default
-            user_tg_id = user.get('telegram_id') # Use get
-            if user_tg_id:
-                 try:
-                    # --- ASYNC CHANGE: Added await ---
-                     confirmed_properties = await get_confirmed_user_properties(user_tg_id)
-                     prop_count = len(confirmed_properties) if confirmed_properties else 0 # Handle None/empty
-                 except Exception as e:
-                      logger.error(f"Error fetching prop count for user {user_tg_id}: {e}")
-                      prop_count = "Error"
+            prop_count = user.get("confirmed_properties", "N/A")
 
             user_type = user.get("user_type", "N/A") # Use get
             user_type_icon = "👤" if user_type == "agent" else "🏢" if user_type in ["owner", "company"] else "❓" # Keep original logic + company
@@ -887,21 +861,26 @@ async def handle_language_choice(update: Update, context: ContextTypes.DEFAULT_T
 
 # --- ASYNC CHANGE: Added async keyword ---
 async def list_requests(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """List all user requests for the admin that have not been responded to."""
+    """List unresponded user requests for the admin, a page at a time (oldest first)."""
     # Original admin check
-    admin_id_check = update.message.from_user.id # Renamed var
+    admin_id_check = update.effective_user.id # Renamed var
+    query = update.callback_query
     if admin_id_check not in ADMINS:
-        await update.message.reply_text("You do not have permission to access this command.")
+        if query: await query.answer("You do not have permission to access this command.", show_alert=True)
+        else: await update.message.reply_text("You do not have permission to access this command.")
         return
 
+    # "requests:<cursor>" continues after the last request shown on the previous page
+    cursor = None
+    if query: # Already answered by handle_main_menu
+        cursor = query.data.split(":", 1)[1] or None
+
     # Original try-except block structure
     try:
-        await update.message.chat.send_action(ChatAction.TYPING)
-        # --- ASYNC CHANGE: Added await ---
-        all_reqs = await get_all_requests() or [] # Ensure list
-
-        # Original filter
-        pending_requests = [req for req in all_reqs if not req.get('is_responded')] # Use get
+        if not query:
+            await update.message.chat.send_action(ChatAction.TYPING)
+        page = await get_requests_page(is_responded=False, cursor=cursor, limit=REQUESTS_PAGE_SIZE)
+        pending_requests = page["results"]
 
         if pending_requests:
             message = "📨 *Unresponded Requests*\n\n"
@@ -909,7 +888,7 @@ async def list_requests(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
                 # Original MarkdownV2 escaping
                 request_id = str(req.get('id','N/A')).replace('.', '\\.').replace('-', '\\-').replace('_', '\\_').replace('*','\\*').replace('[','\\[').replace(']','\\]').replace('(','\\(').replace(')','\\)').replace('~','\\~').replace('`','\\`').replace('>','\\>').replace('#','\\#').replace('+','\\+').replace('=','\\=').replace('|','\\|').replace('{','\\{').replace('}','\\}').replace('!','\\!')
                 user_id = str(req.get('user_id','N/A')).replace('-', '\\-')
-                additional_text = req.get('additional_text','').replace('.', '\\.').replace('-', '\\-').replace('_', '\\_').replace('*','\\*').replace('[','\\[').replace(']','\\]').replace('(','\\(').replace(')','\\)').replace('~','\\~').replace('`','\\`').replace('>','\\>').replace('#','\\#').replace('+','\\+').replace('=','\\=').replace('|','\\|').replace('{','\\{').replace('}','\\}').replace('!','\\!')
+                additional_text = (req.get('additional_text') or '')[:REQUEST_TEXT_PREVIEW].replace('.', '\\.').replace('-', '\\-').replace('_', '\\_').replace('*','\\*').replace('[','\\[').replace(']','\\]').replace('(','\\(').replace(')','\\)').replace('~','\\~').replace('`','\\`').replace('>','\\>').replace('#','\\#').replace('+','\\+').replace('=','\\=').replace('|','\\|').replace('{','\\{').replace('}','\\}').replace('!','\\!')
                 name = req.get('name', 'User').replace('.', '\\.').replace('-', '\\-').replace('_', '\\_').replace('*','\\*').replace('[','\\[').replace(']','\\]').replace('(','\\(').replace(')','\\)').replace('~','\\~').replace('`','\\`').replace('>','\\>').replace('#','\\#').replace('+','\\+').replace('=','\\=').replace('|','\\|').replace('{','\\{').replace('}','\\}').replace('!','\\!')
 
                 # Original message format
@@ -921,19 +900,26 @@ async def list_requests(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
                     f"👉 Use `/respond {request_id}` to reply\.\n\n"
                 )
 
-            # Original splitting logic
-            if len(message) > 4096:
-                for i in range(0, len(message), 4096):
-                    await update.message.reply_text(message[i:i+4096], parse_mode=ParseMode.MARKDOWN_V2)
+            row = []
+            if cursor:
+                row.append(InlineKeyboardButton("⏮ First", callback_data="requests:"))
+            if page["next"]:
+                row.append(InlineKeyboardButton("➡️ Next", callback_data=f"requests:{page['next']}"))
+            keyboard = InlineKeyboardMarkup([row]) if row else None
+
+            if query:
+                await query.edit_message_text(message, parse_mode=ParseMode.MARKDOWN_V2, reply_markup=keyboard)
             else:
-                await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN_V2)
+                await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN_V2, reply_markup=keyboard)
         else:
-            await update.message.reply_text("No pending requests found.")
+            if query: await query.edit_message_text("No pending requests found.")
+            else: await update.message.reply_text("No pending requests found.")
 
     # Original exception handling
     except Exception as e:
         logger.error(f"Error listing requests for admin {admin_id_check}: {e}", exc_info=True) # Added logger
-        await update.message.reply_text(f"An error occurred: {e}")
+        if query: await query.edit_message_text(f"An error occurred: {e}")
+        else: await update.message.reply_text(f"An error occurred: {e}")
 
 
 # --- ASYNC CHANGE: Added async keyword ---
@@ -1152,6 +1138,225 @@ async def send_response(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     return ConversationHandler.END # Original return
 
 
+# --- Saved searches ---
+SEARCH_KEYS = ['search_city', 'search_for', 'search_min_price', 'search_max_price']
+_AMOUNT = re.compile(r'^(\d+(?:\.\d+)?)([km]?)$')
+_AMOUNT_SCALE = {'': 1, 'k': 1_000, 'm': 1_000_000}
+
+def parse_amount(text: str) -> str | None:
+    """"2.5m" -> "2500000"; empty -> None. Raises ValueError on anything else."""
+    text = text.strip().lower().replace(",", "").replace(" ", "")
+    if not text:
+        return None
+    match = _AMOUNT.match(text)
+    if not match:
+        raise ValueError(text)
+    return str(int(float(match.group(1)) * _AMOUNT_SCALE[match.group(2)]))
+
+def parse_price_band(text: str) -> tuple:
+    """"2m-5m", "15000+", "-3m" or "any" -> (min_price, max_price) as strings or None."""
+    text = text.strip().lower()
+    if text in ("any", "", "-"):
+        return None, None
+    if text.endswith("+"):
+        return parse_amount(text[:-1]), None
+    low, separator, high = text.partition("-")
+    if not separator:
+        raise ValueError(text)
+    low, high = parse_amount(low), parse_amount(high)
+    if low is not None and high is not None and int(low) > int(high):
+        raise ValueError(text)
+    return low, high
+
+def describe_search(search: dict) -> str:
+    kind = {"sale": "For Sale", "rent": "For Rent", "investment": "For Investment"}.get(search.get('for_property'), "Sale or rent")
+    low, high = search.get('min_price'), search.get('max_price')
+    if low is None and high is None:
+        price = "any price"
+    elif high is None:
+        price = f"from ${low}"
+    elif low is None:
+        price = f"up to ${high}"
+    else:
+        price = f"${low} - ${high}"
+    bedrooms = f"{search['min_bedrooms']}+ bedrooms" if search.get('min_bedrooms') is not None else "any bedrooms"
+    return f"📍 {search.get('city') or 'Any city'} | 🏷️ {kind} | 💵 {price} | 🛌 {bedrooms}"
+
+async def save_search(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Start the conversation that saves a search alert."""
+    if update.callback_query:
+        query = update.callback_query
+        await query.answer()
+        message = query.message
+    else:
+        message = update.message
+    telegram_id = str(update.effective_user.id)
+    if not await is_user_registered(telegram_id):
+        await message.reply_text("Please use /start to register before saving a search.")
+        return ConversationHandler.END
+
+    for key in SEARCH_KEYS:
+        context.user_data.pop(key, None)
+    await message.reply_text(
+        "🔔 Let's set up an alert for new listings.\n\nWhich city are you looking in? Send a city name or 'any'."
+    )
+    return SEARCH_CITY
+
+async def search_city(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    city = update.message.text.strip()
+    context.user_data['search_city'] = "" if city.lower() == "any" else city
+    buttons = [
+        [InlineKeyboardButton("For Sale", callback_data="search_for:sale"), InlineKeyboardButton("For Rent", callback_data="search_for:rent")],
+        [InlineKeyboardButton("For Investment", callback_data="search_for:investment"), InlineKeyboardButton("Any", callback_data="search_for:any")],
+    ]
+    await update.message.reply_text("Are you looking to buy or rent?", reply_markup=InlineKeyboardMarkup(buttons))
+    return SEARCH_FOR
+
+async def search_for(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    query = update.callback_query
+    await query.answer()
+    choice = query.data.split(":", 1)[1]
+    context.user_data['search_for'] = "" if choice == "any" else choice
+    price_hint = "monthly rent" if choice == "rent" else "price"
+    await query.edit_message_text(
+        f"What {price_hint} range? For example 2m-5m, 15000-30000, 800k+, -3m, or 'any'."
+    )
+    return SEARCH_PRICE
+
+async def search_price(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    try:
+        min_price, max_price = parse_price_band(update.message.text)
+    except ValueError:
+        await update.message.reply_text("I couldn't read that range. Try something like 2m-5m, 800k+ or 'any'.")
+        return SEARCH_PRICE
+    context.user_data['search_min_price'] = min_price
+    context.user_data['search_max_price'] = max_price
+    await update.message.reply_text("Minimum number of bedrooms? Send a number or 'any'.")
+    return SEARCH_BEDROOMS
+
+async def search_bedrooms(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    text = update.message.text.strip().lower()
+    if text != "any" and not text.isdigit():
+        await update.message.reply_text("Please send a number of bedrooms, or 'any'.")
+        return SEARCH_BEDROOMS
+    data = {
+        "city": context.user_data.get('search_city', ""),
+        "for_property": context.user_data.get('search_for', ""),
+        "min_price": context.user_data.get('search_min_price'),
+        "max_price": context.user_data.get('search_max_price'),
+        "min_bedrooms": None if text == "any" else int(text),
+    }
+    saved = await create_saved_search(str(update.effective_user.id), data)
+    for key in SEARCH_KEYS:
+        context.user_data.pop(key, None)
+    if not saved:
+        await update.message.reply_text("Failed to save your search. Please try again later.")
+        return ConversationHandler.END
+    await update.message.reply_text(
+        f"✅ Search saved! You'll get a message when a matching property is listed.\n\n{describe_search(data)}\n\n"
+        "Use /mysearches to see or delete your alerts."
+    )
+    return ConversationHandler.END
+
+async def cancel_search(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    for key in SEARCH_KEYS:
+        context.user_data.pop(key, None)
+    await update.message.reply_text("Saving the search was canceled.", reply_markup=ReplyKeyboardRemove())
+    return ConversationHandler.END
+
+async def list_saved_searches(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """List the user's search alerts with a delete button for each."""
+    query = update.callback_query
+    telegram_id = str(update.effective_user.id)
+    try:
+        searches = await get_user_saved_searches(telegram_id)
+    except Exception as e:
+        logger.error(f"Error in list_saved_searches for {telegram_id}: {e}", exc_info=True)
+        searches = None
+
+    buttons = [[InlineKeyboardButton("➕ New Search Alert", callback_data="save_search")]]
+    if searches is None:
+        response_text = "Error fetching your saved searches."
+    elif not searches:
+        response_text = "🔔 You have no saved searches yet."
+    else:
+        response_text = "🔔 Your saved searches:\n\n"
+        for i, search in enumerate(searches, start=1):
+            response_text += f"{i}. {describe_search(search)}\n"
+            buttons.append([InlineKeyboardButton(f"🗑 Delete {i}", callback_data=f"delete_search_{search['id']}")])
+    keyboard = InlineKeyboardMarkup(buttons)
+    if query:
+        await query.edit_message_text(response_text, reply_markup=keyboard)
+    else:
+        await update.message.reply_text(response_text, reply_markup=keyboard)
+
+async def delete_search(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    search_id = query.data.removeprefix("delete_search_")
+    if search_id.isdigit():
+        await delete_saved_search(str(query.from_user.id), int(search_id))
+    await list_saved_searches(update, context)
+
+
+# --- Location search ---
+async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Reply to a shared location with the closest confirmed listings."""
+    location = update.message.location
+    logger.info(f"User {update.effective_user.id} searching near {location.latitude},{location.longitude}")
+    try:
+        properties = await get_nearby_properties(location.latitude, location.longitude, NEARBY_RADIUS_KM, NEARBY_LIMIT)
+    except Exception as e:
+        logger.error(f"Error in handle_location for {update.effective_user.id}: {e}", exc_info=True)
+        await update.message.reply_text("Error searching nearby properties.")
+        return
+
+    if not properties:
+        await update.message.reply_text(f"📍 No confirmed properties found within {NEARBY_RADIUS_KM} km of this location.")
+        return
+
+    response_text = f"📍 *Properties within {NEARBY_RADIUS_KM} km:*\n\n"
+    buttons = []
+    for i, prop in enumerate(properties, start=1):
+        prop_name = prop.get('name', 'N/A').replace("*", "\\*").replace("_", "\\_")
+        price = prop.get('monthly_rent') if prop.get('for_property') == 'rent' else prop.get('selling_price')
+        price_label = "Rent" if prop.get('for_property') == 'rent' else "Price"
+        response_text += (
+            f"{i}. 🏠 *{prop_name}* - {prop.get('distance_km', 0):.1f} km\n"
+            f"   📍 {prop.get('subcity_zone', 'N/A')}, {prop.get('city', 'N/A')} | 💵 {price_label}: ${price}\n"
+        )
+        buttons.append([InlineKeyboardButton(f"🏠 View {i}", url=f"{settings.ESTATE_SITE_URL}/property/{prop['id']}")])
+    await update.message.reply_text(response_text, parse_mode=ParseMode.MARKDOWN, reply_markup=InlineKeyboardMarkup(buttons))
+
+
+# --- Inline mode ---
+def inline_result(prop: dict) -> InlineQueryResultArticle:
+    is_rent = prop.get('for_property') == 'rent'
+    price = f"${prop.get('monthly_rent')}/month" if is_rent else f"${prop.get('selling_price')}"
+    location = f"{prop.get('subcity_zone', 'N/A')}, {prop.get('city', 'N/A')}"
+    summary = f"🛌 {prop.get('bedrooms')} bed · 📍 {location} · 💵 {price}"
+    property_url = f"{settings.ESTATE_SITE_URL}/property/{prop['id']}"
+    return InlineQueryResultArticle(
+        id=str(prop['id']),
+        title=prop.get('name', 'Property'),
+        description=summary,
+        input_message_content=InputTextMessageContent(f"🏠 {prop.get('name', 'Property')}\n{summary}\n{property_url}"),
+        reply_markup=InlineKeyboardMarkup([[
+            InlineKeyboardButton("Request Tour", url=f"https://t.me/yene_etbot?start=request_tour_{prop['id']}"),
+            InlineKeyboardButton("View Property", url=property_url),
+        ]]),
+    )
+
+async def inline_search(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Answer "@yene_etbot bole 3 bed" from the in-memory property index."""
+    query = update.inline_query
+    if not property_index.loaded:
+        await asyncio.to_thread(property_index.ensure_loaded) # First query of this process only
+    else:
+        property_index.ensure_loaded() # Schedules a background reload when stale
+    properties = property_index.search(query.query, limit=INLINE_RESULTS)
+    await query.answer([inline_result(prop) for prop in properties], cache_time=30)
+
+
 # --- General Message Handler ---
 # --- ASYNC CHANGE: Added async keyword ---
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1165,43 +1370,18 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
 
     try: # Add basic try block
-        # --- ASYNC CHANGE: Added await ---
-        messages = await get_all_messages() or [] # Ensure list
-        # print(messages) # Original print
-
-        # Original logic to find open message context
-        open_message = None
-        # This logic finds *any* message involving the user, not necessarily the latest or an open thread
-        for msg in messages:
-            # Original check compared int(msg['user_id']) == user_id
-            # This seems flawed. Should check if user is sender OR recipient in an ongoing request.
-            # Let's try the refined logic from previous attempts for finding context:
-            if str(msg.get('user_id')) == str(user_id): # Find messages related to user's requests
-                 open_message = msg # Keep the last matching message (might not be correct context)
-                 # break # Original break finds first match only? Let it find last.
-
-        # Refined context finding (find latest request involving user)
-        user_related_messages = [msg for msg in messages if str(msg.get('user_id')) == str(user_id)]
-        user_related_messages.sort(key=lambda x: x.get('timestamp', 0), reverse=True) # Requires timestamp
+        # Latest open request of this user and the admin who last wrote on it (indexed, one query)
+        active_request = await get_active_request(user_id)
 
         active_request_id = None
         involved_admin_id = None
-        if user_related_messages:
-            latest_msg = user_related_messages[0]
-            req_id = latest_msg.get('request')
-            if req_id:
-                 active_request_id = req_id
-                 # Find admin in this thread
-                 admin_msg = next((m for m in user_related_messages if m.get('request') == req_id and str(m.get('sender_id')) != str(user_id) and int(str(m.get('sender_id'))) in ADMINS), None)
-                 if admin_msg: involved_admin_id = str(admin_msg.get('sender_id'))
-                 elif ADMINS: involved_admin_id = str(ADMINS[0]) # Fallback admin
-
-
-        # Check using refined context finding instead of original 'open_message'
-        if active_request_id and involved_admin_id:
-            # request_id = open_message['request'] # Original logic
-            # sender_id = open_message['sender_id'] # Original logic - likely incorrect admin target
+        if active_request:
+            active_request_id = active_request.get('id')
+            involved_admin_id = active_request.get('assigned_admin_id')
+            if not involved_admin_id and ADMINS:
+                involved_admin_id = str(ADMINS[0]) # Fallback admin
 
+        if active_request_id and involved_admin_id:
             logger.info(f"Forwarding user {user_id} msg for req {active_request_id} to admin {involved_admin_id}")
             # --- ASYNC CHANGE: Added await --- Log message
             await create_message(
@@ -1271,10 +1451,16 @@ async def handle_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         logger.info(f"Handling 'Live Agent' button for user {telegram_id}")
         # Let the ConversationHandler entry point handle this if pattern matches
         await live_agent(update, context) # Call entry point
+    elif data == "my_searches":
+        await list_saved_searches(update, context)
+    elif data.startswith("delete_search_"):
+        await delete_search(update, context)
     elif data == "change_language":
         logger.info(f"Handling 'Change Language' for user {telegram_id}")
         await change_language(update, context)
     # Handle list pagination explicitly if callbacks include ':'
+    elif data.startswith("requests:"): # Admin pending-requests pagination
+        await list_requests(update, context)
     elif data.startswith("list_users:"): # Admin pagination
         logger.info(f"Handling pagination for 'List Users' for admin {telegram_id}")
         await list_users(update, context)
@@ -1295,17 +1481,34 @@ async def handle_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         except Exception: logger.warning(f"Failed to edit message for unknown action {data}")
 
 
-# --- Original bot_tele Hosting Logic ---
-# --- ASYNC CHANGE: Added async keyword ---
-async def bot_tele(text: dict): # Expecting dict payload
-    """Original function for webhook processing."""
-    token = os.getenv('TOKEN')
-    if not token:
-        logger.critical("TOKEN missing!")
-        return
+# --- Application Construction ---
+def build_application(persistence=persistence, request=None, **builder_options) -> Application:
+    """Build the bot Application and register every handler.
 
-    # Original application build inside function
-    application = Application.builder().token(token).persistence(persistence).build()
+    ``request`` and any extra builder options (``base_url``, ``concurrent_updates``, ...)
+    are passed to the ``ApplicationBuilder``; the runtime and the benchmarks use them.
+    An integer ``concurrent_updates`` above 1 becomes a :class:`PerChatUpdateProcessor`.
+    """
+    token = builder_options.pop('token', None) or os.getenv('TOKEN')
+    if not token:
+        raise RuntimeError("TOKEN missing!")
+
+    builder = Application.builder().token(token).base_url(settings.TELEGRAM_API_BASE_URL).updater(None)
+    if persistence is not None:
+        builder = builder.persistence(persistence)
+    if request is not None:
+        builder = builder.request(request).get_updates_request(request)
+    concurrent_updates = builder_options.get('concurrent_updates')
+    if type(concurrent_updates) is int and concurrent_updates > 1:
+        # Different chats in parallel, each chat's updates in order (ConversationHandler needs it)
+        builder_options['concurrent_updates'] = PerChatUpdateProcessor(concurrent_updates)
+    for option, value in builder_options.items():
+        builder = getattr(builder, option)(value)
+    application = builder.build()
+
+    if isinstance(persistence, DjangoPersistence):
+        # Pick up conversation states written by other workers before any handler runs
+        application.add_handler(persistence.sync_handler(), group=-1)
 
     # --- Original Handler Definitions ---
     # --- Need to ensure handlers use async functions ---
@@ -1322,7 +1525,7 @@ async def bot_tele(text: dict): # Expecting dict payload
             TOUR_TIME: [CallbackQueryHandler(get_tour_time)]
         },
         fallbacks=[CommandHandler("cancel", cancel), MessageHandler(filters.COMMAND | filters.TEXT, fallback)], # Original fallback
-        persistent=True,
+        persistent=persistence is not None,
         name="tour_request_handler"
     )
 
@@ -1338,7 +1541,7 @@ async def bot_tele(text: dict): # Expecting dict payload
             LIVE_ADDITIONAL_TEXT: [MessageHandler(filters.TEXT & ~filters.COMMAND, live_agent_complete)],
         },
         fallbacks=[CommandHandler("leave", leave), CommandHandler("cancel", leave)], # KEEP BOTH
-        persistent=True,
+        persistent=persistence is not None,
         name="live_agent_conversation",
         # conversation_timeout=300 # Original timeout
     )
@@ -1350,14 +1553,31 @@ async def bot_tele(text: dict): # Expecting dict payload
             RESPONSE_MESSAGE: [MessageHandler(filters.TEXT & ~filters.COMMAND, send_response)],
         },
         fallbacks=[CommandHandler("leave", leave), CommandHandler("cancel", leave)], # KEEP BOTH
-        persistent=True,
+        persistent=persistence is not None,
         name="user_request_conversation",
     )
 
+    saved_search_conv_handler = ConversationHandler(
+        entry_points=[
+            CommandHandler("savesearch", save_search),
+            CallbackQueryHandler(save_search, pattern='^save_search$'),
+        ],
+        states={
+            SEARCH_CITY: [MessageHandler(filters.TEXT & ~filters.COMMAND, search_city)],
+            SEARCH_FOR: [CallbackQueryHandler(search_for, pattern='^search_for:')],
+            SEARCH_PRICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, search_price)],
+            SEARCH_BEDROOMS: [MessageHandler(filters.TEXT & ~filters.COMMAND, search_bedrooms)],
+        },
+        fallbacks=[CommandHandler("cancel", cancel_search)],
+        persistent=persistence is not None,
+        name="saved_search_conversation",
+    )
+
     # --- Original Handler Addition Order ---
     application.add_handler(live_agent_conv_handler) # Live agent first
     application.add_handler(respond_conv_handler)    # Respond second
     application.add_handler(tour_request_handler)    # Tour third
+    application.add_handler(saved_search_conv_handler)
 
     application.add_handler(CommandHandler("profile", profile))
     application.add_handler(CommandHandler("addproperty", addproperty))
@@ -1366,6 +1586,7 @@ async def bot_tele(text: dict): # Expecting dict payload
     application.add_handler(CommandHandler("requests", list_requests, filters.User(ADMINS))) # Added filter
     application.add_handler(CommandHandler("list_tours", list_tours))
     application.add_handler(CommandHandler("list_favorites", list_favorites))
+    application.add_handler(CommandHandler("mysearches", list_saved_searches))
     # application.add_handler(CallbackQueryHandler(handle_favorite_request)) # Keep commented if handle_main_menu covers it
     application.add_handler(CallbackQueryHandler(handle_main_menu)) # Keep broad handler
 
@@ -1374,15 +1595,32 @@ async def bot_tele(text: dict): # Expecting dict payload
 
     # Message handlers last
     application.add_handler(MessageHandler(filters.TEXT & filters.Regex(f'^({"|".join(LANGUAGES)})$'), handle_language_choice))
+    application.add_handler(InlineQueryHandler(inline_search))
+    application.add_handler(MessageHandler(filters.LOCATION, handle_location))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
+    if settings.BOT_METRICS_ENABLED:
+        metrics.instrument_application(application)
+        metrics.instrument_data_calls()
 
-    # --- Original Webhook Processing Logic ---
+    return application
+
+
+# --- Original bot_tele Hosting Logic ---
+async def bot_tele(text: dict, **application_options): # Expecting dict payload
+    """One-shot webhook processing: build, start, drain one update and stop.
+
+    Kept for scripts and for comparison in ``bench_bot_runtime``; the webhook view
+    hands updates to the long-lived ``state.runtime.runtime`` instead.
+    """
     try:
-        # No webhook setting needed here if webhook is set externally
-        # webhook_url = os.getenv('webhook')
-        # await application.bot.set_webhook(url=webhook_url)
+        application = build_application(**application_options)
+    except RuntimeError as e:
+        logger.critical(str(e))
+        return
 
+    # --- Original Webhook Processing Logic ---
+    try:
         # Original queue logic
         update = Update.de_json(data=text, bot=application.bot)
         await application.update_queue.put(update)
@@ -1399,4 +1637,5 @@ async def bot_tele(text: dict): # Expecting dict payload
          logger.error(f"Error in bot_tele processing: {e}", exc_info=True)
     finally:
          # Ensure persistence is saved
-         await application.persistence.flush()
+         if application.persistence:
+             await application.persistence.flush()
@@ -0,0 +1,99 @@
+"""Bounded in-process LRU + TTL caches for bot lookups.
+
+``state.data`` reads customers and properties through these caches; the
+``post_save``/``post_delete`` receivers in ``state.signals`` invalidate entries
+when a row changes in this process. Other processes see a change at the latest
+after ``BOT_CACHE_TTL`` seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return ``(True, value)`` on a fresh hit, ``(False, None)`` otherwise."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cached(cache: TTLCache):
+    """Read-through cache for an async lookup keyed by its first argument.
+
+    ``None`` results (not found / request failed) are not cached.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(key, *args, **kwargs):
+            key = str(key)
+            found, value = cache.get(key)
+            if found:
+                return value
+            value = await func(key, *args, **kwargs)
+            if value is not None:
+                cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+customer_cache = TTLCache("customer", settings.BOT_CACHE_MAXSIZE, settings.BOT_CACHE_TTL)
+property_cache = TTLCache("property", settings.BOT_CACHE_MAXSIZE, settings.BOT_CACHE_TTL)
+property_summary_cache = TTLCache("property_summary", settings.BOT_CACHE_MAXSIZE, settings.BOT_CACHE_TTL)
+CACHES = (customer_cache, property_cache, property_summary_cache)
+
+
+def cache_stats() -> dict:
+    return {cache.name: cache.stats() for cache in CACHES}
@@ -0,0 +1,150 @@
+"""Publishing confirmed properties to the @yene_et channel.
+
+Each property has at most one channel message, tracked in ``ChannelPost``. The
+rendered post is hashed; :func:`publish` queues a ``sendMessage`` for the first
+post, an ``editMessageText`` when the hash changes afterwards, and nothing at all
+when a save did not change what the post shows.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+
+from . import outbox
+from .models import ChannelPost, Customer, OutboxMessage, Property
+
+CHANNEL = "@yene_et"
+
+
+def post_keyboard(instance) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Request Tour", url=f"https://t.me/yene_etbot?start=request_tour_{instance.id}"),
+            InlineKeyboardButton("Make Favorite", callback_data=f"make_favorite_{instance.id}")
+        ],
+        [
+            InlineKeyboardButton("View Property", url=f"{settings.ESTATE_SITE_URL}/property/{instance.id}")  # Direct URL to property page
+        ]
+    ])
+
+
+def _amount(instance, name):
+    """Decimal field value as the database returns it, so 1200 and 1200.00 render alike."""
+    value = getattr(instance, name)
+    if value is None:
+        return value
+    places = instance._meta.get_field(name).decimal_places
+    return Decimal(str(value)).quantize(Decimal(1).scaleb(-places))
+
+
+def post_text(instance, confirmed_properties_count) -> str:
+    verified_status = "Verified Client ✅" if instance.owner.is_verified else "Unverified Client ❌"
+    return (
+        f"🏠 *Property Name:* {instance.name}\n\n"
+        f"📍 *Location:* {instance.city}, {instance.region}\n\n"
+        f"🗺️ *Google Map Link:* {instance.google_map_link}\n\n"
+        f"📏 *Total Area:* {instance.total_area} sqm\n\n"
+        f"💵 *Selling Price:* ${_amount(instance, 'selling_price')}\n\n"
+        f"💲 *Average Price per sqm:* ${_amount(instance, 'average_price_per_square_meter')}\n\n"
+        f"🏢 *Type:* {instance.get_type_property_display()}\n\n"
+        f"🏘️ *Usage:* {instance.get_usage_display()}\n\n"
+        f"🛌 *Bedrooms:* {instance.bedrooms}\n\n"
+        f"🛁 *Bathrooms:* {instance.bathrooms}\n\n"
+        f"🍳 *Kitchens:* {instance.kitchens}\n\n"
+        f"🌡️ *Heating Type:* {instance.heating_type}\n\n"
+        f"❄️ *Cooling:* {instance.cooling}\n\n"
+        f"🏙️ *Subcity/Zone:* {instance.subcity_zone}, Woreda {instance.woreda}\n\n"
+        f"🏗️ *Built Date:* {instance.built_date}\n\n"
+        f"🌄 *Balconies:* {instance.number_of_balconies}\n\n"
+        f"📜 *Description:* {instance.own_description}\n\n"
+        f"🔗 *Additional Media:* {instance.link_to_video_or_image}\n\n"
+        f"*Owner Details:*\n"
+        f"{verified_status}\n\n"
+        f"🔢 *Properties Listed:* {confirmed_properties_count}\n\n"
+        f"---\n\n"
+        f"Contact us for more details or view on the map!\n"
+    )
+
+
+def content_hash(instance) -> str:
+    """Hash of everything the post shows except the owner's listing count.
+
+    The count changes whenever another property of the owner is confirmed; leaving
+    it out keeps those saves from editing every earlier post.
+    """
+    content = json.dumps([post_text(instance, ""), post_keyboard(instance).to_dict()], sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def congratulate_owner(instance) -> None:
+    owner = instance.owner
+    message = (
+        f"🎉 Congratulations, {owner.full_name}! 🎉\n"
+        f"Your property *{instance.name}* has been approved and is now live on the channel! 🌟\n"
+        f"View it here: [View on Channel](https://t.me/yene_et)\n"
+    )
+    outbox.enqueue(owner.telegram_id, message, parse_mode=ParseMode.MARKDOWN)
+
+
+def _queue(method, key, payload) -> None:
+    """Replace the payload of a still pending message with ``key``, or queue a new one."""
+    replaced = OutboxMessage.objects.filter(key=key, status='pending').update(payload=payload)
+    if not replaced:
+        OutboxMessage.objects.create(method=method, chat_id=CHANNEL, key=key, payload=payload)
+
+
+def publish(instance) -> bool:
+    """Post ``instance`` to the channel, or edit its post if the content changed.
+
+    Returns True when this call queued the property's first channel post.
+    """
+    new_hash = content_hash(instance)
+    with transaction.atomic():
+        post, created = ChannelPost.objects.select_for_update().get_or_create(property=instance)
+        if post.content_hash == new_hash:
+            return False
+
+        post_key = f"channel_post:{instance.pk}"
+        if post.message_id is None and OutboxMessage.objects.filter(key=post_key, status='sending').exists():
+            # The first post is on its way; its after_send hook calls publish() again
+            # once the message id is known and queues the edit then.
+            return False
+
+        confirmed_properties_count = (
+            Customer.objects.values_list('confirmed_property_count', flat=True).get(pk=instance.owner_id)
+        )
+        payload = {
+            'text': post_text(instance, confirmed_properties_count),
+            'parse_mode': ParseMode.MARKDOWN,
+            'reply_markup': post_keyboard(instance).to_dict(),
+        }
+        if post.message_id is None:
+            _queue('sendMessage', post_key, payload)
+        else:
+            _queue('editMessageText', f"channel_edit:{instance.pk}", {**payload, 'message_id': post.message_id})
+        post.content_hash = new_hash
+        post.save(update_fields=['content_hash', 'updated_at'])
+
+        if created:
+            congratulate_owner(instance)
+        return created
+
+
+def _record_post(property_id, message_id) -> None:
+    ChannelPost.objects.filter(pk=property_id).update(message_id=message_id, posted_at=timezone.now())
+    instance = Property.objects.select_related('owner').filter(pk=property_id, status="confirmed").first()
+    if instance is not None:
+        # Saved again while the post was in flight?
+        publish(instance)
+
+
+@outbox.after_send("channel_post:")
+async def store_message_id(message, result) -> None:
+    property_id = int(message.key.split(":", 1)[1])
+    await sync_to_async(_record_post)(property_id, result["message_id"])
@@ -0,0 +1,112 @@
+"""Per-customer listing and tour counters.
+
+``Customer.property_count``, ``confirmed_property_count``, ``pending_property_count``
+and ``tour_count`` are adjusted with F() expressions from the Property and Tour
+signals. Concurrent saves therefore cannot lose an update, and an owner's stats are
+read from their own row instead of being counted over their properties.
+``Customer.save()`` leaves the counters out of its UPDATE, so saving a customer
+loaded before an adjustment does not write the old values back.
+
+Writes that skip signals (``bulk_create``, ``QuerySet.update()``, raw SQL), and a tour
+moved to another property, leave the counters stale until :func:`reconcile`
+(``manage.py reconcile_counters``) runs.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Customer, Property, Tour
+
+STATUS_FIELDS = {'confirmed': 'confirmed_property_count', 'pending': 'pending_property_count'}
+COUNTER_FIELDS = Customer.COUNTER_FIELDS
+
+
+def _adjust(owner_id, changes) -> None:
+    """Apply ``{field: delta}`` to the owner's counters in one UPDATE."""
+    changes = {field: F(field) + delta for field, delta in changes.items() if delta}
+    if changes:
+        Customer.objects.filter(pk=owner_id).update(**changes)
+
+
+def _listing_delta(status, sign) -> dict:
+    delta = {'property_count': sign}
+    if status in STATUS_FIELDS:
+        delta[STATUS_FIELDS[status]] = sign
+    return delta
+
+
+def remember_listing(instance, update_fields=None) -> None:
+    """Before a save, note the owner and status ``instance`` has in the database."""
+    if instance._state.adding:
+        instance._counted_as = None
+    elif update_fields is not None and not {'owner', 'status'} & set(update_fields):
+        instance._counted_as = (instance.owner_id, instance.status)
+    else:
+        instance._counted_as = Property.objects.filter(pk=instance.pk).values_list('owner_id', 'status').first()
+
+
+def listing_saved(instance, created) -> None:
+    previous = None if created else getattr(instance, '_counted_as', None)
+    current = (instance.owner_id, instance.status)
+    if previous == current:
+        return
+    if previous is None:
+        _adjust(instance.owner_id, _listing_delta(instance.status, 1))
+    elif previous[0] != current[0]:
+        # Moved to another owner, tours and all.
+        tours = Tour.objects.filter(property_id=instance.pk).count()
+        _adjust(previous[0], {**_listing_delta(previous[1], -1), 'tour_count': -tours})
+        _adjust(current[0], {**_listing_delta(current[1], 1), 'tour_count': tours})
+    else:
+        delta = _listing_delta(current[1], 1)
+        for field, change in _listing_delta(previous[1], -1).items():
+            delta[field] = delta.get(field, 0) + change
+        _adjust(instance.owner_id, delta)
+
+
+def listing_deleted(instance) -> None:
+    # The listing's tours were deleted first (cascade) and counted down by tour_deleted.
+    _adjust(instance.owner_id, _listing_delta(instance.status, -1))
+
+
+def tour_created(instance) -> None:
+    Customer.objects.filter(property=instance.property_id).update(tour_count=F('tour_count') + 1)
+
+
+def tour_deleted(instance) -> None:
+    Customer.objects.filter(property=instance.property_id).update(tour_count=F('tour_count') - 1)
+
+
+def _count(queryset, owner_path):
+    rows = (
+        queryset.filter(**{owner_path: OuterRef('pk')}).order_by()
+        .values(owner_path).annotate(n=Count('pk')).values('n')
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def actual_counts() -> dict:
+    """Counter field -> expression recomputing it from the properties and tours."""
+    return {
+        'property_count': _count(Property.objects.all(), 'owner'),
+        'confirmed_property_count': _count(Property.objects.filter(status='confirmed'), 'owner'),
+        'pending_property_count': _count(Property.objects.filter(status='pending'), 'owner'),
+        'tour_count': _count(Tour.objects.all(), 'property__owner'),
+    }
+
+
+def reconcile(dry_run=False, batch_size=500) -> list:
+    """Recompute the counters of every customer whose stored values drifted; return their ids."""
+    with transaction.atomic():
+        drifted = list(
+            Customer.objects.alias(**{f'actual_{field}': expression for field, expression in actual_counts().items()})
+            .filter(reduce(or_, (~Q(**{field: F(f'actual_{field}')}) for field in COUNTER_FIELDS)))
+            .values_list('pk', flat=True)
+        )
+        if not dry_run:
+            for start in range(0, len(drifted), batch_size):
+                Customer.objects.filter(pk__in=drifted[start:start + batch_size]).update(**actual_counts())
+    return drifted
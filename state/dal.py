@@ -0,0 +1,217 @@
+"""In-process data access for the bot.
+
+Same function signatures and return shapes as the HTTP helpers in
+``state.tools`` and ``live.api``, but answered with async ORM queries instead of
+a round-trip through the public DRF API.
+"""
+from typing import Dict, List
+import logging
+
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import IntegrityError
+from django.db.models import F
+
+from live.models import Request, Message
+from .models import Customer, Property, Tour, Favorite, SavedSearch
+from . import geo
+from .pagination import after_cursor, encode_cursor
+from .serializers import PROPERTY_SUMMARY_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+def _fields(model) -> List[str]:
+    # FK names (not *_id) so values() yields the same keys as the serializers
+    return [field.name for field in model._meta.concrete_fields]
+
+
+def _as_dict(instance) -> dict:
+    return {field.name: field.value_from_object(instance) for field in instance._meta.concrete_fields}
+
+
+async def _first(queryset) -> Dict | None:
+    return await queryset.values(*_fields(queryset.model)).afirst()
+
+
+async def _list(queryset) -> List[dict]:
+    return [row async for row in queryset.values(*_fields(queryset.model))]
+
+
+async def register_user(telegram_id: str, full_name: str, username: str = "") -> dict:
+    try:
+        await Customer.objects.acreate(telegram_id=telegram_id, full_name=full_name)
+    except IntegrityError:
+        logger.error(f"Registration failed for user {telegram_id}.")
+        return {"success": False, "message": "Registration failed. Please try again later."}
+    logger.info(f"User {telegram_id} registered successfully.")
+    return {"success": True, "message": f"Welcome, {full_name}! Registration successful."}
+
+async def is_user_registered(telegram_id: str) -> bool:
+    return await Customer.objects.filter(pk=telegram_id).aexists()
+
+async def get_user_details(telegram_id: str) -> Dict | None:
+    return await _first(Customer.objects.filter(pk=telegram_id))
+
+async def get_property_details(property_id: int | str) -> Dict | None:
+    try:
+        return await _first(Property.objects.filter(pk=property_id))
+    except (ValueError, TypeError):
+        return None
+
+async def get_properties_by_ids(property_ids) -> Dict[int, dict]:
+    queryset = Property.objects.filter(pk__in=[int(pk) for pk in property_ids])
+    return {row["id"]: row async for row in queryset.values(*PROPERTY_SUMMARY_FIELDS)}
+
+async def get_nearby_properties(lat: float, lng: float, radius_km: float = 5, limit: int = 5) -> List[dict]:
+    box = geo.within_box(Property.objects.all(), *geo.bounding_box(lat, lng, radius_km), status="confirmed")
+    results = []
+    async for row in box.values(*PROPERTY_SUMMARY_FIELDS, 'latitude', 'longitude'):
+        row["distance_km"] = round(geo.haversine_km(lat, lng, row["latitude"], row["longitude"]), 3)
+        if row["distance_km"] <= radius_km:
+            results.append(row)
+    results.sort(key=lambda row: row["distance_km"])
+    return results[:limit]
+
+async def upgrade_user(telegram_id: str, new_user_type: str) -> dict:
+    try:
+        customer = await Customer.objects.aget(pk=telegram_id)
+    except Customer.DoesNotExist:
+        logger.error(f"Failed to upgrade user {telegram_id}")
+        return {"success": False, "message": "Failed to upgrade account."}
+    customer.user_type = new_user_type
+    await customer.asave()
+    logger.info(f"User {telegram_id} upgraded to {new_user_type}")
+    return {"success": True, "message": "Your account has been upgraded successfully."}
+
+async def get_user_properties(telegram_id: str) -> List[dict]:
+    queryset = Property.objects.filter(owner_id=telegram_id).order_by('pk')
+    return [row async for row in queryset.values(*PROPERTY_SUMMARY_FIELDS)]
+
+async def get_user_tours(telegram_id: str) -> List[dict]:
+    return await _list(Tour.objects.filter(telegram_id=telegram_id))
+
+async def get_user_favorites(telegram_id: str) -> List[dict]:
+    return await _list(Favorite.objects.filter(customer_id=telegram_id))
+
+async def get_all_users() -> List[dict]:
+    return await _list(Customer.objects.all())
+
+async def get_non_user_accounts() -> List[dict]:
+    return await _list(Customer.objects.filter(user_type__in=["agent", "owner", "company"]))
+
+async def get_accounts_page(page: int = 1, page_size: int = 20, user_types=("agent", "owner", "company")) -> Dict:
+    customers = Customer.objects.filter(user_type__in=user_types)
+    count = await customers.acount()
+    offset = (max(page, 1) - 1) * page_size
+    rows = (
+        customers
+        .order_by('created_at', 'telegram_id')
+        .values('telegram_id', 'full_name', 'user_type', 'is_verified', confirmed_properties=F('confirmed_property_count'))
+    )[offset:offset + page_size]
+    return {"count": count, "results": [row async for row in rows]}
+
+async def get_confirmed_user_properties(telegram_id: str) -> List[dict]:
+    return await _list(Property.objects.filter(owner_id=telegram_id, status="confirmed"))
+
+async def create_tour(data: dict) -> Dict | None:
+    try:
+        tour = await Tour.objects.acreate(
+            property_id=int(data["property"]),
+            telegram_id=data["telegram_id"],
+            username=data.get("username") or None,
+            full_name=data["full_name"],
+            phone_number=data["phone_number"],
+            tour_date=data["tour_date"],
+            tour_time=int(data["tour_time"]),
+        )
+    except (KeyError, ValueError, TypeError, IntegrityError) as e:
+        logger.error(f"Failed to create tour {data}: {e}")
+        return None
+    return _as_dict(tour)
+
+async def add_favorite(telegram_id: str, property_id: int) -> Dict | None:
+    try:
+        favorite = await Favorite.objects.acreate(customer_id=telegram_id, property_id=property_id)
+    except IntegrityError as e:
+        logger.error(f"Failed to add favorite {property_id} for {telegram_id}: {e}")
+        return None
+    return _as_dict(favorite)
+
+async def remove_favorite(favorite_id: int) -> bool:
+    deleted, _ = await Favorite.objects.filter(pk=favorite_id).adelete()
+    return deleted > 0
+
+async def create_saved_search(telegram_id: str, data: dict) -> Dict | None:
+    try:
+        search = SavedSearch(
+            customer_id=telegram_id,
+            city=data.get("city") or "",
+            for_property=data.get("for_property") or "",
+            min_price=data.get("min_price"),
+            max_price=data.get("max_price"),
+            min_bedrooms=data.get("min_bedrooms"),
+        )
+        search.full_clean(exclude=["customer"])
+        await search.asave()
+    except (ValidationError, IntegrityError) as e:
+        logger.error(f"Failed to save search {data} for {telegram_id}: {e}")
+        return None
+    return _as_dict(search)
+
+async def get_user_saved_searches(telegram_id: str) -> List[dict]:
+    return await _list(SavedSearch.objects.filter(customer_id=telegram_id, is_active=True).order_by('-created_at'))
+
+async def delete_saved_search(telegram_id: str, search_id: int) -> bool:
+    deleted, _ = await SavedSearch.objects.filter(pk=search_id, customer_id=telegram_id).adelete()
+    return deleted > 0
+
+
+# --- live.api counterparts ---
+async def create_request(user_id, username, name, phone, address, additional_text):
+    live_request = await Request.objects.acreate(
+        user_id=user_id,
+        username=username,
+        name=name,
+        phone=phone,
+        address=address,
+        additional_text=additional_text,
+    )
+    return _as_dict(live_request)
+
+async def create_message(request_id, sender_id, user_id, content):
+    try:
+        live_request = await Request.objects.aget(pk=request_id)
+    except (ObjectDoesNotExist, ValueError, ValidationError):
+        return None
+    message = await Message.objects.acreate(request=live_request, sender_id=sender_id, content=content)
+    return _as_dict(message)
+
+async def get_all_requests():
+    return await _list(Request.objects.all())
+
+async def get_requests_page(is_responded=None, cursor=None, limit=10):
+    queryset = Request.objects.all()
+    if is_responded is not None:
+        queryset = queryset.filter(is_responded=is_responded)
+    try:
+        rows = await _list(after_cursor(queryset, cursor)[:limit + 1])
+    except ValueError:
+        return {"next": None, "results": []}
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return {"next": next_cursor, "results": rows}
+
+async def get_request_details(request_id):
+    try:
+        return await _first(Request.objects.filter(pk=request_id))
+    except (ValueError, ValidationError):
+        return None
+
+async def get_active_request(user_id):
+    fields = _fields(Request) + ['assigned_admin_id']
+    return await Request.objects.active_for(user_id).values(*fields).afirst()
+
+async def get_all_messages():
+    return await _list(Message.objects.all())
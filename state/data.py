@@ -0,0 +1,130 @@
+"""Data access used by the bot.
+
+Every function delegates to the backend named by ``settings.BOT_DATA_BACKEND``:
+
+* ``"orm"`` (default) - ``state.dal``, async ORM queries in this process.
+* ``"http"`` - ``state.tools`` / ``live.api``, calls to the DRF API of
+  ``settings.ESTATE_SITE_URL`` (``/api`` and ``/live``).
+
+Customer and property lookups are read through ``state.cache``.
+"""
+from typing import Dict, List
+
+from django.conf import settings
+
+from live import api as live_api
+from . import dal, tools
+from .cache import cached, customer_cache, property_cache, property_summary_cache
+
+
+def backend(name: str):
+    """Return the implementation of ``name`` for the configured backend."""
+    if settings.BOT_DATA_BACKEND == "http":
+        module = live_api if hasattr(live_api, name) else tools
+    else:
+        module = dal
+    return getattr(module, name)
+
+
+async def register_user(telegram_id: str, full_name: str, username: str = "") -> dict:
+    customer_cache.invalidate(str(telegram_id))
+    return await backend("register_user")(telegram_id, full_name, username)
+
+async def is_user_registered(telegram_id: str) -> bool:
+    # Same lookup as get_user_details, so /start fetches the customer once.
+    return await get_user_details(telegram_id) is not None
+
+@cached(customer_cache)
+async def get_user_details(telegram_id: str) -> Dict | None:
+    return await backend("get_user_details")(telegram_id)
+
+@cached(property_cache)
+async def get_property_details(property_id: int | str) -> Dict | None:
+    return await backend("get_property_details")(property_id)
+
+async def get_properties_by_ids(property_ids) -> Dict[int, dict]:
+    """Summaries of several properties in one round-trip, keyed by id."""
+    found, missing = {}, []
+    for property_id in {int(pk) for pk in property_ids if pk is not None}:
+        hit, summary = property_summary_cache.get(str(property_id))
+        if hit:
+            found[property_id] = summary
+        else:
+            missing.append(property_id)
+    if missing:
+        fetched = await backend("get_properties_by_ids")(missing)
+        for property_id, summary in fetched.items():
+            property_summary_cache.set(str(property_id), summary)
+        found.update(fetched)
+    return found
+
+async def get_nearby_properties(lat: float, lng: float, radius_km: float = 5, limit: int = 5) -> List[dict]:
+    return await backend("get_nearby_properties")(lat, lng, radius_km, limit)
+
+async def upgrade_user(telegram_id: str, new_user_type: str) -> dict:
+    try:
+        return await backend("upgrade_user")(telegram_id, new_user_type)
+    finally:
+        customer_cache.invalidate(str(telegram_id))
+
+async def get_user_properties(telegram_id: str) -> List[dict]:
+    return await backend("get_user_properties")(telegram_id)
+
+async def get_user_tours(telegram_id: str) -> List[dict]:
+    return await backend("get_user_tours")(telegram_id)
+
+async def get_user_favorites(telegram_id: str) -> List[dict]:
+    return await backend("get_user_favorites")(telegram_id)
+
+async def get_all_users() -> List[dict]:
+    return await backend("get_all_users")()
+
+async def get_non_user_accounts() -> List[dict]:
+    return await backend("get_non_user_accounts")()
+
+async def get_accounts_page(page: int = 1, page_size: int = 20, user_types=("agent", "owner", "company")) -> Dict:
+    return await backend("get_accounts_page")(page, page_size, user_types)
+
+async def get_confirmed_user_properties(telegram_id: str) -> List[dict]:
+    return await backend("get_confirmed_user_properties")(telegram_id)
+
+async def create_tour(data: dict) -> Dict | None:
+    return await backend("create_tour")(data)
+
+async def add_favorite(telegram_id: str, property_id: int) -> Dict | None:
+    return await backend("add_favorite")(telegram_id, property_id)
+
+async def remove_favorite(favorite_id: int) -> bool:
+    return await backend("remove_favorite")(favorite_id)
+
+async def create_saved_search(telegram_id: str, data: dict) -> Dict | None:
+    return await backend("create_saved_search")(telegram_id, data)
+
+async def get_user_saved_searches(telegram_id: str) -> List[dict]:
+    return await backend("get_user_saved_searches")(telegram_id)
+
+async def delete_saved_search(telegram_id: str, search_id: int) -> bool:
+    return await backend("delete_saved_search")(telegram_id, search_id)
+
+
+# --- live chat ---
+async def create_request(user_id, username, name, phone, address, additional_text):
+    return await backend("create_request")(user_id, username, name, phone, address, additional_text)
+
+async def create_message(request_id, sender_id, user_id, content):
+    return await backend("create_message")(request_id, sender_id, user_id, content)
+
+async def get_all_requests():
+    return await backend("get_all_requests")()
+
+async def get_requests_page(is_responded=None, cursor=None, limit=10):
+    return await backend("get_requests_page")(is_responded, cursor, limit)
+
+async def get_request_details(request_id):
+    return await backend("get_request_details")(request_id)
+
+async def get_active_request(user_id):
+    return await backend("get_active_request")(user_id)
+
+async def get_all_messages():
+    return await backend("get_all_messages")()
@@ -0,0 +1,192 @@
+"""Stand-ins for the Telegram Bot API.
+
+``FakeBotRequest`` plugs into ``ApplicationBuilder.request(...)`` so the bot can be
+built, started and fed updates without network access. Benchmarks use it to measure
+the bot itself rather than api.telegram.org.
+
+``FakeTelegramServer`` answers the same calls over HTTP (``manage.py fake_telegram``),
+so the real client stack - connection pool, serialization, retries on 429 - is
+exercised too. Point ``TELEGRAM_API_BASE_URL`` at it, e.g.
+``http://localhost:8081/bot``.
+"""
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Dict, Optional, Tuple
+
+from aiohttp import web
+from telegram.request import BaseRequest, RequestData
+
+BOT_USER = {
+    "id": 7000000001,
+    "is_bot": True,
+    "first_name": "Yene Et",
+    "username": "yene_etbot",
+    "can_join_groups": True,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": True,
+}
+
+_message_ids = itertools.count(1)
+
+
+def _chat(chat_id: Any) -> Dict:
+    if isinstance(chat_id, str) and chat_id.startswith("@"):
+        return {"id": -1001000000000, "type": "channel", "username": chat_id[1:]}
+    return {"id": int(chat_id), "type": "private"}
+
+
+# Bot API methods the project calls; anything else gets Telegram's 404 answer.
+METHODS = {
+    "getme", "sendmessage", "editmessagetext", "editmessagereplymarkup", "deletemessage",
+    "answercallbackquery", "answerinlinequery", "sendchataction", "setwebhook", "deletewebhook",
+    "getwebhookinfo", "setmycommands",
+}
+# Methods that post into a chat and therefore count against Telegram's flood limits.
+RATE_LIMITED_METHODS = {"sendmessage", "editmessagetext", "editmessagereplymarkup"}
+
+
+def api_result(method: str, params: Dict) -> Any:
+    """Return the ``result`` field Telegram would send for ``method``."""
+    method = method.lower()
+    if method == "getme":
+        return BOT_USER
+    if method == "getwebhookinfo":
+        return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+    if method in ("sendmessage", "editmessagetext"):
+        message = {
+            "message_id": int(params.get("message_id") or next(_message_ids)),
+            "date": int(time.time()),
+            "chat": _chat(params.get("chat_id", BOT_USER["id"])),
+            "text": params.get("text", ""),
+        }
+        if method == "editmessagetext":
+            message["edit_date"] = int(time.time())
+        return message
+    return True
+
+
+class FakeBotRequest(BaseRequest):
+    """``BaseRequest`` that answers every Bot API call locally.
+
+    ``latency`` (seconds) is awaited before each answer to model the round-trip to
+    Telegram. Every call is recorded in ``calls`` as ``(method, parameters)``.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = []
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=None,
+        write_timeout=None,
+        connect_timeout=None,
+        pool_timeout=None,
+    ) -> Tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        self.calls.append((api_method, params))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        payload = {"ok": True, "result": api_result(api_method, params)}
+        return 200, json.dumps(payload).encode("utf-8")
+
+
+class FakeTelegramServer:
+    """aiohttp application serving ``/bot<token>/<method>`` like api.telegram.org.
+
+    ``latency`` (seconds) is awaited before every answer. With ``rate_limit`` on,
+    chat-bound calls get Telegram's 429 answer when they exceed ``global_rate``
+    per second overall or one call per ``chat_interval`` seconds per chat.
+    ``flood_probability`` adds random 429s on top. ``GET /stats`` returns call counts.
+    """
+
+    def __init__(self, latency: float = 0.0, rate_limit: bool = False, global_rate: int = 30,
+                 chat_interval: float = 1.0, flood_probability: float = 0.0, retry_after: int = 1):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.flood_probability = flood_probability
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.rate_limited = 0
+        self._recent = deque()
+        self._chat_last = defaultdict(float)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", r"/bot{token}/{method}", self.handle)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+    async def stats(self, request) -> web.Response:
+        return web.json_response({"calls": dict(self.calls), "rate_limited": self.rate_limited})
+
+    @staticmethod
+    async def parameters(request) -> Dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        if request.method == "GET":
+            return dict(request.query)
+        return {key: value for key, value in (await request.post()).items() if isinstance(value, str)}
+
+    def retry_after_for(self, params: Dict) -> int:
+        """Seconds to wait if this call breaks a flood limit, else 0 (and record it)."""
+        now = time.monotonic()
+        if self.flood_probability and random.random() < self.flood_probability:
+            return self.retry_after
+        if not self.rate_limit:
+            return 0
+        while self._recent and now - self._recent[0] >= 1:
+            self._recent.popleft()
+        if len(self._recent) >= self.global_rate:
+            return max(1, math.ceil(1 - (now - self._recent[0])))
+        chat_id = str(params.get("chat_id", ""))
+        wait = self._chat_last[chat_id] + self.chat_interval - now
+        if wait > 0:
+            return max(1, math.ceil(wait))
+        self._recent.append(now)
+        self._chat_last[chat_id] = now
+        return 0
+
+    async def handle(self, request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self.parameters(request)
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method.lower() not in METHODS:
+            return web.json_response({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+        if method.lower() in RATE_LIMITED_METHODS:
+            retry_after = self.retry_after_for(params)
+            if retry_after:
+                self.rate_limited += 1
+                return web.json_response(
+                    {
+                        "ok": False,
+                        "error_code": 429,
+                        "description": f"Too Many Requests: retry after {retry_after}",
+                        "parameters": {"retry_after": retry_after},
+                    },
+                    status=429,
+                )
+        return web.json_response({"ok": True, "result": api_result(method, params)})
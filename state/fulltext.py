@@ -0,0 +1,105 @@
+"""Full-text search over property listings (SQLite FTS5).
+
+Migration ``0005_property_fts`` creates ``state_property_fts``, an external-content
+FTS5 index over the text columns of ``state_property``, kept in sync by SQLite
+triggers on insert, update and delete. Lookups go through the index instead of
+``LIKE '%...%'`` scans. On databases without FTS5 the callers fall back to
+``icontains``.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'state_property_fts'
+# Indexed columns and their bm25 weights (a hit in the name counts most).
+FTS_COLUMNS = {
+    'name': 10.0,
+    'address': 5.0,
+    'subcity_zone': 5.0,
+    'city': 3.0,
+    'region': 2.0,
+    'nearest_residential': 2.0,
+    'own_description': 1.0,
+}
+
+# Only the newest RANK_WINDOW matches are ranked (and paged), so a very common word
+# costs the same as a rare one.
+RANK_WINDOW = 1000
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+_available = {}
+
+
+def fts_available() -> bool:
+    """Whether the FTS5 table exists on the default database (checked once per process)."""
+    if connection.alias not in _available:
+        if connection.vendor != 'sqlite':
+            _available[connection.alias] = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _available[connection.alias] = cursor.fetchone() is not None
+    return _available[connection.alias]
+
+
+def match_expression(text: str) -> str | None:
+    """FTS5 query matching every word of ``text`` (the last one as a prefix), or None.
+
+    Words are quoted, so user input can never be read as FTS5 query syntax.
+    """
+    words = _WORD.findall(text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def matching_ids(text: str) -> RawSQL:
+    """Subquery of the ids of properties matching ``text``, for ``pk__in=``."""
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match_expression(text)])
+
+
+def ranked_ids(text: str, limit: int, offset: int = 0, status: str | None = 'confirmed') -> list:
+    """Ids of the best ``limit`` matches for ``text`` after ``offset``, best first.
+
+    Ranking is limited to the newest ``RANK_WINDOW`` matches with ``status``, so
+    offsets past the window return nothing.
+    """
+    match = match_expression(text)
+    if match is None or offset >= RANK_WINDOW:
+        return []
+    sql = (
+        f"SELECT p.id FROM {FTS_TABLE} f JOIN state_property p ON p.id = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s"
+    )
+    params = [match]
+    if status is not None:
+        sql += " AND p.status = %s"
+        params.append(status)
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} ORDER BY f.rowid DESC LIMIT 1 OFFSET %s", params + [RANK_WINDOW - 1])
+        row = cursor.fetchone()
+    weights = ', '.join(str(weight) for weight in FTS_COLUMNS.values())
+    sql += f" AND f.rowid >= %s ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s OFFSET %s"
+    params += [row[0] if row else 0, min(limit, RANK_WINDOW - offset), offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def contains_filter(text: str) -> Q:
+    """``icontains`` fallback: every word must appear in one of the indexed columns."""
+    condition = Q()
+    for word in _WORD.findall(text or ''):
+        word_condition = Q()
+        for column in FTS_COLUMNS:
+            word_condition |= Q(**{f'{column}__icontains': word})
+        condition &= word_condition
+    return condition
+
+
+def in_rank_order(queryset, ids):
+    """``queryset`` restricted to ``ids`` and ordered like them."""
+    order = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(order)
@@ -0,0 +1,154 @@
+"""Coordinates for properties.
+
+``google_map_link`` is parsed into latitude/longitude when a property is saved,
+and the point is also stored as a geohash. Nearby and bounding-box searches
+cover the area with a few geohash cells. Each cell becomes an indexed range scan
+on ``geohash``, and only those candidates get an exact distance check, so no
+query computes distances over the whole table.
+"""
+import math
+import re
+from urllib.parse import parse_qs, unquote, urlparse
+
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_NUMBER = r'(-?\d{1,3}(?:\.\d+)?)'
+# Coordinates embedded in the path: ".../@9.01,38.76,15z", "!3d9.01!4d38.76", "/place/9.01,38.76"
+_PATH_PATTERNS = [
+    re.compile(rf'!3d{_NUMBER}!4d{_NUMBER}'),
+    re.compile(rf'@{_NUMBER},\s*{_NUMBER}'),
+    re.compile(rf'/(?:place|search|dir)/{_NUMBER},\s*\+?{_NUMBER}'),
+]
+_QUERY_KEYS = ('q', 'query', 'll', 'center', 'destination', 'daddr', 'sll')
+
+
+def _valid(lat, lng):
+    return -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def parse_coordinates(link: str | None):
+    """``(lat, lng)`` found in a Google Maps URL, or None.
+
+    Short links (``maps.app.goo.gl/...``) carry no coordinates and return None.
+    """
+    if not link:
+        return None
+    url = unquote(link)
+    for pattern in _PATH_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            lat, lng = float(match.group(1)), float(match.group(2))
+            if _valid(lat, lng):
+                return lat, lng
+    query = parse_qs(urlparse(url).query)
+    for key in _QUERY_KEYS:
+        for value in query.get(key, []):
+            match = re.fullmatch(rf'\s*(?:loc:)?{_NUMBER},\s*\+?{_NUMBER}\s*', value)
+            if match:
+                lat, lng = float(match.group(1)), float(match.group(2))
+                if _valid(lat, lng):
+                    return lat, lng
+    return None
+
+
+def encode_geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision: int):
+    """``(lat_degrees, lng_degrees)`` spanned by one geohash cell of ``precision``."""
+    lng_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision - lng_bits
+    return 180 / 2 ** lat_bits, 360 / 2 ** lng_bits
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng, max_cells: int = 32):
+    """Smallest set of equal-size geohash cells (at most ``max_cells``) covering the box."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        dlat, dlng = cell_size(precision)
+        rows = math.floor(max_lat / dlat) - math.floor(min_lat / dlat) + 1
+        cols = math.floor(max_lng / dlng) - math.floor(min_lng / dlng) + 1
+        if rows * cols <= max_cells or precision == 1:
+            break
+    cells = set()
+    for row in range(rows):
+        lat = min(min_lat + row * dlat, max_lat)
+        for col in range(cols):
+            lng = min(min_lng + col * dlng, max_lng)
+            cells.add(encode_geohash(lat, lng, precision))
+        cells.add(encode_geohash(lat, max_lng, precision))
+    for col in range(cols):
+        cells.add(encode_geohash(max_lat, min(min_lng + col * dlng, max_lng), precision))
+    cells.add(encode_geohash(max_lat, max_lng, precision))
+    return cells
+
+
+def bounding_box(lat: float, lng: float, radius_km: float):
+    """``(min_lat, min_lng, max_lat, max_lng)`` of the circle around a point."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 1e-6)))
+    return max(lat - dlat, -90.0), max(lng - dlng, -180.0), min(lat + dlat, 90.0), min(lng + dlng, 180.0)
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def cells_filter(cells, **conditions):
+    """``Q`` matching rows whose ``geohash`` starts with one of ``cells``.
+
+    ``conditions`` are repeated inside every branch: with no condition outside the
+    OR, SQLite answers each branch with a range scan on the (status, geohash) index instead
+    of scanning every row that matches e.g. ``status``.
+    """
+    from django.db.models import Q
+
+    condition = Q()
+    for cell in cells:
+        # '~' sorts after every geohash character, so [cell, cell~) is the prefix range.
+        condition |= Q(geohash__gte=cell, geohash__lt=cell + '~', **conditions)
+    return condition
+
+
+def within_box(queryset, min_lat, min_lng, max_lat, max_lng, **conditions):
+    """Rows of ``queryset`` matching ``conditions`` inside the box."""
+    return queryset.filter(
+        cells_filter(covering_cells(min_lat, min_lng, max_lat, max_lng), **conditions),
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+
+
+def nearby(queryset, lat, lng, radius_km, limit, **conditions):
+    """Up to ``limit`` rows matching ``conditions`` within ``radius_km`` of the point, closest first.
+
+    Each returned instance gets a ``distance_km`` attribute.
+    """
+    results = []
+    for instance in within_box(queryset, *bounding_box(lat, lng, radius_km), **conditions):
+        distance = haversine_km(lat, lng, instance.latitude, instance.longitude)
+        if distance <= radius_km:
+            instance.distance_km = round(distance, 3)
+            results.append(instance)
+    results.sort(key=lambda instance: instance.distance_km)
+    return results[:limit]
@@ -0,0 +1,61 @@
+"""Shared aiohttp client for outbound API calls.
+
+One ``ClientSession`` per event loop, backed by a keep-alive connection pool with
+a DNS cache and per-host limits, so calls stop paying for DNS, TCP and TLS setup
+every time. The bot runtime closes it on shutdown.
+"""
+import asyncio
+import weakref
+
+import aiohttp
+from django.conf import settings
+
+
+class HttpClient:
+    def __init__(self, limit, limit_per_host, dns_cache_ttl, keepalive_timeout, timeout, connect_timeout):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        # A session is bound to the loop it was created on.
+        self._sessions = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            dns_cache_ttl=settings.HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            timeout=settings.HTTP_TIMEOUT,
+            connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        )
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the pooled session of the running loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def close(self) -> None:
+        """Close the session of the running loop."""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+http_client = HttpClient.from_settings()
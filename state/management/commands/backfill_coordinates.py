@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from state.models import Property
+
+
+class Command(BaseCommand):
+    help = "Fill latitude/longitude/geohash of existing properties from their google_map_link."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recompute rows that already have coordinates.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        properties = Property.objects.only('id', 'google_map_link', 'latitude', 'longitude', 'geohash').order_by('pk')
+        if not options['all']:
+            properties = properties.filter(geohash__isnull=True)
+
+        updated = unparsed = 0
+        batch = []
+        # bulk_update skips the save signals, so the channel is not re-posted.
+        for instance in properties.iterator(chunk_size=options['batch_size']):
+            if instance.update_coordinates():
+                batch.append(instance)
+            if instance.geohash is None:
+                unparsed += 1
+            if len(batch) >= options['batch_size']:
+                updated += self.flush(batch)
+        updated += self.flush(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} properties; {unparsed} links had no coordinates."
+        ))
+
+    def flush(self, batch):
+        if batch:
+            Property.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
+        count = len(batch)
+        batch.clear()
+        return count
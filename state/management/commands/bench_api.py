@@ -0,0 +1,154 @@
+import asyncio
+import fnmatch
+import logging
+import random
+import threading
+import time
+
+import aiohttp
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+
+from live.models import Request
+from state.bench import CITY_CENTERS, format_summary, summarize
+from state.models import Customer, Property, Tour
+
+SAMPLE_SIZE = 500
+
+
+def endpoints(rng):
+    """``name -> callable returning a path`` for every API route and HTML page worth sizing.
+
+    Ids are sampled from the database so detail routes spread over the data.
+    """
+    property_ids = list(Property.objects.filter(status='confirmed').order_by('?').values_list('pk', flat=True)[:SAMPLE_SIZE])
+    owners = list(
+        Customer.objects.filter(user_type__in=('owner', 'agent'), property__isnull=False).distinct()
+        .order_by('?').values_list('pk', 'profile_token')[:SAMPLE_SIZE]
+    )
+    tourists = list(Tour.objects.order_by('?').values_list('telegram_id', 'property_id')[:SAMPLE_SIZE])
+    requesters = list(Request.objects.order_by('?').values_list('user_id', flat=True)[:SAMPLE_SIZE])
+    if not (property_ids and owners and tourists and requesters):
+        raise CommandError("Not enough data; fill the database with `manage.py generate_dataset` first.")
+
+    lat, lng = CITY_CENTERS["Addis Ababa"]
+    pick = rng.choice
+
+    def ids_batch():
+        return ",".join(map(str, rng.sample(property_ids, min(20, len(property_ids)))))
+
+    return {
+        "properties list": lambda: "/api/properties/",
+        "properties list fields": lambda: "/api/properties/?fields=name,city,selling_price",
+        "properties ?ids=": lambda: f"/api/properties/?ids={ids_batch()}",
+        "property detail": lambda: f"/api/properties/{pick(property_ids)}/",
+        "property tours": lambda: f"/api/properties/{pick(property_ids)}/tours/",
+        "properties search": lambda: f"/api/properties/search/?city=Addis+Ababa&min_bedrooms={rng.randint(1, 4)}",
+        "properties text-search": lambda: f"/api/properties/text-search/?q={pick(('bole', 'villa', 'modern', 'garden'))}",
+        "properties nearby": lambda: f"/api/properties/nearby/?lat={lat}&lng={lng}&radius_km=5",
+        "properties bbox": lambda: (
+            f"/api/properties/bbox/?min_lat={lat - 0.05}&min_lng={lng - 0.05}&max_lat={lat + 0.05}&max_lng={lng + 0.05}"
+        ),
+        "customers accounts": lambda: "/api/customers/accounts/",
+        "customer properties": lambda: f"/api/customers/{pick(owners)[0]}/properties/",
+        "customer favorites": lambda: f"/api/customers/{pick(tourists)[0]}/favorites/",
+        "tours list": lambda: "/api/tours/",
+        "tours by telegram id": lambda: f"/api/tours/telegram/{pick(tourists)[0]}/",
+        "tours check": lambda: "/api/tours/check/?telegram_id={}&property={}".format(*pick(tourists)),
+        "favorites list": lambda: "/api/favorites/",
+        "live requests": lambda: "/live/requests/?is_responded=false",
+        "live request active": lambda: f"/live/requests/active/?user_id={pick(requesters)}",
+        "live messages": lambda: "/live/messages/",
+        "html property detail": lambda: f"/property/{pick(property_ids)}/",
+        "html my properties": lambda: f"/my-properties/?profile_token={pick(owners)[1]}",
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure requests/s and latency percentiles of every API endpoint and HTML page against the "
+        "configured database (see generate_dataset), in-process or against a running server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help="Benchmark a running server (e.g. gunicorn) instead of an in-process one.")
+        parser.add_argument('--port', type=int, default=8766, help="Port of the in-process server.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per endpoint first.")
+        parser.add_argument('--only', action='append', default=[], help="Endpoint name glob, repeatable.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        targets = endpoints(random.Random(options['seed']))
+        if options['only']:
+            targets = {
+                name: path for name, path in targets.items()
+                if any(fnmatch.fnmatch(name, pattern) for pattern in options['only'])
+            }
+            if not targets:
+                raise CommandError(f"No endpoint matches {options['only']}.")
+
+        server = None
+        base_url = options['base_url']
+        if not base_url:
+            server = self.serve(options['port'])
+            base_url = f"http://localhost:{options['port']}"
+        logging.disable(logging.WARNING)
+        try:
+            asyncio.run(self.run(base_url.rstrip('/'), targets, options))
+        finally:
+            logging.disable(logging.NOTSET)
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    def serve(self, port):
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        server = ThreadedWSGIServer(("localhost", port), QuietHandler, allow_reuse_address=True)
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, name="bench-api", daemon=True).start()
+        return server
+
+    async def run(self, base_url, targets, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{base_url}: {options['requests']} requests per endpoint, concurrency {options['concurrency']}"
+        ))
+        connector = aiohttp.TCPConnector(limit=options['concurrency'])
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+            for name, make_path in targets.items():
+                await self.measure(session, base_url, make_path, options['warmup'], options['concurrency'])
+                samples, errors, elapsed = await self.measure(
+                    session, base_url, make_path, options['requests'], options['concurrency'],
+                )
+                self.stdout.write(
+                    format_summary(name, summarize(samples))
+                    + f" req/s={len(samples) / elapsed:8.1f} errors={errors}"
+                )
+
+    @staticmethod
+    async def measure(session, base_url, make_path, count, concurrency):
+        samples, errors = [], 0
+        paths = [make_path() for _ in range(count)]
+
+        async def worker():
+            nonlocal errors
+            while paths:
+                path = paths.pop()
+                started = time.perf_counter()
+                try:
+                    async with session.get(base_url + path) as response:
+                        await response.read()
+                        ok = response.status == 200
+                except aiohttp.ClientError:
+                    ok = False
+                samples.append(time.perf_counter() - started)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return samples, errors, time.perf_counter() - started
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from telegram.ext import ExtBot, PicklePersistence
+
+from state.bench import FAKE_TOKEN, bot_request, format_summary, message_update, summarize
+from state.bot import bot_tele
+from state.fake_telegram import FakeBotRequest
+from state.runtime import BotRuntime
+
+
+class Command(BaseCommand):
+    help = "Compare per-update latency of the one-shot bot_tele path and the long-lived runtime."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--updates', type=int, default=200, help="Updates to process per mode.")
+        parser.add_argument('--users', type=int, default=500, help="Users pre-seeded in the persistence file.")
+        parser.add_argument('--latency', type=float, default=0.0, help="Simulated Bot API latency in ms.")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        payloads = [
+            message_update(1000 + i % options['users'], "/changelang" if i % 2 == 0 else "English")
+            for i in range(options['updates'])
+        ]
+        latency = options['latency'] / 1000
+
+        with tempfile.TemporaryDirectory() as tmp:
+            before = await self.bench_one_shot(payloads, os.path.join(tmp, 'one_shot'), options['users'], latency)
+            after = await self.bench_runtime(payloads, os.path.join(tmp, 'runtime'), options['users'], latency)
+
+        self.stdout.write(format_summary("bot_tele (per update)", before))
+        self.stdout.write(format_summary("BotRuntime (queued)", after))
+        if after['mean']:
+            self.stdout.write(f"speed-up (mean): {before['mean'] / after['mean']:.1f}x")
+
+    async def seed(self, path, users):
+        persistence = PicklePersistence(filepath=path)
+        persistence.set_bot(ExtBot(FAKE_TOKEN, request=FakeBotRequest()))
+        await persistence.get_user_data()
+        await persistence.get_chat_data()
+        await persistence.get_bot_data()
+        for user_id in range(1000, 1000 + users):
+            await persistence.update_user_data(user_id, {'telegram_id': str(user_id), 'language': 'English'})
+        await persistence.flush()
+
+    async def bench_one_shot(self, payloads, path, users, latency):
+        await self.seed(path, users)
+        samples = []
+        for payload in payloads:
+            started = time.perf_counter()
+            await bot_tele(
+                payload,
+                persistence=PicklePersistence(filepath=path),
+                request=bot_request(latency),
+                token=FAKE_TOKEN,
+            )
+            samples.append(time.perf_counter() - started)
+        return summarize(samples)
+
+    async def bench_runtime(self, payloads, path, users, latency):
+        await self.seed(path, users)
+        runtime = BotRuntime(
+            persistence=PicklePersistence(filepath=path),
+            request=bot_request(latency),
+            token=FAKE_TOKEN,
+        )
+        await runtime.start()
+        samples = []
+        try:
+            for payload in payloads:
+                started = time.perf_counter()
+                runtime.enqueue(payload)
+                await runtime.application.update_queue.join()
+                samples.append(time.perf_counter() - started)
+        finally:
+            await runtime.stop()
+        return summarize(samples)
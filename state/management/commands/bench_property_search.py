@@ -0,0 +1,99 @@
+import time
+from decimal import Decimal
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from state import fulltext
+from state.bench import format_summary, property_rows, summarize
+from state.models import Customer, Property
+from state.search import search_properties
+from state.serializers import PROPERTY_LIST_FIELDS
+
+QUERIES = {
+    "location": {"for_property": "rent", "city": "Addis Ababa", "subcity_zone": "Bole"},
+    "sale price range": {"for_property": "sale", "min_price": Decimal(2_000_000), "max_price": Decimal(2_500_000)},
+    "rent range": {"for_property": "rent", "min_rent": Decimal(10_000), "max_rent": Decimal(12_000)},
+    "usage + bedrooms": {"usage": "villa", "min_bedrooms": 5},
+    "combined": {
+        "for_property": "sale", "city": "Hawassa", "subcity_zone": "Tabor",
+        "min_bedrooms": 2, "max_price": Decimal(10_000_000),
+    },
+    # Worst case without an index: nothing matches, so the whole table is scanned.
+    "no match": {"for_property": "rent", "city": "Adama", "subcity_zone": "Piassa"},
+}
+# Common words (thousands of matches), a rare word and a phrase with no match at all.
+TEXT_QUERIES = ["furnished", "garden balcony", "quiet compound near school", "4242", "Edna Mall"]
+SEARCH_INDEXES = [index for index in Property._meta.indexes if index.name.startswith('property_search_')]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate properties in a throwaway test database and time /api/properties/search/ "
+        "queries with and without the search indexes, and text search with FTS5 and LIKE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help="Properties to generate.")
+        parser.add_argument('--repeat', type=int, default=200, help="Runs per query shape.")
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=2000, help="bulk_create batch size.")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.populate(options['rows'], options['batch_size'])
+            self.stdout.write(self.style.MIGRATE_HEADING("With search indexes"))
+            self.run_queries(options)
+            self.stdout.write(self.style.MIGRATE_HEADING("Full-text: FTS5 vs icontains"))
+            self.run_text_queries(options)
+            with connection.schema_editor() as editor:
+                for index in SEARCH_INDEXES:
+                    editor.remove_index(Property, index)
+            self.stdout.write(self.style.MIGRATE_HEADING("Without search indexes"))
+            self.run_queries(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def populate(self, rows, batch_size):
+        started = time.perf_counter()
+        owner = Customer.objects.create(telegram_id="1", full_name="Benchmark Owner", user_type="owner")
+        generated = property_rows(owner, rows)
+        while batch := list(islice(generated, batch_size)):
+            Property.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.stdout.write(f"Generated {rows} properties in {time.perf_counter() - started:.1f}s")
+
+    def run_queries(self, options):
+        for label, filters in QUERIES.items():
+            queryset = search_properties(filters).only(*PROPERTY_LIST_FIELDS).order_by('-pk')[:options['page_size']]
+            samples = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                rows = list(queryset.all())
+                samples.append(time.perf_counter() - started)
+            self.stdout.write(format_summary(label, summarize(samples)) + f" rows={len(rows)}")
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
+
+    def run_text_queries(self, options):
+        confirmed = Property.objects.filter(status='confirmed').order_by('-pk')
+        for text in TEXT_QUERIES:
+            shapes = {
+                f"fts5 '{text}'": lambda: fulltext.ranked_ids(text, options['page_size']),
+                f"like '{text}'": lambda: list(
+                    confirmed.filter(fulltext.contains_filter(text)).values_list('pk', flat=True)[:options['page_size']]
+                ),
+            }
+            for label, query in shapes.items():
+                if label.startswith('fts5') and not fulltext.fts_available():
+                    continue
+                samples = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    rows = query()
+                    samples.append(time.perf_counter() - started)
+                self.stdout.write(format_summary(label, summarize(samples)) + f" rows={len(rows)}")
@@ -0,0 +1,145 @@
+import random
+import time
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from state import alerts
+from state.alerts import SavedSearchIndex, listing_price, normalize_city
+from state.bench import CITIES, format_summary, property_rows, summarize
+from state.models import Customer, OutboxMessage, SavedSearch
+
+
+def saved_search_rows(customers, count, seed=0):
+    """``count`` unsaved, varied ``SavedSearch`` instances spread over ``customers``."""
+    rng = random.Random(seed)
+    cities = list(CITIES)
+    for _ in range(count):
+        for_property = rng.choice(("sale", "sale", "rent", "investment", ""))
+        if for_property == "rent":
+            low = rng.randrange(3_000, 150_000, 500)
+        else:
+            low = rng.randrange(500_000, 40_000_000, 1000)
+        high = int(low * rng.uniform(1.1, 1.5))
+        band = rng.random()
+        yield SavedSearch(
+            customer=rng.choice(customers),
+            city=rng.choice(cities) if rng.random() < 0.85 else "",
+            for_property=for_property,
+            min_price=Decimal(low) if band < 0.9 else None,
+            max_price=Decimal(high) if band < 0.8 or band >= 0.95 else None,
+            min_bedrooms=rng.randint(1, 4) if rng.random() < 0.6 else None,
+        )
+
+
+def matches_naively(rows, instance):
+    """Reference matcher: check every saved search."""
+    city, price, bedrooms = normalize_city(instance.city), listing_price(instance), instance.bedrooms
+    return [
+        row for row in rows
+        if normalize_city(row['city']) in ("", city)
+        and row['for_property'] in ("", instance.for_property)
+        and (row['min_price'] is None or (price is not None and price >= row['min_price']))
+        and (row['max_price'] is None or (price is not None and price <= row['max_price']))
+        and (row['min_bedrooms'] is None or (bedrooms is not None and bedrooms >= row['min_bedrooms']))
+    ]
+
+
+def sql_matches(instance):
+    """What matching straight from the database would cost per listing."""
+    price = listing_price(instance)
+    return list(
+        SavedSearch.objects.filter(
+            Q(city__iexact=instance.city) | Q(city=""),
+            Q(for_property=instance.for_property) | Q(for_property=""),
+            Q(min_price__isnull=True) | Q(min_price__lte=price),
+            Q(max_price__isnull=True) | Q(max_price__gte=price),
+            Q(min_bedrooms__isnull=True) | Q(min_bedrooms__lte=instance.bedrooms),
+            is_active=True,
+        ).values_list('id', 'customer_id')
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate saved searches in a throwaway test database and time matching new listings "
+        "against them: the in-memory index, a linear scan and a SQL query, plus queueing the alerts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--searches', type=int, default=50_000, help="Saved searches to generate.")
+        parser.add_argument('--customers', type=int, default=10_000)
+        parser.add_argument('--listings', type=int, default=1000, help="Listings to match.")
+        parser.add_argument('--sql-listings', type=int, default=100, help="Listings matched with SQL.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="bulk_create batch size.")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        started = time.perf_counter()
+        customers = [Customer(telegram_id=str(10_000 + i), full_name=f"User {i}") for i in range(options['customers'])]
+        Customer.objects.bulk_create(customers, batch_size=options['batch_size'])
+        generated = saved_search_rows(customers, options['searches'])
+        while batch := list(islice(generated, options['batch_size'])):
+            SavedSearch.objects.bulk_create(batch)
+        self.stdout.write(f"Generated {options['searches']} saved searches in {time.perf_counter() - started:.1f}s")
+
+        index = SavedSearchIndex(ttl=settings.SAVED_SEARCH_INDEX_TTL)
+        started = time.perf_counter()
+        index.load()
+        self.stdout.write(f"Index loaded in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        owner = Customer.objects.create(telegram_id="1", full_name="Benchmark Owner", user_type="owner")
+        listings = list(property_rows(owner, options['listings'], seed=1))
+        for pk, listing in enumerate(listings, start=1):
+            listing.pk = pk
+        rows = list(SavedSearch.objects.filter(is_active=True).values(*alerts.INDEX_FIELDS))
+
+        samples, matched, mismatches = [], 0, 0
+        for listing in listings:
+            begin = time.perf_counter()
+            found = index.match_property(listing)
+            samples.append(time.perf_counter() - begin)
+            matched += len(found)
+            expected = {row['id'] for row in matches_naively(rows, listing)}
+            mismatches += {row['id'] for row in found} != expected
+        self.stdout.write(
+            format_summary("index match", summarize(samples))
+            + f" matches/listing={matched / len(listings):.1f} mismatches={mismatches}"
+        )
+
+        samples = []
+        for listing in listings[:options['sql_listings']]:
+            begin = time.perf_counter()
+            matches_naively(rows, listing)
+            samples.append(time.perf_counter() - begin)
+        self.stdout.write(format_summary("linear scan", summarize(samples)))
+
+        samples = []
+        for listing in listings[:options['sql_listings']]:
+            begin = time.perf_counter()
+            sql_matches(listing)
+            samples.append(time.perf_counter() - begin)
+        self.stdout.write(format_summary("SQL query", summarize(samples)))
+
+        # Full signal path: match, one bulk INSERT into the outbox.
+        alerts.saved_search_index.load()
+        samples, queued = [], 0
+        for listing in listings[:options['sql_listings']]:
+            begin = time.perf_counter()
+            queued += alerts.notify_matches(listing)
+            samples.append(time.perf_counter() - begin)
+        self.stdout.write(
+            format_summary("notify_matches", summarize(samples))
+            + f" queued={queued} outbox={OutboxMessage.objects.count()}"
+        )
@@ -0,0 +1,275 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from itertools import islice
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncRequestFactory
+
+from state import views
+from state.bench import (
+    FAKE_TOKEN, bot_request, callback_update, format_summary, message_update, property_rows, summarize,
+)
+from state.metrics import iter_handlers
+from state.models import Customer, Favorite, Property, Tour
+from state.persistence import DjangoPersistence
+from state.runtime import runtime
+
+FIRST_USER_ID = 5_000_000
+
+_current = contextvars.ContextVar("bench_webhook_stats", default=None)
+
+
+class Counter:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+TOTAL = Counter()
+
+
+def count_queries(execute, sql, params, many, context):
+    """Count into TOTAL (every thread, including the loopback API) and the running handler's counter."""
+    counter = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        TOTAL.queries += 1
+        TOTAL.db_time += duration
+        if counter is not None:
+            counter.queries += 1
+            counter.db_time += duration
+
+
+def install_query_counter(sender=None, connection=None, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def user_script(user_id, property_ids):
+    """Updates one synthetic user sends, in order: menu browsing and a full tour request."""
+    property_id = property_ids[user_id % len(property_ids)]
+    return [
+        message_update(user_id, "/start"),
+        callback_update(user_id, "list_properties"),
+        message_update(user_id, "/list_tours"),
+        message_update(user_id, "/list_favorites"),
+        message_update(user_id, "/profile"),
+        message_update(user_id, f"/request_tour_{property_id}"),
+        message_update(user_id, f"User {user_id}"),
+        message_update(user_id, "0911000000"),
+        message_update(user_id, "Monday"),
+        callback_update(user_id, str(user_id % 10 + 1)),
+        message_update(user_id, "Is this still available?"),
+    ]
+
+
+def load_payloads(path):
+    """Raw updates from a JSON-lines capture, grouped per user in capture order.
+
+    Lines that are not Telegram updates (no ``update_id``) are skipped.
+    """
+    scripts, skipped = defaultdict(list), 0
+    with open(path, encoding="utf-8") as capture:
+        for line in capture:
+            if not line.strip():
+                continue
+            payload = json.loads(line)
+            payload = payload.get("update", payload)
+            if "update_id" not in payload:
+                skipped += 1
+                continue
+            body = next((value for key, value in payload.items() if isinstance(value, dict)), {})
+            user = body.get("from") or body.get("chat") or {}
+            scripts[user.get("id")].append(payload)
+    return list(scripts.values()), skipped
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay Telegram updates against the webhook view (state.views.index) at a given concurrency, "
+        "with a fake Bot API, and report throughput, latency and DB queries per handler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payloads', help="JSON-lines file of raw updates; default is a synthetic mix.")
+        parser.add_argument('--users', type=int, default=200, help="Synthetic users (one script each).")
+        parser.add_argument('--concurrency', type=int, default=20, help="Users replaying at the same time.")
+        parser.add_argument('--properties', type=int, default=2000, help="Confirmed properties to seed.")
+        parser.add_argument('--latency', type=float, default=0.0, help="Simulated Bot API latency in ms.")
+        parser.add_argument('--log', action='store_true', help="Keep INFO logging (off by default).")
+
+    def handle(self, *args, **options):
+        http_backend = settings.BOT_DATA_BACKEND == "http"
+        if http_backend:
+            api = urlsplit(settings.ESTATE_SITE_URL)
+            if api.hostname not in ("localhost", "127.0.0.1") or not api.port:
+                raise CommandError(
+                    "With BOT_DATA_BACKEND=http, set ESTATE_SITE_URL to a free local port "
+                    "(e.g. http://localhost:8765); the API is served there for the run."
+                )
+        if not options['log']:
+            logging.disable(logging.INFO)
+        # Tour requests queue the admin notification like in production.
+        os.environ.setdefault("ADMIN_CHAT_ID", "1648265210")
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        server = None
+        try:
+            property_ids = self.seed(options)
+            if http_backend:
+                server = self.serve_api(api.hostname, api.port)
+            connection_created.connect(install_query_counter)
+            install_query_counter(connection=connection)
+            if options['payloads']:
+                scripts, skipped = load_payloads(options['payloads'])
+                self.stdout.write(f"Loaded {sum(map(len, scripts))} updates from {options['payloads']} ({skipped} lines skipped)")
+                if not scripts:
+                    raise CommandError("No Telegram updates in the capture.")
+            else:
+                scripts = [user_script(FIRST_USER_ID + i, property_ids) for i in range(options['users'])]
+            asyncio.run(self.replay(scripts, options))
+        finally:
+            connection_created.disconnect(install_query_counter)
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            logging.disable(logging.NOTSET)
+
+    def seed(self, options):
+        owner = Customer.objects.create(telegram_id="1", full_name="Benchmark Owner", user_type="owner")
+        Customer.objects.bulk_create([
+            Customer(telegram_id=str(FIRST_USER_ID + i), full_name=f"User {i}") for i in range(options['users'])
+        ])
+        generated = property_rows(owner, options['properties'])
+        while batch := list(islice(generated, 1000)):
+            for instance in batch:
+                instance.status = "confirmed"
+            Property.objects.bulk_create(batch)
+        property_ids = list(Property.objects.values_list('id', flat=True))
+        Favorite.objects.bulk_create([
+            Favorite(customer_id=str(FIRST_USER_ID + i), property_id=property_ids[(i * 7 + j) % len(property_ids)])
+            for i in range(options['users']) for j in range(3)
+        ])
+        Tour.objects.bulk_create([
+            Tour(
+                property_id=property_ids[i % len(property_ids)], telegram_id=str(FIRST_USER_ID + i),
+                full_name=f"User {i}", phone_number="0911000000", tour_date="Friday", tour_time=3,
+            )
+            for i in range(options['users'])
+        ])
+        return property_ids
+
+    def serve_api(self, host, port):
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        server = ThreadedWSGIServer((host, port), QuietHandler, allow_reuse_address=True)
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, name="bench-api", daemon=True).start()
+        self.stdout.write(f"Serving the API on {settings.ESTATE_SITE_URL}")
+        return server
+
+    async def replay(self, scripts, options):
+        runtime.configure(
+            persistence=DjangoPersistence(),
+            request=bot_request(options['latency'] / 1000),
+            token=FAKE_TOKEN,
+            concurrent_updates=settings.BOT_CONCURRENT_UPDATES,
+        )
+        await runtime.start()
+        application = runtime.application
+
+        handler_samples = defaultdict(list)
+        handler_queries = defaultdict(list)
+        for handler in iter_handlers(application):
+            handler.callback = self.timed(handler.callback, handler_samples, handler_queries)
+
+        done = {}
+        process_update = application.process_update
+
+        async def tracked(update):
+            try:
+                await process_update(update)
+            finally:
+                event = done.get(update.update_id)
+                if event is not None:
+                    event.set()
+
+        application.process_update = tracked
+
+        factory = AsyncRequestFactory()
+        latencies = []
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def run_script(script):
+            async with semaphore:
+                for payload in script:
+                    done[payload["update_id"]] = event = asyncio.Event()
+                    started = time.perf_counter()
+                    request = factory.post("/", data=json.dumps(payload), content_type="application/json")
+                    await views.index(request)
+                    await event.wait()
+                    latencies.append(time.perf_counter() - started)
+
+        TOTAL.queries, TOTAL.db_time = 0, 0.0
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(run_script(script) for script in scripts))
+        finally:
+            elapsed = time.perf_counter() - started
+            await runtime.stop()
+
+        updates = len(latencies)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{updates} updates, {len(scripts)} users, concurrency {options['concurrency']}, "
+            f"backend {settings.BOT_DATA_BACKEND}"
+        ))
+        self.stdout.write(f"throughput: {updates / elapsed:.1f} updates/s over {elapsed:.2f}s")
+        self.stdout.write(format_summary("webhook -> handled", summarize(latencies)))
+        self.stdout.write(
+            f"DB queries: {TOTAL.queries} total, {TOTAL.queries / max(updates, 1):.1f}/update, "
+            f"{TOTAL.db_time * 1000:.0f}ms in the database (persistence and loopback API included)"
+        )
+        self.stdout.write(self.style.MIGRATE_HEADING("Per handler"))
+        for name in sorted(handler_samples, key=lambda name: -sum(handler_samples[name])):
+            queries = handler_queries[name]
+            self.stdout.write(
+                format_summary(name, summarize(handler_samples[name]))
+                + f" queries/call={sum(queries) / len(queries):.1f} max={max(queries)}"
+            )
+
+    @staticmethod
+    def timed(callback, samples, queries):
+        @functools.wraps(callback)
+        async def wrapper(update, context):
+            counter = Counter()
+            token = _current.set(counter)
+            started = time.perf_counter()
+            try:
+                return await callback(update, context)
+            finally:
+                samples[callback.__name__].append(time.perf_counter() - started)
+                queries[callback.__name__].append(counter.queries)
+                _current.reset(token)
+        return wrapper
@@ -0,0 +1,37 @@
+import asyncio
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from telegram import Bot
+
+from state.outbox import GLOBAL_RATE, OutboxWorker, RateLimiter
+
+
+class Command(BaseCommand):
+    help = "Send queued Telegram notifications (state.OutboxMessage) within Telegram's rate limits."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when no message is due.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Chats served in parallel.")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--global-rate', type=float, default=GLOBAL_RATE, help="Messages per second overall.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between polls when idle.")
+
+    def handle(self, *args, **options):
+        token = os.getenv('TOKEN')
+        if not token:
+            raise CommandError("TOKEN missing!")
+        asyncio.run(self.run(Bot(token, base_url=settings.TELEGRAM_API_BASE_URL), options))
+
+    async def run(self, bot, options):
+        worker = OutboxWorker(
+            bot,
+            concurrency=options['concurrency'],
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+            rate_limiter=RateLimiter(global_rate=options['global_rate']),
+        )
+        async with bot:
+            await worker.run(poll_interval=options['poll_interval'], stop_when_empty=options['once'])
@@ -0,0 +1,33 @@
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from state.fake_telegram import FakeTelegramServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local stand-in for the Telegram Bot API. Point TELEGRAM_API_BASE_URL at "
+        "http://<host>:<port>/bot to send the bot, drain_outbox and the benchmarks there."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--latency', type=float, default=0.0, help="Delay before every answer, in ms.")
+        parser.add_argument('--rate-limit', action='store_true', help="Answer 429 like Telegram's flood control.")
+        parser.add_argument('--global-rate', type=int, default=30, help="Chat messages per second overall.")
+        parser.add_argument('--chat-interval', type=float, default=1.0, help="Seconds between messages to one chat.")
+        parser.add_argument('--flood-probability', type=float, default=0.0, help="Share of chat messages answered 429 at random.")
+        parser.add_argument('--retry-after', type=int, default=1, help="retry_after of random 429s, in seconds.")
+
+    def handle(self, *args, **options):
+        server = FakeTelegramServer(
+            latency=options['latency'] / 1000,
+            rate_limit=options['rate_limit'],
+            global_rate=options['global_rate'],
+            chat_interval=options['chat_interval'],
+            flood_probability=options['flood_probability'],
+            retry_after=options['retry_after'],
+        )
+        self.stdout.write(f"Fake Telegram Bot API on http://{options['host']}:{options['port']}/bot<token>/<method>")
+        web.run_app(server.app(), host=options['host'], port=options['port'], print=None)
@@ -0,0 +1,212 @@
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from live.models import Message, Request
+from state import counters
+from state.bench import CITIES, property_rows
+from state.models import Customer, Favorite, Property, Tour
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+FIRST_NAMES = ("Abebe", "Almaz", "Bekele", "Chaltu", "Dawit", "Eden", "Fikru", "Genet", "Hana", "Kebede", "Lidya", "Meron")
+LAST_NAMES = ("Tadesse", "Girma", "Haile", "Mengistu", "Alemu", "Bekele", "Wolde", "Tesfaye", "Kassa", "Abera")
+MESSAGE_WORDS = (
+    "is", "the", "house", "still", "available", "can", "I", "visit", "tomorrow", "price", "negotiable",
+    "thanks", "yes", "we", "will", "call", "you", "parking", "water", "near", "school", "road",
+)
+
+
+def batched(rows, size):
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate a realistic dataset (customers, properties, tours, favorites, live requests and "
+        "messages) into the configured database, for benchmarks at launch scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=50_000)
+        parser.add_argument('--properties', type=int, default=100_000)
+        parser.add_argument('--tours', type=int, default=1_000_000)
+        parser.add_argument('--favorites', type=int, default=200_000)
+        parser.add_argument('--requests', type=int, default=50_000, help="Live-agent requests.")
+        parser.add_argument('--messages', type=int, default=500_000, help="Live-agent messages.")
+        parser.add_argument('--owner-share', type=float, default=0.1, help="Share of customers that are owners/agents.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="bulk_create batch size.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--first-telegram-id', type=int, default=900_000_000,
+            help="Generated customers get consecutive telegram ids from here.",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Allow filling the repository's db.sqlite3 (use DATABASE_PATH for a separate file instead).",
+        )
+
+    def handle(self, *args, **options):
+        target = Path(connection.settings_dict['NAME'])
+        if target == Path(settings.BASE_DIR) / 'db.sqlite3' and not options['force']:
+            raise CommandError(
+                f"Refusing to fill {target}. Run `DATABASE_PATH=/tmp/estate-scale.sqlite3 python manage.py migrate` "
+                "and this command with the same DATABASE_PATH, or pass --force."
+            )
+        if options['customers'] < 1:
+            raise CommandError("Generate at least one customer.")
+        if options['properties'] < 1 and (options['tours'] or options['favorites']):
+            raise CommandError("Tours and favorites need at least one property.")
+
+        first = options['first_telegram_id']
+        if Customer.objects.filter(pk__in=[str(first), str(first + options['customers'] - 1)]).exists():
+            raise CommandError(f"Telegram ids from {first} are taken; pass another --first-telegram-id.")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        if connection.vendor == 'sqlite':
+            # A crash mid-run leaves a throwaway dataset; skip the fsyncs.
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA synchronous = OFF")
+        self.stdout.write(f"Filling {target}")
+
+        started = time.perf_counter()
+        customer_ids, owner_ids = self.step("customers", self.customers, options)
+        property_ids = self.step("properties", self.properties, owner_ids, options)
+        self.step("tours", self.tours, customer_ids, property_ids, options)
+        self.step("favorites", self.favorites, customer_ids, property_ids, options)
+        requests = self.step("requests", self.requests, customer_ids, options)
+        self.step("messages", self.messages, requests, options)
+        self.step("counters", self.counters)
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s"))
+
+    def step(self, label, generate, *args):
+        started = time.perf_counter()
+        with transaction.atomic():
+            result, created = generate(*args)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<12} {created:>10} rows in {elapsed:6.1f}s ({created / max(elapsed, 1e-9):,.0f} rows/s)")
+        return result
+
+    def counters(self):
+        # bulk_create skips the signals that maintain them.
+        return None, len(counters.reconcile())
+
+    def name(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def customers(self, options):
+        first, count = options['first_telegram_id'], options['customers']
+        owners = max(1, int(count * options['owner_share']))
+        ids = [str(first + i) for i in range(count)]
+        rows = (
+            Customer(
+                telegram_id=telegram_id,
+                full_name=self.name(),
+                phone_number=f"09{self.rng.randrange(10**8):08d}",
+                user_type=self.rng.choice(("owner", "owner", "agent")) if i < owners else "user",
+                is_verified=i < owners and self.rng.random() < 0.6,
+            )
+            for i, telegram_id in enumerate(ids)
+        )
+        for batch in batched(rows, self.batch_size):
+            Customer.objects.bulk_create(batch)
+        return (ids, ids[:owners]), count
+
+    def properties(self, owner_ids, options):
+        # Listings per owner are skewed: a few agents hold many.
+        weights = [1 / (rank + 1) for rank in range(len(owner_ids))]
+        owners = self.rng.choices(owner_ids, weights=weights, k=options['properties'])
+
+        def rows():
+            for instance, owner_id in zip(property_rows(None, options['properties'], seed=options['seed']), owners):
+                instance.owner_id = owner_id
+                yield instance
+
+        ids = []
+        for batch in batched(rows(), self.batch_size):
+            ids.extend(instance.pk for instance in Property.objects.bulk_create(batch))
+        return ids, len(ids)
+
+    def tours(self, customer_ids, property_ids, options):
+        def rows():
+            for _ in range(options['tours']):
+                yield Tour(
+                    property_id=self.rng.choice(property_ids),
+                    telegram_id=self.rng.choice(customer_ids),
+                    full_name=self.name(),
+                    phone_number=f"09{self.rng.randrange(10**8):08d}",
+                    tour_date=self.rng.choice(WEEKDAYS),
+                    tour_time=self.rng.randint(1, 12),
+                    status="confirmed" if self.rng.random() < 0.3 else "pending",
+                )
+
+        for batch in batched(rows(), self.batch_size):
+            Tour.objects.bulk_create(batch)
+        return None, options['tours']
+
+    def favorites(self, customer_ids, property_ids, options):
+        # (customer, property) is unique: each customer gets distinct properties.
+        per_customer, extra = divmod(options['favorites'], len(customer_ids))
+        per_customer = min(per_customer, len(property_ids))
+
+        def rows():
+            for i, customer_id in enumerate(customer_ids):
+                wanted = min(per_customer + (i < extra), len(property_ids))
+                for index in self.rng.sample(range(len(property_ids)), wanted):
+                    yield Favorite(customer_id=customer_id, property_id=property_ids[index])
+
+        created = 0
+        for batch in batched(rows(), self.batch_size):
+            created += len(Favorite.objects.bulk_create(batch))
+        return None, created
+
+    def requests(self, customer_ids, options):
+        now = timezone.now()
+        rows = (
+            Request(
+                user_id=self.rng.choice(customer_ids),
+                username=f"user{i}",
+                name=self.name(),
+                phone=f"09{self.rng.randrange(10**8):08d}",
+                address=f"{self.rng.choice(CITIES['Addis Ababa'])}, Addis Ababa",
+                additional_text=" ".join(self.rng.choices(MESSAGE_WORDS, k=10)),
+                is_responded=self.rng.random() < 0.7,
+            )
+            for i in range(options['requests'])
+        )
+        requests = []
+        for batch in batched(rows, self.batch_size):
+            requests.extend((instance.pk, instance.user_id) for instance in Request.objects.bulk_create(batch))
+        # Spread creation times over the last 30 days (auto_now_add sets them all to now).
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {Request._meta.db_table} SET created_at = %s WHERE id = %s",
+                [(now - timedelta(minutes=self.rng.randrange(30 * 24 * 60)), pk) for pk, _ in requests],
+            )
+        return requests, len(requests)
+
+    def messages(self, requests, options):
+        if not requests:
+            return None, 0
+        admins = [str(admin) for admin in (1648265210, 1648265211, 1648265212)]
+
+        def rows():
+            for _ in range(options['messages']):
+                request_id, user_id = self.rng.choice(requests)
+                yield Message(
+                    request_id=request_id,
+                    sender_id=self.rng.choice(admins) if self.rng.random() < 0.5 else user_id,
+                    content=" ".join(self.rng.choices(MESSAGE_WORDS, k=self.rng.randint(3, 25))),
+                )
+
+        for batch in batched(rows(), self.batch_size):
+            Message.objects.bulk_create(batch)
+        return None, options['messages']
@@ -0,0 +1,43 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+from telegram.ext import ExtBot, PicklePersistence
+
+from state.bot import persistence as bot_persistence
+from state.persistence import DjangoPersistence
+
+# Well-formed but unusable: the bot is only needed to unpickle.
+PLACEHOLDER_TOKEN = "123456:placeholder"
+
+CONVERSATION_NAMES = ("tour_request_handler", "live_agent_conversation", "user_request_conversation")
+
+
+class Command(BaseCommand):
+    help = "Copy user_data and conversation states from the old PicklePersistence file into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='bot_dat', help="Pickle file written by PicklePersistence.")
+
+    def handle(self, *args, **options):
+        users, conversations = asyncio.run(self.copy(options['path']))
+        self.stdout.write(self.style.SUCCESS(f"Imported {users} users and {conversations} conversations."))
+
+    async def copy(self, path):
+        source = PicklePersistence(filepath=path)
+        # Only needed to unpickle; no request is ever sent.
+        source.set_bot(ExtBot(PLACEHOLDER_TOKEN))
+        try:
+            user_data = await source.get_user_data()
+        except Exception as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        target = bot_persistence if isinstance(bot_persistence, DjangoPersistence) else DjangoPersistence()
+        for user_id, data in user_data.items():
+            await target.update_user_data(user_id, data)
+
+        conversations = 0
+        for name in CONVERSATION_NAMES:
+            for key, state in (await source.get_conversations(name)).items():
+                await target.update_conversation(name, key, state)
+                conversations += 1
+        return len(user_data), conversations
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from state import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the property and tour counters of customers whose stored values drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the customers that drifted.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        drifted = counters.reconcile(dry_run=options['dry_run'], batch_size=options['batch_size'])
+        for telegram_id in drifted[:20]:
+            self.stdout.write(f"  {telegram_id}")
+        if len(drifted) > 20:
+            self.stdout.write(f"  ... and {len(drifted) - 20} more")
+        verb = "Would repair" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} the counters of {len(drifted)} customers."))
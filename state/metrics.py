@@ -0,0 +1,232 @@
+"""Bot instrumentation in the Prometheus text format.
+
+:func:`instrument_application` wraps the callback of every handler (including the
+ones inside ConversationHandlers) and :func:`instrument_data_calls` every public
+coroutine of ``state.tools``, ``live.api`` and ``state.dal``. Each records a
+latency histogram, an error counter and an in-flight gauge, labelled by handler or
+by module and function. ``/metrics/`` renders them with :func:`render`.
+
+Values live in this process; scrape every worker.
+"""
+import bisect
+import functools
+import inspect
+import threading
+import time
+
+from telegram.ext import ApplicationHandlerStop, ConversationHandler
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """``(suffix, label values, extra labels, value)`` for every series."""
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", key, (), value
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(self.labelnames, key, extra)} {_number(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then the +Inf bucket, then the sum.
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                yield "_bucket", key, (("le", _number(float(bound))),), cumulative
+            yield "_count", key, (), cumulative
+            yield "_sum", key, (), series[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.expose() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+handler_duration = registry.register(Histogram(
+    "estate_bot_handler_duration_seconds", "Time spent in a bot handler callback.", ["handler"],
+))
+handler_errors = registry.register(Counter(
+    "estate_bot_handler_errors_total", "Bot handler callbacks that raised.", ["handler", "exception"],
+))
+handler_in_progress = registry.register(Gauge(
+    "estate_bot_handler_in_progress", "Bot handler callbacks currently running.", ["handler"],
+))
+data_call_duration = registry.register(Histogram(
+    "estate_bot_data_call_duration_seconds", "Time spent in a bot data call (API or ORM).", ["module", "function"],
+))
+data_call_errors = registry.register(Counter(
+    "estate_bot_data_call_errors_total", "Bot data calls that raised.", ["module", "function", "exception"],
+))
+data_call_in_progress = registry.register(Gauge(
+    "estate_bot_data_call_in_progress", "Bot data calls currently running.", ["module", "function"],
+))
+
+
+def render() -> str:
+    return registry.render()
+
+
+def iter_handlers(application):
+    """Every handler of ``application``, including those nested in ConversationHandlers."""
+    pending = [handler for group in application.handlers.values() for handler in group]
+    while pending:
+        handler = pending.pop(0)
+        if isinstance(handler, ConversationHandler):
+            pending.extend(handler.entry_points)
+            for state_handlers in handler.states.values():
+                pending.extend(state_handlers)
+            pending.extend(handler.fallbacks)
+        else:
+            yield handler
+
+
+def timed(func, duration, errors, in_progress, **labels):
+    """Wrap coroutine function ``func`` to record into the given metrics."""
+    if getattr(func, "_metrics_wrapped", False):
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        in_progress.inc(**labels)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except ApplicationHandlerStop:
+            raise
+        except Exception as e:
+            errors.inc(exception=type(e).__name__, **labels)
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started, **labels)
+            in_progress.dec(**labels)
+
+    wrapper._metrics_wrapped = True
+    return wrapper
+
+
+def instrument_application(application) -> None:
+    """Record every handler callback of ``application`` under its function name."""
+    for handler in iter_handlers(application):
+        callback = handler.callback
+        if not inspect.iscoroutinefunction(callback):
+            continue
+        handler.callback = timed(
+            callback, handler_duration, handler_errors, handler_in_progress,
+            handler=getattr(callback, "__name__", type(callback).__name__),
+        )
+
+
+_instrumented_modules = set()
+
+
+def instrument_module(module) -> None:
+    """Replace every public coroutine function defined in ``module`` with a timed one.
+
+    Callers resolving the function through the module at call time (``state.data``
+    does, and so do calls inside the module) are then recorded.
+    """
+    if module.__name__ in _instrumented_modules:
+        return
+    _instrumented_modules.add(module.__name__)
+    for name, func in list(vars(module).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(func) or func.__module__ != module.__name__:
+            continue
+        setattr(module, name, timed(
+            func, data_call_duration, data_call_errors, data_call_in_progress,
+            module=module.__name__, function=name,
+        ))
+
+
+def instrument_data_calls() -> None:
+    from live import api as live_api
+    from . import dal, tools
+
+    for module in (tools, live_api, dal):
+        instrument_module(module)
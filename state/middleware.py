@@ -0,0 +1,163 @@
+"""Opt-in per-request SQL profiling (``QUERY_PROFILING``).
+
+For each request :class:`QueryProfilingMiddleware` counts the queries and the time
+spent in the database, including queries run from ``sync_to_async`` threads of
+async views. It adds a ``Server-Timing`` header (``db`` and ``app``) and logs any
+query slower than ``QUERY_PROFILING_SLOW_MS`` along with the project frame that
+issued it. A ``QUERY_PROFILING_SAMPLE_RATE`` share of requests is appended to
+``QUERY_PROFILING_LOG`` as JSON lines for offline analysis. Each line holds the
+route, the query count, the DB and total time, and the most repeated statement,
+which is how an N+1 shows up.
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_profile = contextvars.ContextVar("query_profile", default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)|\((?:\s*\?\s*,)+\s*\?\s*\)")
+
+
+def sql_shape(sql) -> str:
+    """``sql`` with literals and IN lists folded, so repeats of one statement compare equal."""
+    return _IN_LISTS.sub("(...)", _LITERALS.sub("?", sql))
+
+
+def query_origin() -> str:
+    """``file:line in function`` of the innermost project frame outside this module."""
+    root = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if (
+            filename.startswith(root) and filename != __file__
+            and "site-packages" not in filename and f"{os.sep}venv" not in filename
+        ):
+            return f"{os.path.relpath(filename, root)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class RequestProfile:
+    __slots__ = ("queries", "db_time", "shapes", "lock")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.lock = threading.Lock()
+
+
+def profile_queries(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        with profile.lock:
+            profile.queries += 1
+            profile.db_time += duration
+            profile.shapes[sql_shape(sql)] += 1
+        if duration * 1000 >= settings.QUERY_PROFILING_SLOW_MS:
+            logger.warning(f"Slow query ({duration * 1000:.1f}ms) from {query_origin()}: {sql}")
+
+
+def install_profiler(sender=None, connection=None, **kwargs):
+    if profile_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profile_queries)
+
+
+class QueryProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    _write_lock = threading.Lock()
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(install_profiler)
+        for connection in connections.all(initialized_only=True):
+            install_profiler(connection=connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        record = self.finish(request, response, profile, started)
+        if record is not None:
+            self.write(record)
+        return response
+
+    async def __acall__(self, request):
+        profile, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        record = self.finish(request, response, profile, started)
+        if record is not None:
+            await sync_to_async(self.write, thread_sensitive=False)(record)
+        return response
+
+    @staticmethod
+    def start():
+        profile = RequestProfile()
+        return profile, _profile.set(profile), time.perf_counter()
+
+    @staticmethod
+    def finish(request, response, profile, started) -> dict | None:
+        """Add the Server-Timing header; return the aggregate to log if this request is sampled."""
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = profile.db_time * 1000
+        timing = f'db;dur={db_ms:.1f};desc="{profile.queries} queries", app;dur={total_ms:.1f}'
+        existing = response.get("Server-Timing")
+        response["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+
+        if random.random() >= settings.QUERY_PROFILING_SAMPLE_RATE:
+            return None
+        match = request.resolver_match
+        record = {
+            "ts": round(time.time(), 3),
+            "method": request.method,
+            "route": match.route if match else None,
+            "view": match.view_name if match else None,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": profile.queries,
+            "db_ms": round(db_ms, 2),
+            "total_ms": round(total_ms, 2),
+        }
+        if profile.shapes:
+            shape, count = profile.shapes.most_common(1)[0]
+            record.update(distinct_queries=len(profile.shapes), most_repeated=shape, most_repeated_count=count)
+        return record
+
+    def write(self, record) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._write_lock, open(settings.QUERY_PROFILING_LOG, "a", encoding="utf-8") as log:
+            log.write(line + "\n")
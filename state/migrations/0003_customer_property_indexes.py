@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('state', '0002_botconversation_botuserdata'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['user_type', 'created_at'], name='customer_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['owner', 'status'], name='property_owner_status_idx'),
+        ),
+    ]
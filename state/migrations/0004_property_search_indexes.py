@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('state', '0003_customer_property_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'for_property', 'city', 'subcity_zone'], name='property_search_loc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'for_property', 'selling_price'], name='property_search_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'for_property', 'monthly_rent'], name='property_search_rent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'usage', 'bedrooms'], name='property_search_rooms_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+COLUMNS = 'name, address, subcity_zone, city, region, nearest_residential, own_description'
+NEW = ', '.join(f'new.{column}' for column in COLUMNS.split(', '))
+OLD = ', '.join(f'old.{column}' for column in COLUMNS.split(', '))
+
+CREATE = [
+    f"""CREATE VIRTUAL TABLE state_property_fts USING fts5(
+        {COLUMNS}, content='state_property', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER state_property_fts_insert AFTER INSERT ON state_property BEGIN
+        INSERT INTO state_property_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW});
+    END""",
+    f"""CREATE TRIGGER state_property_fts_delete AFTER DELETE ON state_property BEGIN
+        INSERT INTO state_property_fts(state_property_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD});
+    END""",
+    f"""CREATE TRIGGER state_property_fts_update AFTER UPDATE OF {COLUMNS} ON state_property BEGIN
+        INSERT INTO state_property_fts(state_property_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD});
+        INSERT INTO state_property_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW});
+    END""",
+    "INSERT INTO state_property_fts(state_property_fts) VALUES ('rebuild')",
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS state_property_fts_update",
+    "DROP TRIGGER IF EXISTS state_property_fts_delete",
+    "DROP TRIGGER IF EXISTS state_property_fts_insert",
+    "DROP TABLE IF EXISTS state_property_fts",
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        # FTS5 is SQLite-only; other databases keep the icontains fallback.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('state', '0004_property_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE), run(DROP)),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 06:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('state', '0007_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelPost',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='channel_post', serialize=False, to='state.property')),
+                ('message_id', models.BigIntegerField(blank=True, null=True)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('posted_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
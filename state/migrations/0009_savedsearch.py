@@ -0,0 +1,32 @@
+# Generated by Django 5.1.1 on 2026-10-18 06:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('state', '0008_channelpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('for_property', models.CharField(blank=True, choices=[('sale', 'For Sale'), ('rent', 'For Rent'), ('investment', 'For Investment')], max_length=10)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('min_bedrooms', models.PositiveIntegerField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to='state.customer')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer', 'created_at'], name='savedsearch_customer_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.1 on 2026-10-18 06:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Customer = apps.get_model('state', 'Customer')
+    Property = apps.get_model('state', 'Property')
+    Tour = apps.get_model('state', 'Tour')
+
+    def count(queryset, owner_path):
+        rows = (
+            queryset.filter(**{owner_path: OuterRef('pk')}).order_by()
+            .values(owner_path).annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(rows), 0)
+
+    Customer.objects.update(
+        property_count=count(Property.objects.all(), 'owner'),
+        confirmed_property_count=count(Property.objects.filter(status='confirmed'), 'owner'),
+        pending_property_count=count(Property.objects.filter(status='pending'), 'owner'),
+        tour_count=count(Tour.objects.all(), 'property__owner'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('state', '0009_savedsearch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='confirmed_property_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='pending_property_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='property_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='tour_count',
+            field=models.IntegerField(default=0, editable=False, help_text="Tours requested on this customer's properties."),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
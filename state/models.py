@@ -1,5 +1,7 @@
 from django.db import models
+from django.utils import timezone
 import uuid
+from .geo import encode_geohash, parse_coordinates
 
 class Customer(models.Model):
     USER_TYPE_CHOICES = [
@@ -18,10 +20,33 @@ class Customer(models.Model):
     legal_document = models.FileField(upload_to='do/legal_documents/', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     profile_token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    # Kept up to date by state.counters from Property/Tour signals;
+    # `manage.py reconcile_counters` repairs drift (e.g. after bulk_create or update()).
+    property_count = models.IntegerField(default=0, editable=False)
+    confirmed_property_count = models.IntegerField(default=0, editable=False)
+    pending_property_count = models.IntegerField(default=0, editable=False)
+    tour_count = models.IntegerField(default=0, editable=False, help_text="Tours requested on this customer's properties.")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_type', 'created_at'], name='customer_type_created_idx'),
+        ]
+
+    COUNTER_FIELDS = ('property_count', 'confirmed_property_count', 'pending_property_count', 'tour_count')
 
     def __str__(self):
         return self.full_name
 
+    def save(self, *args, **kwargs):
+        # The counters are only ever changed with F() updates; writing back the values
+        # this instance loaded would undo any made since.
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Property(models.Model):
     FOR_CHOICES = [
@@ -103,10 +128,34 @@ class Property(models.Model):
        # New fields for kitchen appliances and laundry facilities (Text input)
     kitchen_appliances = models.CharField(max_length=255, blank=True, null=True)
     laundry_facilities = models.CharField(max_length=255, blank=True, null=True)
+    # Parsed from google_map_link on save (state.geo)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'status'], name='property_owner_status_idx'),
+            models.Index(fields=['status', 'geohash'], name='property_status_geohash_idx'),
+            # Property search (state.search): equality columns first, the range column last.
+            models.Index(fields=['status', 'for_property', 'city', 'subcity_zone'], name='property_search_loc_idx'),
+            models.Index(fields=['status', 'for_property', 'selling_price'], name='property_search_price_idx'),
+            models.Index(fields=['status', 'for_property', 'monthly_rent'], name='property_search_rent_idx'),
+            models.Index(fields=['status', 'usage', 'bedrooms'], name='property_search_rooms_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def update_coordinates(self):
+        """Set latitude/longitude/geohash from google_map_link; return whether they changed."""
+        point = parse_coordinates(self.google_map_link)
+        latitude, longitude = point if point else (None, None)
+        geohash = encode_geohash(latitude, longitude) if point else None
+        changed = (self.latitude, self.longitude, self.geohash) != (latitude, longitude, geohash)
+        self.latitude, self.longitude, self.geohash = latitude, longitude, geohash
+        return changed
+
 
 class Tour(models.Model):
     class TourTime(models.IntegerChoices):
@@ -165,3 +214,105 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f"{self.customer.full_name} - {self.property.name}"
+
+
+class BotUserData(models.Model):
+    """One ``context.user_data`` entry of the Telegram bot, stored per key."""
+    user_id = models.BigIntegerField()
+    key = models.CharField(max_length=255)
+    value = models.JSONField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user_id', 'key')
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key}"
+
+
+class BotConversation(models.Model):
+    """Current state of one persistent ConversationHandler conversation."""
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    state = models.JSONField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('name', 'key')
+
+    def __str__(self):
+        return f"{self.name} {self.key}: {self.state}"
+
+
+class OutboxMessage(models.Model):
+    """A Telegram Bot API call queued by a signal and sent by ``drain_outbox``."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    method = models.CharField(max_length=50, default='sendMessage')
+    chat_id = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    # What the message is about, e.g. "channel_post:42"; lets handlers act on the result.
+    key = models.CharField(max_length=100, blank=True, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} to {self.chat_id} ({self.status})"
+
+
+class ChannelPost(models.Model):
+    """The @yene_et channel message of a property.
+
+    Kept apart from ``Property`` so a full ``Property.save()`` from a stale admin
+    form cannot overwrite the message id the outbox worker stored meanwhile.
+    """
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, primary_key=True, related_name='channel_post')
+    message_id = models.BigIntegerField(null=True, blank=True)
+    # sha256 of the content last queued for the channel (see state.channel)
+    content_hash = models.CharField(max_length=64, blank=True)
+    posted_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.property_id}: {self.message_id}"
+
+
+class SavedSearch(models.Model):
+    """Search criteria a user saved in the bot; matching confirmed properties trigger an alert.
+
+    Empty ``city``/``for_property`` and null bounds mean "any".
+    """
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='saved_searches')
+    city = models.CharField(max_length=100, blank=True)
+    for_property = models.CharField(max_length=10, choices=Property.FOR_CHOICES, blank=True)
+    # Selling price for sale/investment listings, monthly rent for rentals
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    min_bedrooms = models.PositiveIntegerField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', 'created_at'], name='savedsearch_customer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id}: {self.city or 'any city'} {self.for_property or 'any'}"
@@ -0,0 +1,217 @@
+"""Outbox for Telegram notifications.
+
+Signal receivers call :func:`enqueue`, which writes an ``OutboxMessage`` row as
+part of the same database transaction as the change that triggered it. Saving a
+model therefore never waits on api.telegram.org. The ``drain_outbox`` management
+command runs an :class:`OutboxWorker`, which sends the queued calls concurrently
+within Telegram's rate limits and retries failures with backoff.
+"""
+import asyncio
+import logging
+import time
+import warnings
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from telegram.error import BadRequest, Forbidden, InvalidToken, RetryAfter, TelegramError
+from telegram.warnings import PTBUserWarning
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Queued payloads are raw Bot API parameters, replayed with Bot.do_api_request.
+warnings.filterwarnings("ignore", message=r"Please use 'Bot\.", category=PTBUserWarning)
+
+# Telegram limits: ~30 messages/second overall, 1/second per private chat,
+# 20/minute per group or channel.
+GLOBAL_RATE = 30
+PRIVATE_CHAT_INTERVAL = 1.0
+GROUP_CHAT_INTERVAL = 3.0
+
+_after_send = {}
+
+
+def enqueue(chat_id, text=None, method='sendMessage', key='', reply_markup=None, **params) -> OutboxMessage:
+    """Queue a Bot API call. ``reply_markup`` may be a telegram markup object."""
+    payload = dict(params)
+    if text is not None:
+        payload['text'] = text
+    if reply_markup is not None:
+        payload['reply_markup'] = reply_markup.to_dict() if hasattr(reply_markup, 'to_dict') else reply_markup
+    return OutboxMessage.objects.create(method=method, chat_id=str(chat_id), payload=payload, key=key)
+
+
+def after_send(prefix: str):
+    """Register ``handler(message, result)`` to run after a message whose key starts with ``prefix`` is sent."""
+    def register(handler):
+        _after_send[prefix] = handler
+        return handler
+    return register
+
+
+def is_group_chat(chat_id: str) -> bool:
+    return chat_id.startswith('@') or chat_id.startswith('-')
+
+
+class RateLimiter:
+    """Global token bucket plus a minimum interval between messages to the same chat."""
+
+    def __init__(self, global_rate=GLOBAL_RATE, private_interval=PRIVATE_CHAT_INTERVAL,
+                 group_interval=GROUP_CHAT_INTERVAL):
+        self.global_rate = global_rate
+        self.private_interval = private_interval
+        self.group_interval = group_interval
+        self._tokens = float(global_rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._next_for_chat = defaultdict(float)
+
+    async def acquire(self, chat_id: str) -> None:
+        interval = self.group_interval if is_group_chat(chat_id) else self.private_interval
+        wait = self._next_for_chat[chat_id] - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.global_rate, self._tokens + (now - self._updated) * self.global_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.global_rate)
+        self._next_for_chat[chat_id] = time.monotonic() + interval
+
+    def defer_chat(self, chat_id: str, seconds: float) -> None:
+        self._next_for_chat[chat_id] = max(self._next_for_chat[chat_id], time.monotonic() + seconds)
+
+
+class OutboxWorker:
+    """Sends pending ``OutboxMessage`` rows through ``bot``.
+
+    Messages to one chat are sent in order, one at a time; when one is
+    rescheduled, the chat's later messages in the batch go back to the queue
+    with it. Up to ``concurrency`` chats are served in parallel. Rows are claimed with a conditional UPDATE, so
+    several workers can drain the same table. A row left in ``sending`` by a
+    crashed worker is picked up again after ``claim_timeout`` seconds.
+    """
+
+    def __init__(self, bot, concurrency=8, batch_size=100, max_attempts=5,
+                 claim_timeout=300, rate_limiter=None):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def claim(self) -> list:
+        now = timezone.now()
+        due = (
+            Q(status='pending', available_at__lte=now)
+            | Q(status='sending', claimed_at__lt=now - timedelta(seconds=self.claim_timeout))
+        )
+        claimed = []
+        async for message in OutboxMessage.objects.filter(due).order_by('id')[:self.batch_size]:
+            won = await OutboxMessage.objects.filter(pk=message.pk, status=message.status).aupdate(
+                status='sending', claimed_at=now,
+            )
+            if won:
+                claimed.append(message)
+        return claimed
+
+    async def drain_once(self) -> int:
+        """Send one batch of due messages; return how many were claimed."""
+        messages = await self.claim()
+        by_chat = defaultdict(list)
+        for message in messages:
+            by_chat[message.chat_id].append(message)
+        results = await asyncio.gather(
+            *(self.send_chat(chat_messages) for chat_messages in by_chat.values()), return_exceptions=True,
+        )
+        for error in results:
+            if error is not None:
+                # The chat's unfinished rows are picked up again after claim_timeout.
+                logger.error(f"Outbox chat batch failed: {error}", exc_info=error)
+        return len(messages)
+
+    async def run(self, poll_interval=1.0, stop_when_empty=False) -> None:
+        while True:
+            claimed = await self.drain_once()
+            if not claimed:
+                if stop_when_empty:
+                    return
+                await asyncio.sleep(poll_interval)
+
+    async def send_chat(self, messages) -> None:
+        async with self._semaphore:
+            for position, message in enumerate(messages):
+                if not await self.send(message):
+                    # Keep the chat's order: the rest waits for the rescheduled message.
+                    await self.release(messages[position + 1:], message.available_at)
+                    return
+
+    async def send(self, message: OutboxMessage) -> bool:
+        """Send ``message``; return False if it was rescheduled rather than sent or failed."""
+        await self.rate_limiter.acquire(message.chat_id)
+        message.attempts += 1
+        try:
+            result = await self.bot.do_api_request(
+                message.method, api_kwargs={'chat_id': message.chat_id, **message.payload},
+            )
+        except RetryAfter as e:
+            # Flood control: wait as told; does not count as a failed attempt.
+            retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+            self.rate_limiter.defer_chat(message.chat_id, retry_after)
+            message.attempts -= 1
+            await self.reschedule(message, retry_after, f"RetryAfter {retry_after}s")
+            return False
+        except (BadRequest, Forbidden, InvalidToken) as e:
+            await self.fail(message, e)
+        except Exception as e:
+            if not isinstance(e, TelegramError):
+                logger.error(f"Outbox message {message.pk} raised unexpectedly: {e}", exc_info=True)
+            if message.attempts >= self.max_attempts:
+                await self.fail(message, e)
+            else:
+                await self.reschedule(message, min(2 ** message.attempts, 300), str(e))
+                return False
+        else:
+            message.status = 'sent'
+            message.sent_at = timezone.now()
+            message.result = result if isinstance(result, (dict, list)) else None
+            message.last_error = ''
+            await message.asave(update_fields=['status', 'attempts', 'sent_at', 'result', 'last_error'])
+            await self.run_after_send(message, result)
+        return True
+
+    async def reschedule(self, message, delay, error) -> None:
+        message.status = 'pending'
+        message.available_at = timezone.now() + timedelta(seconds=delay)
+        message.last_error = error
+        await message.asave(update_fields=['status', 'attempts', 'available_at', 'last_error'])
+
+    async def release(self, messages, available_at) -> None:
+        """Return claimed, unsent ``messages`` to the queue, due at ``available_at``."""
+        if messages:
+            await OutboxMessage.objects.filter(pk__in=[message.pk for message in messages], status='sending').aupdate(
+                status='pending', available_at=available_at,
+            )
+
+    async def fail(self, message, error) -> None:
+        logger.error(f"Outbox message {message.pk} ({message.method} to {message.chat_id}) failed: {error}")
+        message.status = 'failed'
+        message.last_error = str(error)
+        await message.asave(update_fields=['status', 'attempts', 'last_error'])
+
+    async def run_after_send(self, message, result) -> None:
+        for prefix, handler in _after_send.items():
+            if message.key.startswith(prefix):
+                try:
+                    await handler(message, result)
+                except Exception as e:
+                    logger.error(f"after_send handler for {message.key} failed: {e}", exc_info=True)
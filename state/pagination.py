@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class DefaultCursorPagination(CursorPagination):
+    """Default pagination of the API list endpoints.
+
+    Pages are fetched by position (``?cursor=``), not by offset, so deep pages cost
+    the same as the first one. Views choose the order with ``cursor_ordering``.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-pk'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+
+class AccountsPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def encode_cursor(created_at, pk) -> str:
+    """Compact ``<microseconds>_<pk>`` position, short enough for Telegram callback data."""
+    micros = (created_at - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{pk}"
+
+
+def decode_cursor(cursor: str):
+    micros, pk = cursor.split("_")
+    return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+
+
+def after_cursor(queryset, cursor: str | None):
+    """Rows strictly after ``cursor`` in ``(created_at, id)`` order."""
+    if not cursor:
+        return queryset.order_by('created_at', 'id')
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(
+        Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+    ).order_by('created_at', 'id')
+
+
+class KeysetPagination(BasePagination):
+    """Keyset pagination over ``(created_at, id)``.
+
+    ``?after=<cursor>`` continues from the last row of the previous page, so every
+    page is one indexed range scan no matter how deep it is. The response carries
+    ``next``, the bare cursor of the following page (or ``None``).
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'after'
+
+    def get_page_size(self, request) -> int:
+        # Like DRF's paginators: a missing, non-positive or malformed value means the default.
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = request.query_params.get(self.cursor_query_param)
+        page_size = self.get_page_size(request)
+        try:
+            rows = list(after_cursor(queryset, cursor)[:page_size + 1])
+        except ValueError:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.next_cursor, "results": data})
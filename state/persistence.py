@@ -0,0 +1,193 @@
+"""Database-backed persistence for the Telegram bot.
+
+Replaces ``PicklePersistence('bot_dat')``: ``user_data`` is stored one row per
+key in ``BotUserData`` and conversation states one row per conversation in
+``BotConversation``. Only entries that changed since they were last read or
+written are saved, a user's data is loaded when one of their updates arrives,
+and several worker processes can share the tables.
+
+Changes reach the database from PTB's persistence loop, so they lag by up to
+``BOT_PERSISTENCE_UPDATE_INTERVAL`` seconds. Within that window another worker
+reads the previous state, and a crash loses the change.
+"""
+import json
+
+from django.conf import settings
+from telegram import Update
+from telegram.ext import BasePersistence, ConversationHandler, PersistenceInput, TypeHandler
+
+from .models import BotConversation, BotUserData
+
+
+def _dump(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _conversation_key(key):
+    return ",".join(str(part) for part in key)
+
+
+def _parse_conversation_key(key):
+    return tuple(int(part) for part in key.split(",") if part)
+
+
+class DjangoPersistence(BasePersistence):
+    """``BasePersistence`` storing user data and conversations in the database.
+
+    Other workers may change the same rows at any time, so the last value seen in
+    the database is kept for every entry. Refreshing applies a database value only
+    when it differs from that snapshot, which keeps local changes that have not been
+    written yet; writing skips every entry that still equals its snapshot.
+    """
+
+    def __init__(self, update_interval: float = None):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval if update_interval is not None else settings.BOT_PERSISTENCE_UPDATE_INTERVAL,
+        )
+        self._user_snapshots = {}
+        self._conversation_snapshots = {}
+
+    # --- user_data ---
+    async def get_user_data(self):
+        # Loaded lazily per user in refresh_user_data().
+        return {}
+
+    async def refresh_user_data(self, user_id, user_data):
+        snapshot = self._user_snapshots.setdefault(user_id, {})
+        stored = {
+            row.key: row.value
+            async for row in BotUserData.objects.filter(user_id=user_id).only('key', 'value')
+        }
+        for key, value in stored.items():
+            dumped = _dump(value)
+            if snapshot.get(key) != dumped:
+                user_data[key] = value
+                snapshot[key] = dumped
+        for key in set(snapshot) - set(stored):
+            if _dump(user_data.get(key)) == snapshot[key]:
+                user_data.pop(key, None)
+            del snapshot[key]
+
+    async def update_user_data(self, user_id, data):
+        snapshot = self._user_snapshots.setdefault(user_id, {})
+        changed = {}
+        for key, value in data.items():
+            dumped = _dump(value)
+            if snapshot.get(key) != dumped:
+                changed[key] = (value, dumped)
+        removed = [key for key in snapshot if key not in data]
+
+        if changed:
+            await BotUserData.objects.abulk_create(
+                [BotUserData(user_id=user_id, key=key, value=value) for key, (value, _) in changed.items()],
+                update_conflicts=True,
+                unique_fields=['user_id', 'key'],
+                update_fields=['value', 'updated_at'],
+            )
+            snapshot.update({key: dumped for key, (_, dumped) in changed.items()})
+        if removed:
+            await BotUserData.objects.filter(user_id=user_id, key__in=removed).adelete()
+            for key in removed:
+                del snapshot[key]
+
+    async def drop_user_data(self, user_id):
+        await BotUserData.objects.filter(user_id=user_id).adelete()
+        self._user_snapshots.pop(user_id, None)
+
+    # --- conversations ---
+    async def get_conversations(self, name):
+        conversations = {}
+        async for row in BotConversation.objects.filter(name=name):
+            key = _parse_conversation_key(row.key)
+            conversations[key] = row.state
+            self._conversation_snapshots[(name, key)] = _dump(row.state)
+        return conversations
+
+    async def update_conversation(self, name, key, new_state):
+        dumped = _dump(new_state)
+        if self._conversation_snapshots.get((name, key)) == dumped:
+            return
+        if new_state is None:
+            await BotConversation.objects.filter(name=name, key=_conversation_key(key)).adelete()
+        else:
+            await BotConversation.objects.abulk_create(
+                [BotConversation(name=name, key=_conversation_key(key), state=new_state)],
+                update_conflicts=True,
+                unique_fields=['name', 'key'],
+                update_fields=['state', 'updated_at'],
+            )
+        self._conversation_snapshots[(name, key)] = dumped
+
+    async def refresh_conversations(self, application, update):
+        """Pull the states other workers stored for the conversations of ``update``."""
+        handlers = {}
+        for group in application.handlers.values():
+            for handler in group:
+                if isinstance(handler, ConversationHandler) and handler.persistent:
+                    try:
+                        handlers[handler.name] = (handler, handler._get_key(update))
+                    except RuntimeError:
+                        continue
+        if not handlers:
+            return
+
+        keys = {_conversation_key(key) for _, key in handlers.values()}
+        stored = {
+            (row.name, row.key): row.state
+            async for row in BotConversation.objects.filter(name__in=handlers, key__in=keys)
+        }
+        for name, (handler, key) in handlers.items():
+            conversations = application._conversation_handler_conversations.get(name)
+            if conversations is None:
+                continue
+            state = stored.get((name, _conversation_key(key)))
+            dumped = _dump(state)
+            if self._conversation_snapshots.get((name, key), _dump(None)) == dumped:
+                continue
+            if state is None:
+                conversations.data.pop(key, None)
+            else:
+                conversations.update_no_track({key: state})
+            self._conversation_snapshots[(name, key)] = dumped
+
+    def sync_handler(self) -> TypeHandler:
+        """Handler for group -1 that refreshes the update's conversations and user data."""
+        async def sync(update: Update, context) -> None:
+            await self.refresh_conversations(context.application, update)
+
+        return TypeHandler(Update, sync)
+
+    # --- unused stores ---
+    async def get_chat_data(self):
+        return {}
+
+    async def update_chat_data(self, chat_id, data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        pass
+
+    async def get_bot_data(self):
+        return {}
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def flush(self):
+        # Nothing is buffered here: Application writes changed entries through
+        # update_user_data/update_conversation every update_interval seconds and
+        # once more on shutdown.
+        pass
@@ -0,0 +1,143 @@
+"""Process-wide bot runtime.
+
+The Telegram ``Application`` is built, initialized and started once per worker
+process. Webhook views hand updates to it through its update queue instead of
+rebuilding the whole bot (and reloading its persistence) on every request.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from telegram import Update
+
+from state.bot import build_application
+from state.http import http_client
+
+logger = logging.getLogger(__name__)
+
+
+class BotRuntime:
+    """Owns the long-lived ``Application`` of this process.
+
+    Under ASGI the runtime is started on the server's event loop with
+    :meth:`start`. Under WSGI (or any sync caller) :meth:`start_in_thread` runs it
+    on a dedicated background loop. :meth:`enqueue` works from either side.
+
+    The runtime also owns the outbound connection pools: the bot's own pool to
+    api.telegram.org and the shared ``http_client`` session, closed in :meth:`stop`.
+    """
+
+    def __init__(self, application_factory=build_application, **application_options):
+        self._application_factory = application_factory
+        self._application_options = application_options
+        self._lock = threading.Lock()
+        self._thread = None
+        self.application = None
+        self.loop = None
+
+    def configure(self, **application_options) -> None:
+        """Replace the options the application is built with; only before :meth:`start`."""
+        if self.running:
+            raise RuntimeError("Cannot configure a running bot runtime.")
+        self._application_options = application_options
+
+    @property
+    def running(self) -> bool:
+        return self.application is not None and self.application.running
+
+    async def start(self) -> None:
+        """Build, initialize and start the application on the running loop."""
+        if self.running:
+            return
+        application = self._application_factory(**self._application_options)
+        await application.initialize()
+        await application.start()
+        self.loop = asyncio.get_running_loop()
+        self.application = application
+        logger.info("Bot runtime started.")
+
+    async def stop(self) -> None:
+        """Stop the application and flush its persistence."""
+        application, self.application = self.application, None
+        if application is None:
+            return
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        await http_client.close()
+        logger.info("Bot runtime stopped.")
+
+    def start_in_thread(self, timeout: float = 30) -> None:
+        """Start the runtime on its own event loop in a daemon thread."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            errors = []
+
+            def run():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                try:
+                    loop.run_until_complete(self.start())
+                except Exception as e:
+                    errors.append(e)
+                    ready.set()
+                    loop.close()
+                    return
+                ready.set()
+                try:
+                    loop.run_forever()
+                finally:
+                    loop.run_until_complete(self.stop())
+                    loop.close()
+
+            self._thread = threading.Thread(target=run, name="bot-runtime", daemon=True)
+            self._thread.start()
+            ready.wait(timeout)
+            if errors:
+                self._thread = None
+                raise errors[0]
+
+    def stop_thread(self, timeout: float = 30) -> None:
+        """Stop a runtime started with :meth:`start_in_thread`."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, payload: dict) -> None:
+        """Queue a raw Telegram update for processing and return immediately."""
+        if not self.running:
+            self.start_in_thread()
+        update = Update.de_json(data=payload, bot=self.application.bot)
+        queue = self.application.update_queue
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        if current_loop is self.loop:
+            queue.put_nowait(update)
+        else:
+            self.loop.call_soon_threadsafe(queue.put_nowait, update)
+
+    async def aenqueue(self, payload: dict) -> None:
+        """Async variant of :meth:`enqueue` for async views.
+
+        When the ASGI lifespan has not started the runtime (e.g. ``runserver``), it is
+        started on a background thread rather than on the request's short-lived loop.
+        """
+        if not self.running:
+            await asyncio.to_thread(self.start_in_thread)
+        self.enqueue(payload)
+
+
+runtime = BotRuntime(
+    concurrent_updates=settings.BOT_CONCURRENT_UPDATES,
+    connection_pool_size=settings.BOT_CONNECTION_POOL_SIZE,
+)
+atexit.register(runtime.stop_thread)
@@ -0,0 +1,32 @@
+"""Structured property search.
+
+``search_properties`` turns validated search filters (see
+``PropertySearchSerializer``) into a queryset over confirmed listings. The
+composite indexes on ``Property`` are laid out for these filters: equality
+columns first (``status``, ``for_property``/``usage``, location), then the range
+column.
+"""
+from .models import Property
+
+# filter name -> ORM lookup
+SEARCH_LOOKUPS = {
+    'for_property': 'for_property',
+    'usage': 'usage',
+    'city': 'city',
+    'subcity_zone': 'subcity_zone',
+    'min_bedrooms': 'bedrooms__gte',
+    'max_bedrooms': 'bedrooms__lte',
+    'min_bathrooms': 'bathrooms__gte',
+    'max_bathrooms': 'bathrooms__lte',
+    'min_price': 'selling_price__gte',
+    'max_price': 'selling_price__lte',
+    'min_rent': 'monthly_rent__gte',
+    'max_rent': 'monthly_rent__lte',
+}
+
+
+def search_properties(filters: dict, queryset=None):
+    """Confirmed properties matching every filter in ``filters`` (unset filters are ignored)."""
+    queryset = Property.objects.all() if queryset is None else queryset
+    lookups = {SEARCH_LOOKUPS[name]: value for name, value in filters.items() if value not in (None, '')}
+    return queryset.filter(status='confirmed', **lookups)
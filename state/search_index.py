@@ -0,0 +1,189 @@
+"""In-memory prefix index over confirmed properties for Telegram inline mode.
+
+Inline queries arrive on every keystroke, so they are answered from this
+process-local index instead of the database. The index is loaded once,
+then kept current by the ``post_save``/``post_delete`` receivers in
+``state.signals`` for changes made in this process. It is also reloaded in
+the background every ``BOT_SEARCH_INDEX_TTL`` seconds, to pick up changes
+made by other workers.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Property
+
+logger = logging.getLogger(__name__)
+
+INDEX_FIELDS = (
+    'id', 'name', 'for_property', 'usage', 'city', 'subcity_zone', 'bedrooms', 'bathrooms',
+    'selling_price', 'monthly_rent',
+)
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+# "3 bed", "3bed", "3 bedrooms", "3br" -> "3bed"
+_BEDROOMS = re.compile(r'\b(\d+)\s*(?:bed(?:room)?s?|br)\b')
+_USAGE_LABELS = dict(Property.USAGE_CHOICES)
+
+
+def tokenize(text: str) -> list:
+    text = _BEDROOMS.sub(r'\1bed', (text or '').lower())
+    return _WORD.findall(text)
+
+
+def entry_tokens(entry: dict) -> set:
+    words = ' '.join(str(entry.get(field) or '') for field in ('name', 'for_property', 'usage', 'city', 'subcity_zone'))
+    tokens = set(tokenize(words))
+    tokens.update(tokenize(_USAGE_LABELS.get(entry.get('usage'), '')))
+    if entry.get('bedrooms') is not None:
+        tokens.add(f"{entry['bedrooms']}bed")
+    return tokens
+
+
+class PropertyIndex:
+    """Token -> property id postings with prefix lookup over a sorted token list.
+
+    Postings are ascending id lists, so the newest matches of a prefix come from a
+    lazy merge of a few lists, read from the end, and a query stops after ``limit``
+    hits instead of building and sorting the full result set.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._tokens_by_id = {}
+        self._postings = {}
+        self._sorted_tokens = []
+        self._ids = []
+        self._loaded_at = None
+        self._reloading = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- building ---
+    def load(self) -> None:
+        """(Re)build the index from all confirmed properties."""
+        rows = list(Property.objects.filter(status='confirmed').values(*INDEX_FIELDS))
+        entries, tokens_by_id, postings = {}, {}, {}
+        for row in sorted(rows, key=lambda row: row['id']):
+            entries[row['id']] = row
+            tokens = tokens_by_id[row['id']] = entry_tokens(row)
+            for token in tokens:
+                postings.setdefault(token, []).append(row['id'])
+        with self._lock:
+            self._entries, self._tokens_by_id, self._postings = entries, tokens_by_id, postings
+            self._sorted_tokens = sorted(postings)
+            self._ids = sorted(entries)
+            self._loaded_at = time.monotonic()
+        logger.info(f"Property search index loaded: {len(entries)} properties, {len(postings)} tokens.")
+
+    def ensure_loaded(self) -> None:
+        """Load on first use; afterwards reload in a background thread once stale."""
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+            return
+        if time.monotonic() - self._loaded_at > self.ttl and not self._reloading:
+            self._reloading = True
+            threading.Thread(target=self._background_reload, name="property-index-reload", daemon=True).start()
+
+    def _background_reload(self):
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Property search index reload failed: {e}", exc_info=True)
+        finally:
+            self._reloading = False
+
+    # --- incremental updates ---
+    def update(self, instance: Property) -> None:
+        """Apply a saved property: (re)index it if confirmed, drop it otherwise."""
+        if not self.loaded:
+            return
+        if instance.status != 'confirmed':
+            self.remove(instance.pk)
+            return
+        entry = {field: getattr(instance, field) for field in INDEX_FIELDS}
+        with self._lock:
+            self._drop(instance.pk)
+            self._entries[instance.pk] = entry
+            bisect.insort(self._ids, instance.pk)
+            tokens = self._tokens_by_id[instance.pk] = entry_tokens(entry)
+            for token in tokens:
+                if token not in self._postings:
+                    self._postings[token] = []
+                    bisect.insort(self._sorted_tokens, token)
+                bisect.insort(self._postings[token], instance.pk)
+
+    def remove(self, pk) -> None:
+        if not self.loaded:
+            return
+        with self._lock:
+            self._drop(pk)
+
+    @staticmethod
+    def _discard(ids: list, pk) -> None:
+        position = bisect.bisect_left(ids, pk)
+        if position < len(ids) and ids[position] == pk:
+            del ids[position]
+
+    def _drop(self, pk):
+        if self._entries.pop(pk, None) is not None:
+            self._discard(self._ids, pk)
+        for token in self._tokens_by_id.pop(pk, ()):
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            self._discard(ids, pk)
+            if not ids:
+                del self._postings[token]
+                position = bisect.bisect_left(self._sorted_tokens, token)
+                if position < len(self._sorted_tokens) and self._sorted_tokens[position] == token:
+                    del self._sorted_tokens[position]
+
+    # --- querying ---
+    def _prefix_tokens(self, prefix: str) -> list:
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        end = bisect.bisect_left(self._sorted_tokens, prefix + '\U0010ffff')
+        return self._sorted_tokens[start:end]
+
+    def _has_prefix(self, pk, prefix: str) -> bool:
+        return any(token.startswith(prefix) for token in self._tokens_by_id[pk])
+
+    def search(self, text: str, limit: int = 20) -> list:
+        """Newest confirmed properties matching every word of ``text`` as a prefix."""
+        with self._lock:
+            words = set(tokenize(text))
+            if not words:
+                return [self._entries[pk] for pk in self._ids[:-limit - 1:-1]]
+
+            # Walk the postings of the rarest word (newest first) and check the others per candidate.
+            expansions = {word: self._prefix_tokens(word) for word in words}
+            driver = min(words, key=lambda word: sum(len(self._postings[token]) for token in expansions[word]))
+            others = words - {driver}
+            candidates = heapq.merge(*(reversed(self._postings[token]) for token in expansions[driver]), reverse=True)
+            results, previous = [], None
+            for pk in candidates:
+                if pk == previous:
+                    continue
+                previous = pk
+                if all(self._has_prefix(pk, word) for word in others):
+                    results.append(self._entries[pk])
+                    if len(results) == limit:
+                        break
+            return results
+
+
+property_index = PropertyIndex(ttl=settings.BOT_SEARCH_INDEX_TTL)
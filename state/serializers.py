@@ -1,22 +1,122 @@
+from decimal import Decimal
+
 from rest_framework import serializers
-from .models import Customer, Property, Tour, Favorite
+from .models import Customer, Property, Tour, Favorite, SavedSearch
+
+PROPERTY_SUMMARY_FIELDS = ('id', 'name', 'status', 'for_property', 'city', 'subcity_zone', 'selling_price', 'monthly_rent')
+PROPERTY_LIST_FIELDS = PROPERTY_SUMMARY_FIELDS + (
+    'owner', 'type_property', 'usage', 'region', 'total_area', 'bedrooms', 'bathrooms',
+)
+
+
+def requested_fields(request):
+    """Field names asked for with ``?fields=a,b,c`` on a read, or None."""
+    if request is None or request.method != 'GET':
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Drops every field not listed in the request's ``?fields=`` parameter."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = '__all__'
 
-class PropertySerializer(serializers.ModelSerializer):
+class CustomerAccountSerializer(serializers.ModelSerializer):
+    """Agent/owner listing with the number of confirmed properties (``/api/customers/accounts/``)."""
+    confirmed_properties = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Customer
+        fields = ('telegram_id', 'full_name', 'user_type', 'is_verified', 'confirmed_properties')
+
+class PropertySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Property
         fields = '__all__'
 
-class TourSerializer(serializers.ModelSerializer):
+class PropertySummarySerializer(serializers.ModelSerializer):
+    """Slim representation used for batch lookups (``/api/properties/?ids=``)."""
+    class Meta:
+        model = Property
+        fields = PROPERTY_SUMMARY_FIELDS
+
+class PropertyListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Compact row for ``/api/properties/`` listings; details stay on the detail endpoint."""
+    class Meta:
+        model = Property
+        fields = PROPERTY_LIST_FIELDS
+
+class NearbyPropertySerializer(PropertyListSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(PropertyListSerializer.Meta):
+        fields = PROPERTY_LIST_FIELDS + ('latitude', 'longitude', 'distance_km')
+
+class NearbySearchSerializer(serializers.Serializer):
+    """Query parameters of ``/api/properties/nearby/``."""
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(min_value=0.1, max_value=50, default=5)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+class BoundingBoxSerializer(serializers.Serializer):
+    """Query parameters of ``/api/properties/bbox/``."""
+    min_lat = serializers.FloatField(min_value=-90, max_value=90)
+    min_lng = serializers.FloatField(min_value=-180, max_value=180)
+    max_lat = serializers.FloatField(min_value=-90, max_value=90)
+    max_lng = serializers.FloatField(min_value=-180, max_value=180)
+
+    def validate(self, attrs):
+        if attrs['min_lat'] > attrs['max_lat'] or attrs['min_lng'] > attrs['max_lng']:
+            raise serializers.ValidationError("min_lat/min_lng must not exceed max_lat/max_lng.")
+        return attrs
+
+class PropertySearchSerializer(serializers.Serializer):
+    """Query parameters of ``/api/properties/search/``."""
+    for_property = serializers.ChoiceField(choices=Property.FOR_CHOICES, required=False)
+    usage = serializers.ChoiceField(choices=Property.USAGE_CHOICES, required=False)
+    city = serializers.CharField(max_length=100, required=False)
+    subcity_zone = serializers.CharField(max_length=100, required=False)
+    min_bedrooms = serializers.IntegerField(min_value=0, required=False)
+    max_bedrooms = serializers.IntegerField(min_value=0, required=False)
+    min_bathrooms = serializers.IntegerField(min_value=0, required=False)
+    max_bathrooms = serializers.IntegerField(min_value=0, required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal(0), required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal(0), required=False)
+    min_rent = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal(0), required=False)
+    max_rent = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal(0), required=False)
+
+class TourSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Tour
         fields = '__all__'
         
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Favorite
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class SavedSearchSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        fields = '__all__'
+
+    def validate(self, attrs):
+        min_price = attrs.get('min_price', getattr(self.instance, 'min_price', None))
+        max_price = attrs.get('max_price', getattr(self.instance, 'max_price', None))
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError("min_price must not exceed max_price.")
+        return attrs
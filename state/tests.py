@@ -1,3 +1,580 @@
-from django.test import TestCase
+"""Query-count regression tests, and tests of the bookkeeping those queries rely on.
 
-# Create your tests here.
+Every route of ``state/urls.py``, every admin changelist and the bot handlers on
+the in-process ("orm") backend run against a seeded dataset, then again after
+:func:`seed` has added as many rows again. The query count must stay within the
+test's budget and must not change with the row count, so an N+1 fails here.
+"""
+import asyncio
+from itertools import count
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from telegram import Update
+from telegram.error import RetryAfter
+
+from live.models import Message, Request
+from . import alerts, channel, counters, fulltext, geo
+from .bench import CITY_CENTERS, FAKE_TOKEN, callback_update, message_update, property_rows
+from .bot import ADMINS, LIVE_PHONE, build_application
+from .cache import CACHES
+from .outbox import OutboxWorker, RateLimiter
+from .fake_telegram import FakeBotRequest
+from .models import BotConversation, ChannelPost, Customer, Favorite, OutboxMessage, Property, SavedSearch, Tour
+from .persistence import DjangoPersistence
+from .search_index import property_index
+from .update_processor import PerChatUpdateProcessor
+
+SUBJECT_ID = 700_001
+ADMIN_ID = ADMINS[0]
+
+_seeds = count()
+
+
+def seed(rows=5):
+    """Add ``rows`` of everything: owners with listings, and tours, favorites, saved
+    searches, live requests and outbox messages of the subject user."""
+    batch = next(_seeds)
+    subject, _ = Customer.objects.get_or_create(
+        telegram_id=str(SUBJECT_ID), defaults={'full_name': "Subject User", 'user_type': 'owner'},
+    )
+    Customer.objects.get_or_create(telegram_id=str(ADMIN_ID), defaults={'full_name': "Admin"})
+    owners = Customer.objects.bulk_create([
+        Customer(telegram_id=f"{batch}-{i}", full_name=f"Owner {batch}-{i}", user_type='owner') for i in range(rows)
+    ])
+    listings = [next(property_rows(owner, 1, seed=batch * rows + i)) for i, owner in enumerate(owners)]
+    listings += list(property_rows(subject, rows, seed=1000 + batch))
+    for listing in listings:
+        listing.status = 'confirmed'
+    listings = Property.objects.bulk_create(listings)
+    Tour.objects.bulk_create([
+        Tour(
+            property=listing, telegram_id=str(SUBJECT_ID), full_name="Subject User",
+            phone_number="0911000000", tour_date="Monday", tour_time=1,
+        )
+        for listing in listings
+    ])
+    Favorite.objects.bulk_create([Favorite(customer=subject, property=listing) for listing in listings])
+    SavedSearch.objects.bulk_create([
+        SavedSearch(customer=subject, city="Addis Ababa", min_bedrooms=i % 4) for i in range(rows)
+    ])
+    OutboxMessage.objects.bulk_create([
+        OutboxMessage(chat_id=str(SUBJECT_ID), payload={'text': f"hi {i}"}, key=f"seed:{batch}:{i}") for i in range(rows)
+    ])
+    requests = Request.objects.bulk_create([
+        Request(user_id=str(SUBJECT_ID), name="Subject User", phone="0911000000", address="Bole", additional_text="?")
+        for _ in range(rows)
+    ])
+    Message.objects.bulk_create([
+        Message(request=request, sender_id=sender, content="hello")
+        for request in requests for sender in (str(SUBJECT_ID), str(ADMIN_ID))
+    ])
+
+
+class QueryBudgetMixin:
+    """``assertQueryBudget`` for TestCases whose data comes from :func:`seed`."""
+
+    def count_queries(self, run) -> int:
+        with CaptureQueriesContext(connection) as captured:
+            run()
+        return len(captured)
+
+    def assertQueryBudget(self, budget, run):
+        before = self.count_queries(run)
+        seed()
+        after = self.count_queries(run)
+        self.assertLessEqual(before, budget, f"{before} queries, budget {budget}")
+        self.assertEqual(after, before, "query count grows with the number of rows")
+
+
+class ViewQueryCountTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed()
+        cls.staff = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        cls.subject = Customer.objects.get(pk=str(SUBJECT_ID))
+        cls.listing = Property.objects.filter(owner=cls.subject).first()
+
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+
+    def assertGetBudget(self, budget, url, **params):
+        def run():
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, url)
+        self.assertQueryBudget(budget, run)
+
+    def test_api_root(self):
+        self.assertGetBudget(0, '/api/')
+
+    def test_customers(self):
+        self.assertGetBudget(1, reverse('customer-list'))
+        self.assertGetBudget(1, reverse('customer-detail', args=[SUBJECT_ID]))
+        self.assertGetBudget(2, reverse('customer-properties', args=[SUBJECT_ID]))
+        self.assertGetBudget(2, reverse('customer-favorites', args=[SUBJECT_ID]))
+        self.assertGetBudget(2, reverse('customer-accounts'))
+
+    def test_properties(self):
+        self.assertGetBudget(1, reverse('property-list'))
+        self.assertGetBudget(1, reverse('property-list'), fields='name,city')
+        ids = Property.objects.values_list('pk', flat=True)[:10]
+        self.assertGetBudget(1, reverse('property-list'), ids=",".join(map(str, ids)))
+        self.assertGetBudget(1, reverse('property-detail', args=[self.listing.pk]))
+        self.assertGetBudget(2, reverse('property-tours', args=[self.listing.pk]))
+        self.assertGetBudget(1, reverse('property-search'), city="Addis Ababa", min_bedrooms=1)
+        fulltext.fts_available()  # checked once per process
+        self.assertGetBudget(3, reverse('property-text-search'), q="bedroom")
+        lat, lng = CITY_CENTERS["Addis Ababa"]
+        self.assertGetBudget(1, reverse('property-nearby'), lat=lat, lng=lng, radius_km=20)
+        self.assertGetBudget(
+            1, reverse('property-bbox'), min_lat=lat - 0.2, min_lng=lng - 0.2, max_lat=lat + 0.2, max_lng=lng + 0.2,
+        )
+
+    def test_tours_favorites_and_saved_searches(self):
+        tour = Tour.objects.first()
+        favorite = Favorite.objects.first()
+        self.assertGetBudget(1, reverse('tour-list'))
+        self.assertGetBudget(1, reverse('tour-detail', args=[tour.pk]))
+        self.assertGetBudget(1, reverse('favorite-list'))
+        self.assertGetBudget(1, reverse('favorite-detail', args=[favorite.pk]))
+        self.assertGetBudget(1, reverse('savedsearch-list'), customer=SUBJECT_ID)
+        self.assertGetBudget(1, reverse('get_tours_by_telegram_id', args=[SUBJECT_ID]))
+        self.assertGetBudget(2, reverse('check_existing_tour'), telegram_id=SUBJECT_ID, property=self.listing.pk)
+
+    def test_pages(self):
+        token = self.subject.profile_token
+        self.assertGetBudget(0, '/')
+        self.assertGetBudget(1, reverse('profile'), tgWebAppStartParam=f"edit-{token}")
+        self.assertGetBudget(0, reverse('add_property'))
+        self.assertGetBudget(0, reverse('property_success'))
+        self.assertGetBudget(2, reverse('my_properties'), profile_token=token)
+        self.assertGetBudget(1, reverse('property_detail', args=[self.listing.pk]))
+
+    def test_staff_endpoints(self):
+        self.client.force_login(self.staff)
+        self.assertGetBudget(2, reverse('cache_statistics'))
+        self.assertGetBudget(2, reverse('metrics'))
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer s\u00e9cret").status_code, 403)
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.staff)
+        # Session, user, then the page and its count queries (and list_filter choices).
+        budgets = {Customer: 5, Property: 6, Tour: 6, Favorite: 5, OutboxMessage: 6, SavedSearch: 6}
+        for model, budget in budgets.items():
+            with self.subTest(model=model.__name__):
+                self.assertGetBudget(budget, reverse(f'admin:state_{model._meta.model_name}_changelist'))
+
+
+@override_settings(BOT_DATA_BACKEND='orm')
+class BotHandlerQueryCountTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed()
+
+    def setUp(self):
+        self.request = FakeBotRequest()
+        self.application = build_application(persistence=None, request=self.request, token=FAKE_TOKEN)
+        async_to_sync(self.application.initialize)()
+        self.addCleanup(async_to_sync(self.application.shutdown))
+
+    def assertHandlerBudget(self, budget, make_update):
+        def run():
+            for cache in CACHES:
+                cache.clear()
+            update = Update.de_json(make_update(), self.application.bot)
+            with self.assertNoLogs('state', 'ERROR'):
+                async_to_sync(self.application.process_update)(update)
+            self.assertTrue(self.request.calls, "the handler did not answer")
+        self.assertQueryBudget(budget, run)
+
+    def test_start_and_profile(self):
+        self.assertHandlerBudget(1, lambda: message_update(SUBJECT_ID, "/start"))
+        self.assertHandlerBudget(1, lambda: message_update(SUBJECT_ID, "/profile"))
+
+    def test_lists(self):
+        self.assertHandlerBudget(1, lambda: callback_update(SUBJECT_ID, "list_properties"))
+        self.assertHandlerBudget(2, lambda: message_update(SUBJECT_ID, "/list_tours"))
+        self.assertHandlerBudget(2, lambda: message_update(SUBJECT_ID, "/list_favorites"))
+        self.assertHandlerBudget(1, lambda: message_update(SUBJECT_ID, "/mysearches"))
+
+    def test_admin_lists(self):
+        self.assertHandlerBudget(2, lambda: message_update(ADMIN_ID, "/list_users"))
+        self.assertHandlerBudget(1, lambda: message_update(ADMIN_ID, "/requests"))
+
+    def test_live_chat_message(self):
+        # Lookup, message insert, and live.signals marking the request responded and pruning old ones.
+        self.assertHandlerBudget(6, lambda: message_update(SUBJECT_ID, "Is this still available?"))
+
+    def test_location_and_inline_search(self):
+        lat, lng = CITY_CENTERS["Addis Ababa"]
+
+        def location():
+            update = message_update(SUBJECT_ID, "")
+            del update["message"]["text"]
+            update["message"]["location"] = {"latitude": lat, "longitude": lng}
+            return update
+
+        def inline_query():
+            return {
+                "update_id": next(_seeds) + 10_000_000,
+                "inline_query": {
+                    "id": "1", "from": {"id": SUBJECT_ID, "is_bot": False, "first_name": "Subject"},
+                    "query": "bole", "offset": "",
+                },
+            }
+
+        self.assertHandlerBudget(1, location)
+        property_index.load()  # inline search reads the in-memory index only
+        self.assertHandlerBudget(0, inline_query)
+
+
+class CustomerCounterTests(TestCase):
+    def setUp(self):
+        self.owner = Customer.objects.create(telegram_id="counter-owner", full_name="Owner", user_type='owner')
+
+    def counts(self):
+        return Customer.objects.values_list('property_count', 'confirmed_property_count').get(pk=self.owner.pk)
+
+    def test_stale_customer_save_keeps_counters(self):
+        stale = Customer.objects.get(pk=self.owner.pk)
+        listing = next(property_rows(self.owner, 1))
+        listing.status = 'confirmed'
+        listing.save()
+        self.assertEqual(self.counts(), (1, 1))
+
+        stale.is_verified = True
+        stale.save()
+        self.assertEqual(self.counts(), (1, 1))
+        self.assertTrue(Customer.objects.get(pk=self.owner.pk).is_verified)
+        self.assertEqual(counters.reconcile(dry_run=True), [])
+
+
+@mock.patch.object(fulltext, 'RANK_WINDOW', 5)
+class TextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = Customer.objects.create(telegram_id="search-owner", full_name="Selam Owner", user_type='owner')
+        listings = list(property_rows(owner, 12))
+        for i, listing in enumerate(listings):
+            listing.name = f"Quiet villa #{i}"
+            # The newest matches are all pending.
+            listing.status = 'confirmed' if i < 6 else 'pending'
+        Property.objects.bulk_create(listings)
+
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+
+    def test_window_counts_confirmed_matches_only(self):
+        ids = fulltext.ranked_ids("quiet villa", 10)
+        self.assertEqual(len(ids), 5)
+        self.assertFalse(Property.objects.filter(pk__in=ids).exclude(status='confirmed').exists())
+
+    def test_page_past_window_is_rejected(self):
+        url = reverse('property-text-search')
+        response = self.client.get(url, {'q': "quiet villa", 'page_size': 5})
+        self.assertEqual((len(response.json()['results']), response.json()['next']), (5, None))
+        self.assertEqual(self.client.get(url, {'q': "quiet villa", 'page': 2, 'page_size': 5}).status_code, 400)
+
+    def test_admin_search_matches_text_or_owner_name(self):
+        # "Villa" is in this owner's name, and in other owners' listing names.
+        owner = Customer.objects.create(telegram_id="villa-owner", full_name="Villa Kebede", user_type='owner')
+        listing = next(property_rows(owner, 1))
+        listing.name = listing.own_description = "Flat"
+        listing.save()
+        property_admin = admin.site._registry[Property]
+        queryset, _ = property_admin.get_search_results(None, Property.objects.all(), "villa")
+        self.assertEqual(queryset.count(), 13)
+        self.assertIn(listing, queryset)
+
+
+class SavedSearchIndexTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(telegram_id="searcher", full_name="Searcher")
+        self.index = alerts.saved_search_index
+        self.index.load()
+        self.addCleanup(self.index.load)
+
+    def matches(self):
+        with self.assertNumQueries(0):
+            return {row['id'] for row in self.index.match("Addis Ababa", 'sale', 2_000_000, 3)}
+
+    def test_changes_apply_without_reload(self):
+        with mock.patch.object(self.index, 'load', side_effect=AssertionError("reloaded")):
+            search = SavedSearch.objects.create(customer=self.customer, city="addis  ababa", max_price=3_000_000)
+            self.assertEqual(self.matches(), {search.pk})
+            search.max_price = 1_000_000
+            search.save()
+            self.assertEqual(self.matches(), set())
+            search.for_property, search.max_price = 'sale', None
+            search.save()
+            self.assertEqual(self.matches(), {search.pk})
+            search.delete()
+            self.assertEqual(self.matches(), set())
+
+    def test_refresh_picks_up_writes_that_skip_signals(self):
+        search = SavedSearch.objects.bulk_create([SavedSearch(customer=self.customer, city="Addis Ababa")])[0]
+        self.assertEqual(self.matches(), set())
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.matches(), {search.pk})
+        self.assertFalse(self.index.refresh())
+
+    def test_stale_index_is_refreshed_before_matching(self):
+        search = SavedSearch.objects.bulk_create([SavedSearch(customer=self.customer, city="Addis Ababa")])[0]
+        with mock.patch.object(self.index, 'ttl', 0):
+            self.index.ensure_loaded()
+        self.assertEqual(self.matches(), {search.pk})
+
+
+@override_settings(BOT_DATA_BACKEND='orm')
+class ConversationRefreshTests(TestCase):
+    """DjangoPersistence.refresh_conversations relies on python-telegram-bot internals
+    (``ConversationHandler._get_key``, ``Application._conversation_handler_conversations``);
+    this fails if an upgrade changes them."""
+
+    def test_state_stored_by_another_worker_is_applied(self):
+        persistence = DjangoPersistence()
+        application = build_application(persistence=persistence, request=FakeBotRequest(), token=FAKE_TOKEN)
+        async_to_sync(application.initialize)()
+        self.addCleanup(async_to_sync(application.shutdown))
+        update = Update.de_json(message_update(SUBJECT_ID, "Abebe"), application.bot)
+        BotConversation.objects.create(name="live_agent_conversation", key=f"{SUBJECT_ID},{SUBJECT_ID}", state=LIVE_PHONE)
+
+        async_to_sync(persistence.refresh_conversations)(application, update)
+        conversations = application._conversation_handler_conversations["live_agent_conversation"]
+        self.assertEqual(conversations.get((SUBJECT_ID, SUBJECT_ID)), LIVE_PHONE)
+
+
+class OutboxWorkerTests(TestCase):
+    class Bot:
+        def __init__(self, *errors):
+            self.errors = list(errors)
+            self.sent = []
+
+        async def do_api_request(self, method, api_kwargs):
+            if self.errors and (error := self.errors.pop(0)) is not None:
+                raise error
+            self.sent.append(api_kwargs['text'])
+            return {'message_id': len(self.sent)}
+
+    def drain(self, bot):
+        worker = OutboxWorker(bot, rate_limiter=RateLimiter(private_interval=0))
+        return async_to_sync(worker.drain_once)()
+
+    def queue(self, *texts, chat_id="42"):
+        return OutboxMessage.objects.bulk_create([OutboxMessage(chat_id=chat_id, payload={'text': text}) for text in texts])
+
+    def test_retry_after_holds_back_the_rest_of_the_chat(self):
+        self.queue("first", "second", "third")
+        self.queue("other chat", chat_id="43")
+        bot = self.Bot(RetryAfter(30))
+        self.drain(bot)
+        self.assertEqual(bot.sent, ["other chat"])
+        first, *rest = OutboxMessage.objects.filter(chat_id="42").order_by('id')
+        self.assertGreater(first.available_at, timezone.now())
+        for message in rest:
+            self.assertEqual((message.status, message.available_at), ('pending', first.available_at))
+
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.drain(bot)
+        self.assertEqual(bot.sent, ["other chat", "first", "second", "third"])
+
+    def test_unexpected_error_is_rescheduled(self):
+        self.queue("boom", "after")
+        self.queue("other chat", chat_id="43")
+        bot = self.Bot(ValueError("boom"))
+        with self.assertLogs('state.outbox', 'ERROR'):
+            self.assertEqual(self.drain(bot), 3)
+        self.assertEqual(bot.sent, ["other chat"])
+        self.assertEqual(
+            list(OutboxMessage.objects.filter(chat_id="42").values_list('status', 'attempts', 'last_error')),
+            [('pending', 1, "boom"), ('pending', 0, "")],
+        )
+
+
+class PerChatUpdateProcessorTests(TestCase):
+    def test_one_chat_in_order_other_chats_in_parallel(self):
+        events = []
+
+        async def handle(name, delay):
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+
+        async def run():
+            processor = PerChatUpdateProcessor(8)
+            updates = [
+                ("a1", message_update(1, "first"), 0.02),
+                ("a2", message_update(1, "second"), 0),
+                ("b1", message_update(2, "other"), 0),
+            ]
+            await asyncio.gather(*(
+                processor.process_update(Update.de_json(update, None), handle(name, delay))
+                for name, update, delay in updates
+            ))
+            return processor
+
+        processor = async_to_sync(run)()
+        self.assertLess(events.index("end a1"), events.index("start a2"))
+        self.assertLess(events.index("end b1"), events.index("end a1"))
+        self.assertEqual(processor._locks, {})
+
+
+class ChannelPublishTests(TestCase):
+    def setUp(self):
+        owner = Customer.objects.create(telegram_id="channel-owner", full_name="Owner", user_type='owner')
+        self.listing = next(property_rows(owner, 1))
+        self.listing.status = 'confirmed'
+        self.listing.save()  # publishes through the post_save receiver
+
+    def channel_messages(self):
+        return list(OutboxMessage.objects.filter(chat_id=channel.CHANNEL).order_by('id'))
+
+    def deliver(self, message, message_id=77):
+        """What the outbox worker does with the first post: send it, then run the after_send hook."""
+        OutboxMessage.objects.filter(pk=message.pk).update(status='sent')
+        async_to_sync(channel.store_message_id)(message, {'message_id': message_id})
+
+    def test_first_publish_queues_a_post(self):
+        [post] = self.channel_messages()
+        self.assertEqual((post.method, post.key, post.status), ('sendMessage', f"channel_post:{self.listing.pk}", 'pending'))
+        self.assertIn(self.listing.name, post.payload['text'])
+        self.assertTrue(OutboxMessage.objects.filter(chat_id="channel-owner").exists())  # congratulations
+
+    def test_unchanged_content_queues_nothing(self):
+        self.listing.save()
+        self.assertFalse(channel.publish(self.listing))
+        self.assertEqual(len(self.channel_messages()), 1)
+
+    def test_change_while_pending_replaces_the_payload(self):
+        self.listing.name = "Renamed villa"
+        self.listing.save()
+        [post] = self.channel_messages()
+        self.assertEqual(post.method, 'sendMessage')
+        self.assertIn("Renamed villa", post.payload['text'])
+
+    def test_edit_is_queued_once_the_message_id_is_known(self):
+        [post] = self.channel_messages()
+        self.deliver(post)
+        self.assertEqual(ChannelPost.objects.get(pk=self.listing.pk).message_id, 77)
+        self.assertEqual(len(self.channel_messages()), 1)
+
+        self.listing.name = "Renamed villa"
+        self.listing.save()
+        edit = self.channel_messages()[-1]
+        self.assertEqual((edit.method, edit.key), ('editMessageText', f"channel_edit:{self.listing.pk}"))
+        self.assertEqual(edit.payload['message_id'], 77)
+        self.assertIn("Renamed villa", edit.payload['text'])
+
+    def test_change_while_sending_is_edited_after_the_post(self):
+        [post] = self.channel_messages()
+        OutboxMessage.objects.filter(pk=post.pk).update(status='sending')
+        self.listing.name = "Renamed villa"
+        self.listing.save()
+        self.assertEqual(len(self.channel_messages()), 1)
+
+        self.deliver(post)
+        edit = self.channel_messages()[-1]
+        self.assertEqual((edit.method, edit.payload['message_id']), ('editMessageText', 77))
+        self.assertIn("Renamed villa", edit.payload['text'])
+
+
+class GeoTests(TestCase):
+    def test_parse_coordinates(self):
+        links = {
+            "https://www.google.com/maps/place/Bole/@9.0107,38.7613,15z": (9.0107, 38.7613),
+            "https://www.google.com/maps/place/X/data=!3m1!4b1!4m5!3m4!1s0x0:0x0!8m2!3d9.02!4d38.75": (9.02, 38.75),
+            "https://www.google.com/maps/place/8.9806,+38.7578": (8.9806, 38.7578),
+            "https://www.google.com/maps/search/9.03,%2038.74": (9.03, 38.74),
+            "https://maps.google.com/?q=9.005401,38.763611": (9.005401, 38.763611),
+            "https://maps.google.com/maps?ll=-33.8688,151.2093&z=12": (-33.8688, 151.2093),
+            "https://www.google.com/maps?q=loc:9.01,38.76": (9.01, 38.76),
+        }
+        for link, expected in links.items():
+            with self.subTest(link=link):
+                self.assertEqual(geo.parse_coordinates(link), expected)
+        for link in (None, "", "https://maps.app.goo.gl/abcdef", "not a link", "https://maps.google.com/?q=95.0,38.7",
+                     "https://www.google.com/maps/@9.01,200.5,15z"):
+            with self.subTest(link=link):
+                self.assertIsNone(geo.parse_coordinates(link))
+
+    def test_encode_geohash(self):
+        self.assertEqual(geo.encode_geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geo.encode_geohash(42.6, -5.6, 5), "ezs42")
+        self.assertEqual(geo.encode_geohash(0, 0, 1), "s")
+        self.assertEqual(geo.encode_geohash(-0.000001, -0.000001, 1), "7")
+        self.assertEqual(len(geo.encode_geohash(9.0, 38.7)), geo.GEOHASH_PRECISION)
+
+    def test_covering_cells(self):
+        boxes = [
+            (9.0, 38.7, 9.0001, 38.7001),          # tiny
+            (8.8, 38.6, 9.2, 39.0),                # a city
+            (-0.01, -0.01, 0.01, 0.01),            # crosses the equator and the prime meridian
+            (44.99, 44.99, 45.01, 45.01),          # straddles cell edges at every precision
+            (-60.0, -170.0, 70.0, 170.0),          # most of the world
+        ]
+        for box in boxes:
+            with self.subTest(box=box):
+                cells = geo.covering_cells(*box)
+                self.assertLessEqual(len(cells), 32)
+                self.assertEqual(len({len(cell) for cell in cells}), 1)
+                min_lat, min_lng, max_lat, max_lng = box
+                for i in range(11):
+                    for j in range(11):
+                        lat = min_lat + (max_lat - min_lat) * i / 10
+                        lng = min_lng + (max_lng - min_lng) * j / 10
+                        self.assertTrue(geo.encode_geohash(lat, lng).startswith(tuple(cells)), (lat, lng))
+
+
+class GeoSearchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = Customer.objects.create(telegram_id="geo-owner", full_name="Owner", user_type='owner')
+        cls.center = (9.0, 38.75)
+        points = {
+            "here": (9.0, 38.75, 'confirmed'),
+            "1 km north": (9.009, 38.75, 'confirmed'),
+            "4 km east": (9.0, 38.7865, 'confirmed'),
+            "pending": (9.001, 38.75, 'pending'),
+            "30 km away": (9.27, 38.75, 'confirmed'),
+        }
+        for (name, (lat, lng, status)), listing in zip(points.items(), property_rows(owner, len(points))):
+            listing.name, listing.status = name, status
+            listing.google_map_link = f"https://www.google.com/maps/@{lat},{lng},15z"
+            listing.save()
+
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+
+    def test_nearby(self):
+        lat, lng = self.center
+        response = self.client.get(reverse('property-nearby'), {'lat': lat, 'lng': lng, 'radius_km': 5})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual([row['name'] for row in rows], ["here", "1 km north", "4 km east"])
+        self.assertEqual(rows[0]['distance_km'], 0)
+        self.assertAlmostEqual(rows[1]['distance_km'], 1.0, delta=0.05)
+
+        response = self.client.get(reverse('property-nearby'), {'lat': lat, 'lng': lng, 'radius_km': 2, 'limit': 1})
+        self.assertEqual([row['name'] for row in response.json()], ["here"])
+        self.assertEqual(self.client.get(reverse('property-nearby'), {'lat': 91, 'lng': lng}).status_code, 400)
+
+    def test_bbox(self):
+        box = {'min_lat': 8.99, 'min_lng': 38.74, 'max_lat': 9.01, 'max_lng': 38.76}
+        response = self.client.get(reverse('property-bbox'), box)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['name'] for row in response.json()['results']}, {"here", "1 km north"})
+        inverted = {**box, 'min_lat': 9.5}
+        self.assertEqual(self.client.get(reverse('property-bbox'), inverted).status_code, 400)
@@ -3,42 +3,50 @@ import aiohttp
 import asyncio
 import logging
 
+from django.conf import settings
+
+from .http import http_client
+from .serializers import PROPERTY_SUMMARY_FIELDS
+
 logger = logging.getLogger(__name__)
 
-API_BASE_URL = "https://estate-r22a.onrender.com/api"
+API_BASE_URL = f"{settings.ESTATE_SITE_URL}/api"
 CUSTOMER_API_URL = f"{API_BASE_URL}/customers/"
 TOUR_API_URL = f"{API_BASE_URL}/tours/"
 PROPERTY_API_URL = f"{API_BASE_URL}/properties/"
 FAVORITE_API_URL = f"{API_BASE_URL}/favorites/"
+SAVED_SEARCH_API_URL = f"{API_BASE_URL}/saved-searches/"
 
-async def make_request(method: str, url: str, timeout_seconds: int = 30, **kwargs) -> Any | None:
-    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+async def make_request(method: str, url: str, timeout_seconds: float | None = None, **kwargs) -> Any | None:
+    # Without timeout_seconds the pooled session's timeouts (total and connect) apply.
+    if timeout_seconds:
+        kwargs.setdefault('timeout', aiohttp.ClientTimeout(total=timeout_seconds, connect=settings.HTTP_CONNECT_TIMEOUT))
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            logger.debug(f"Requesting: {method} {url} with args {kwargs}")
-            async with session.request(method, url, **kwargs) as response:
-                logger.debug(f"Response status from {url}: {response.status}")
-                if response.status in [200, 201]:
-                    try:
-                        json_response = await response.json()
-                        logger.debug(f"Response JSON from {url}: {str(json_response)[:200]}...")
-                        return json_response
-                    except aiohttp.ContentTypeError:
-                        logger.warning(f"Response from {url} was not JSON (status {response.status}).")
-                        return await response.text()
-                elif response.status == 204:
-                    logger.debug(f"Received 204 No Content from {url}")
-                    return True
-                elif response.status == 404:
-                    logger.warning(f"Resource not found (404) at {url}")
-                    return None
-                else:
-                    error_text = await response.text()
-                    logger.error(f"HTTP Error {response.status} from {url}: {error_text}")
-                    return None
+        session = http_client.session()
+        logger.debug(f"Requesting: {method} {url} with args {kwargs}")
+        async with session.request(method, url, **kwargs) as response:
+            logger.debug(f"Response status from {url}: {response.status}")
+            if response.status in [200, 201]:
+                try:
+                    json_response = await response.json()
+                    logger.debug(f"Response JSON from {url}: {str(json_response)[:200]}...")
+                    return json_response
+                except aiohttp.ContentTypeError:
+                    logger.warning(f"Response from {url} was not JSON (status {response.status}).")
+                    return await response.text()
+            elif response.status == 204:
+                logger.debug(f"Received 204 No Content from {url}")
+                return True
+            elif response.status == 404:
+                logger.warning(f"Resource not found (404) at {url}")
+                return None
+            else:
+                error_text = await response.text()
+                logger.error(f"HTTP Error {response.status} from {url}: {error_text}")
+                return None
 
     except asyncio.TimeoutError:
-        logger.error(f"Request timed out after {timeout_seconds}s for {method} {url}")
+        logger.error(f"Request timed out after {timeout_seconds or settings.HTTP_TIMEOUT}s for {method} {url}")
         return None
     except aiohttp.ClientError as e:
         logger.error(f"aiohttp Client Error for {method} {url}: {e}")
@@ -47,6 +55,17 @@ async def make_request(method: str, url: str, timeout_seconds: int = 30, **kwarg
         logger.error(f"Unexpected error in make_request for {method} {url}: {e}", exc_info=True)
         return None
 
+async def get_all_pages(url: str, params: Dict | None = None) -> List[dict]:
+    """Every row of a cursor-paginated list endpoint, following its ``next`` links."""
+    rows = []
+    result = await make_request('GET', url, params=params)
+    while isinstance(result, dict):
+        rows.extend(result.get("results", []))
+        if not result.get("next"):
+            break
+        result = await make_request('GET', result["next"])
+    return rows
+
 async def register_user(telegram_id: str, full_name: str, username: str = "") -> dict:
     data = {
         "telegram_id": telegram_id,
@@ -73,6 +92,16 @@ async def get_user_details(telegram_id: str) -> Dict | None:
 async def get_property_details(property_id: int | str) -> Dict | None:
     return await make_request('GET', f"{PROPERTY_API_URL}{property_id}/")
 
+async def get_properties_by_ids(property_ids) -> Dict[int, dict]:
+    ids = ",".join(str(property_id) for property_id in property_ids)
+    result = await make_request('GET', PROPERTY_API_URL, params={"ids": ids})
+    return {prop["id"]: prop for prop in result} if isinstance(result, list) else {}
+
+async def get_nearby_properties(lat: float, lng: float, radius_km: float = 5, limit: int = 5) -> List[dict]:
+    params = {"lat": lat, "lng": lng, "radius_km": radius_km, "limit": limit}
+    result = await make_request('GET', f"{PROPERTY_API_URL}nearby/", params=params)
+    return result if isinstance(result, list) else []
+
 async def upgrade_user(telegram_id: str, new_user_type: str) -> dict:
     url = f"{CUSTOMER_API_URL}{telegram_id}/"
     data = {"user_type": new_user_type}
@@ -84,8 +113,32 @@ async def upgrade_user(telegram_id: str, new_user_type: str) -> dict:
         logger.error(f"Failed to upgrade user {telegram_id}")
         return {"success": False, "message": "Failed to upgrade account."}
 
+async def create_tour(data: dict) -> Dict | None:
+    result = await make_request('POST', TOUR_API_URL, json=data)
+    return result if isinstance(result, dict) else None
+
+async def add_favorite(telegram_id: str, property_id: int) -> Dict | None:
+    payload = {"property": property_id, "customer": telegram_id}
+    result = await make_request('POST', FAVORITE_API_URL, json=payload)
+    return result if isinstance(result, dict) else None
+
+async def remove_favorite(favorite_id: int) -> bool:
+    return await make_request('DELETE', f"{FAVORITE_API_URL}{favorite_id}/") is True
+
+async def create_saved_search(telegram_id: str, data: dict) -> Dict | None:
+    result = await make_request('POST', SAVED_SEARCH_API_URL, json={**data, "customer": telegram_id})
+    return result if isinstance(result, dict) else None
+
+async def get_user_saved_searches(telegram_id: str) -> List[dict]:
+    return await get_all_pages(SAVED_SEARCH_API_URL, params={"customer": telegram_id, "page_size": 200})
+
+async def delete_saved_search(telegram_id: str, search_id: int) -> bool:
+    url = f"{SAVED_SEARCH_API_URL}{search_id}/"
+    return await make_request('DELETE', url, params={"customer": telegram_id}) is True
+
 async def get_user_properties(telegram_id: str) -> List[dict]:
-    result = await make_request('GET', f"{CUSTOMER_API_URL}{telegram_id}/properties/")
+    params = {"fields": ",".join(PROPERTY_SUMMARY_FIELDS)}
+    result = await make_request('GET', f"{CUSTOMER_API_URL}{telegram_id}/properties/", params=params)
     return result if isinstance(result, list) else []
 
 async def get_user_tours(telegram_id: str) -> List[dict]:
@@ -97,13 +150,20 @@ async def get_user_favorites(telegram_id: str) -> List[dict]:
     return result if isinstance(result, list) else []
 
 async def get_all_users() -> List[dict]:
-    result = await make_request('GET', CUSTOMER_API_URL)
-    return result if isinstance(result, list) else []
+    return await get_all_pages(CUSTOMER_API_URL, params={"page_size": 200})
 
 async def get_non_user_accounts() -> List[dict]:
     all_users = await get_all_users()
     return [user for user in all_users if user and user.get("user_type") in ["agent", "owner", "company"]]
 
+async def get_accounts_page(page: int = 1, page_size: int = 20, user_types=("agent", "owner", "company")) -> Dict:
+    """One page of agents/owners with ``confirmed_properties`` counts: ``{"count": n, "results": [...]}``."""
+    params = {"page": page, "page_size": page_size, "user_type": ",".join(user_types)}
+    result = await make_request('GET', f"{CUSTOMER_API_URL}accounts/", params=params)
+    if not isinstance(result, dict):
+        return {"count": 0, "results": []}
+    return {"count": result.get("count", 0), "results": result.get("results", [])}
+
 async def get_confirmed_user_properties(telegram_id: str) -> List[dict]:
     user_property_list = await get_user_properties(telegram_id)
     if not user_property_list:
@@ -0,0 +1,50 @@
+"""Update processor keeping each chat's updates in order (see :class:`PerChatUpdateProcessor`)."""
+import asyncio
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Processes up to ``max_concurrent_updates`` updates at once, but the updates of
+    one (chat, user) pair one at a time and in arrival order.
+
+    The persistent ``ConversationHandler``s keep one state per (chat, user) and expect
+    that state's updates one by one; with plain concurrency two quick messages could
+    both be handled against the same state and one transition would be lost.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._locks = {}
+
+    @staticmethod
+    def key(update) -> tuple | None:
+        if not isinstance(update, Update):
+            return None
+        chat, user = update.effective_chat, update.effective_user
+        if chat is None and user is None:
+            return None
+        return (chat.id if chat else None, user.id if user else None)
+
+    async def do_process_update(self, update, coroutine) -> None:
+        key = self.key(update)
+        if key is None:
+            await coroutine
+            return
+        # [lock, number of updates holding or waiting for it]; dropped when unused.
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -2,7 +2,7 @@ from django.conf import settings
 from rest_framework.routers import DefaultRouter
 from django.views.generic import TemplateView
 from django.conf.urls.static import static
-from .views import CustomerViewSet, PropertyViewSet, TourViewSet, FavoriteViewSet
+from .views import CustomerViewSet, PropertyViewSet, TourViewSet, FavoriteViewSet, SavedSearchViewSet
 from django.urls import path, include
 from . import views
 
@@ -11,8 +11,8 @@ router.register(r'customers', CustomerViewSet)
 router.register(r'properties', PropertyViewSet)
 router.register(r'tours', TourViewSet)
 router.register(r'favorites', FavoriteViewSet)
+router.register(r'saved-searches', SavedSearchViewSet)
 urlpatterns = [
-path('api/', include(router.urls)),
 path("", views.index),
 path("user/", views.profile, name="profile"),
 path('add-property/', views.add_property, name='add_property'),
@@ -20,6 +20,10 @@ path('property-success/', TemplateView.as_view(template_name="success.html"), na
 path('my-properties/', views.my_properties, name='my_properties'),
 path('api/tours/telegram/<str:telegram_id>/', views.get_tours_by_telegram_id, name='get_tours_by_telegram_id'),
 path('api/tours/check/', views.check_existing_tour, name='check_existing_tour'),
+path('api/cache/stats/', views.cache_statistics, name='cache_statistics'),
+# After the explicit api/ paths: the router's tours/<pk>/ would swallow tours/check/.
+path('api/', include(router.urls)),
+path('metrics/', views.metrics_view, name='metrics'),
 path('property/<int:pk>/', views.property_detail, name='property_detail'),
 
 ]
@@ -1,17 +1,31 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
-from .models import Customer, Property, Tour, Favorite
-from .serializers import CustomerSerializer, PropertySerializer, TourSerializer, FavoriteSerializer
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from .models import Customer, Property, Tour, Favorite, SavedSearch
+from .serializers import (
+    CustomerSerializer, CustomerAccountSerializer, PropertySerializer, PropertySummarySerializer,
+    PropertyListSerializer, PropertySearchSerializer, TourSerializer, FavoriteSerializer, SavedSearchSerializer,
+    NearbyPropertySerializer, NearbySearchSerializer, BoundingBoxSerializer,
+    PROPERTY_SUMMARY_FIELDS, PROPERTY_LIST_FIELDS, requested_fields,
+)
+from rest_framework.exceptions import ValidationError
+from django.db.models import F
+from .pagination import AccountsPagination
+from .search import search_properties
+from . import fulltext, geo
 from django.urls import reverse
+import hmac
 import logging
-import asyncio
 import json
+from django.conf import settings
 from django.http import HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
-from .bot import bot_tele
+from .runtime import runtime
+from .cache import cache_stats
+from . import metrics
 from django.contrib import messages
 
 from django.http import HttpResponseRedirect
@@ -19,7 +33,8 @@ from django.http import HttpResponseRedirect
 logger = logging.getLogger(__name__)
 
 @csrf_exempt
-def index(request):
+async def index(request):
+    """Telegram webhook: acknowledge at once and let the bot runtime process the update."""
     if request.method == 'POST':
         data = request.body
         res = json.loads(data.decode('utf-8'))
@@ -27,7 +42,10 @@ def index(request):
         # Log the JSON data to avoid print issues
         logger.info(json.dumps(res, ensure_ascii=False, indent=4))
 
-        asyncio.run(bot_tele(res))
+        try:
+            await runtime.aenqueue(res)
+        except Exception as e:
+            logger.error(f"Failed to queue update: {e}", exc_info=True)
         return HttpResponse("ok")
     else:
         return render(request, 'index.html')
@@ -35,25 +53,154 @@ def index(request):
 class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
+    cursor_ordering = '-created_at'
     
     @action(detail=True, methods=['get'])
     def properties(self, request, pk=None):
         customer = self.get_object()
         properties = Property.objects.filter(owner=customer)
-        serializer = PropertySerializer(properties, many=True)
+        serializer = PropertySerializer(properties, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
         
     @action(detail=True, methods=['get'])
     def favorites(self, request, pk=None):
         customer = self.get_object()
         favorites = Favorite.objects.filter(customer=customer)
-        serializer = FavoriteSerializer(favorites, many=True)
+        serializer = FavoriteSerializer(favorites, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def accounts(self, request):
+        """Paginated customers of the given ``?user_type=`` (default: agents and owners),
+        each with its confirmed-property count (a counter column, see ``state.counters``)."""
+        user_types = request.query_params.get('user_type', 'agent,owner,company').split(',')
+        customers = (
+            Customer.objects.filter(user_type__in=user_types)
+            .annotate(confirmed_properties=F('confirmed_property_count'))
+            .order_by('created_at', 'telegram_id')
+        )
+        paginator = AccountsPagination()
+        page = paginator.paginate_queryset(customers, request, view=self)
+        serializer = CustomerAccountSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
 
 class PropertyViewSet(viewsets.ModelViewSet):
     queryset = Property.objects.all()
     serializer_class = PropertySerializer
+    max_batch_ids = 100
+
+    def batch_ids(self):
+        """IDs requested with ``?ids=1,2,3`` on the list endpoint, or None."""
+        raw = self.request.query_params.get('ids')
+        if self.action != 'list' or not raw:
+            return None
+        try:
+            ids = {int(value) for value in raw.split(',') if value.strip()}
+        except ValueError:
+            raise ValidationError({'ids': 'Expected a comma-separated list of integers.'})
+        if len(ids) > self.max_batch_ids:
+            raise ValidationError({'ids': f'At most {self.max_batch_ids} ids per request.'})
+        return ids
+
+    def list_columns(self):
+        """Columns a list response renders: the ``?fields=`` selection or the slim list set."""
+        fields = requested_fields(self.request)
+        if fields is None:
+            return PROPERTY_LIST_FIELDS
+        concrete = {field.name for field in Property._meta.concrete_fields}
+        return ('id', *sorted(fields & concrete))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        ids = self.batch_ids()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids).only(*PROPERTY_SUMMARY_FIELDS)
+        elif self.action in ('list', 'search', 'text_search'):
+            queryset = queryset.only(*self.list_columns())
+        return queryset
+
+    def get_serializer_class(self):
+        if self.batch_ids() is not None:
+            return PropertySummarySerializer
+        if self.action in ('list', 'search', 'text_search') and requested_fields(self.request) is None:
+            return PropertyListSerializer
+        return super().get_serializer_class()
+
+    def paginate_queryset(self, queryset):
+        # ?ids= is already bounded by max_batch_ids
+        if self.batch_ids() is not None:
+            return None
+        return super().paginate_queryset(queryset)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Confirmed listings filtered by type, usage, location, rooms and price ranges."""
+        params = PropertySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        properties = search_properties(params.validated_data, self.get_queryset())
+        page = self.paginate_queryset(properties)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='text-search')
+    def text_search(self, request):
+        """Confirmed listings matching the words of ``?q=``, best matches first.
+
+        ``?page=`` pages through the newest ``fulltext.RANK_WINDOW`` matches only.
+        """
+        text = request.query_params.get('q', '')
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 100)
+        except ValueError:
+            raise ValidationError({'page': 'Expected integers for page and page_size.'})
+        offset = (page - 1) * page_size
+        if offset >= fulltext.RANK_WINDOW:
+            raise ValidationError({'page': f'Only the best {fulltext.RANK_WINDOW} matches are paged; refine ?q= instead.'})
+
+        if fulltext.fts_available():
+            ids = fulltext.ranked_ids(text, page_size + 1, offset)
+            rows = list(fulltext.in_rank_order(self.get_queryset(), ids[:page_size]))
+            has_next = len(ids) > page_size
+        elif fulltext.match_expression(text):
+            matches = self.get_queryset().filter(fulltext.contains_filter(text), status='confirmed').order_by('-pk')
+            rows = list(matches[offset:min(offset + page_size + 1, fulltext.RANK_WINDOW)])
+            has_next = len(rows) > page_size
+            rows = rows[:page_size]
+        else:
+            rows, has_next = [], False
+
+        serializer = self.get_serializer(rows, many=True)
+        return Response({'page': page, 'next': page + 1 if has_next else None, 'results': serializer.data})
+
+    def located(self):
+        columns = set(PROPERTY_LIST_FIELDS) | {'latitude', 'longitude'}
+        return Property.objects.only(*columns)
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Confirmed listings within ``radius_km`` of ``lat``/``lng``, closest first."""
+        params = NearbySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        point = params.validated_data
+        rows = geo.nearby(
+            self.located(), point['lat'], point['lng'], point['radius_km'], point['limit'], status='confirmed',
+        )
+        return Response(NearbyPropertySerializer(rows, many=True, context=self.get_serializer_context()).data)
+
+    @action(detail=False, methods=['get'])
+    def bbox(self, request):
+        """Confirmed listings inside a bounding box (cursor-paginated)."""
+        params = BoundingBoxSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        box = params.validated_data
+        rows = geo.within_box(
+            self.located(), box['min_lat'], box['min_lng'], box['max_lat'], box['max_lng'], status='confirmed',
+        )
+        page = self.paginate_queryset(rows)
+        serializer = NearbyPropertySerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def tours(self, request, pk=None):
@@ -69,6 +216,19 @@ class TourViewSet(viewsets.ModelViewSet):
 class FavoriteViewSet(viewsets.ModelViewSet):
     queryset = Favorite.objects.all()
     serializer_class = FavoriteSerializer
+
+
+class SavedSearchViewSet(viewsets.ModelViewSet):
+    queryset = SavedSearch.objects.all()
+    serializer_class = SavedSearchSerializer
+    cursor_ordering = '-created_at'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        customer = self.request.query_params.get('customer')
+        if customer:
+            queryset = queryset.filter(customer_id=customer)
+        return queryset
     
 @csrf_exempt
 def profile(request):
@@ -245,6 +405,23 @@ def get_tours_by_telegram_id(request, telegram_id):
     
     return Response(serializer.data)
     
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_statistics(request):
+    """Hit/miss counters of this worker's bot lookup caches."""
+    return Response(cache_stats())
+
+def metrics_view(request):
+    """Bot handler and data-call metrics of this worker, in the Prometheus text format."""
+    token = settings.METRICS_TOKEN
+    # Compared as bytes: compare_digest rejects non-ASCII str.
+    scraper = bool(token) and hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(), f"Bearer {token}".encode(),
+    )
+    if not (scraper or request.user.is_staff):
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 @api_view(['GET'])
 def check_existing_tour(request):
     telegram_id = request.GET.get('telegram_id')